@@ -1,21 +1,47 @@
 
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, Event
-from homeassistant.const import CONF_MAC, EVENT_HOMEASSISTANT_STOP
-from homeassistant.components import bluetooth
+try:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant, Event, callback
+    from homeassistant.const import CONF_MAC, EVENT_HOMEASSISTANT_STOP
+    from homeassistant.components import bluetooth
+    from homeassistant.helpers import config_validation as cv
+    from homeassistant.helpers.discovery import load_platform, async_load_platform
+    from homeassistant.helpers.dispatcher import dispatcher_send
+    from homeassistant.helpers.event import async_track_time_interval, call_later
+    from homeassistant.exceptions import ConfigEntryNotReady
+    from homeassistant.const import (
+        CONF_MAC,
+        CONF_DEVICES,
+        CONF_MONITORED_CONDITIONS,
+        CONF_NAME,
+        CONF_SENSORS,
+        CONF_SCAN_INTERVAL,
+        EVENT_HOMEASSISTANT_START,
+    )
+
+    from .coordinator import PranaCoordinator
+except ModuleNotFoundError as error:
+    # Without Home Assistant the package still works as a library (protocol, client)
+    if (error.name or "").split(".")[0] != "homeassistant":
+        raise
 
 from datetime import timedelta
 import asyncio
 
-from .const import DOMAIN
-from .coordinator import PranaCoordinator
+from .const import DOMAIN, CONF_HAS_SENSORS, CONF_MEDIAN, CONF_SCHEDULE, DEFAULT_MEDIAN
+from .history import History
 import logging
 
-PLATFORMS = ["fan", "number", "sensor", "button", "select", "switch"]
+PLATFORMS = ["fan", "number", "sensor", "binary_sensor", "button", "select", "switch"]
 CLIENT = "client"
 CONFIG = "config"
+# Frame history per device address, kept across config entry reloads
+DATA_HISTORY = "prana_history"
+# Optional callable(address, name) -> client transport, replacing Bluetooth
+# for every entry set up afterwards (the load test runs simulated units)
+DATA_TRANSPORT_FACTORY = "prana_transport_factory"
 SENSOR_TYPES = {
     "voc": ["VOC", "ppb", "mdi:gauge"],
     "co2": ["CO2", "ppm", "mdi:gauge"],
@@ -26,43 +52,52 @@ SENSOR_TYPES = {
 }
 
 SCAN_INTERVAL = timedelta(seconds=30)
-DEFAULT_MEDIAN = 1
-CONF_MEDIAN = "median"
 LOGGER = logging.getLogger(__name__)
 
-from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.discovery import load_platform, async_load_platform
-from homeassistant.helpers.dispatcher import dispatcher_send
-from homeassistant.helpers.event import async_track_time_interval, call_later
-from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.const import (
-    CONF_MAC,
-    CONF_DEVICES,
-    CONF_MONITORED_CONDITIONS,
-    CONF_NAME,
-    CONF_SENSORS,
-    CONF_SCAN_INTERVAL,
-    EVENT_HOMEASSISTANT_START,
-)
-
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry_LOGGER) -> bool:
     """Set up PRANA from a config entry."""
     address = entry.data[CONF_MAC]
+    transport_factory = hass.data.get(DATA_TRANSPORT_FACTORY)
 
-    if not (ble_device := bluetooth.async_ble_device_from_address(hass, address)):
+    if transport_factory is None and not (ble_device := bluetooth.async_ble_device_from_address(hass, address)):
         raise ConfigEntryNotReady(
             f"Could not find Prana with address {address}. Try power cycling the device or move the bluetooth coordinator closer"
         )
 
-    coordinator = PranaCoordinator(address, hass)
+    history = hass.data.setdefault(DATA_HISTORY, {}).setdefault(address, History())
+    coordinator = PranaCoordinator(
+        address,
+        hass,
+        entry.data["name"],
+        entry.data.get(CONF_HAS_SENSORS),
+        entry.options,
+        history,
+        transport=None if transport_factory is None else transport_factory(address, entry.data["name"]),
+    )
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    await coordinator.async_load_counters()
+    if coordinator.statistics is not None:
+        coordinator.statistics.async_backfill(history)
 
     # Fetch initial data
     await coordinator.async_config_entry_first_refresh()
 
+    @callback
+    def _async_persist_capabilities() -> None:
+        """Cache detected hardware so the next start doesn't wait for it."""
+        if coordinator.has_sensors is not None and entry.data.get(CONF_HAS_SENSORS) != coordinator.has_sensors:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_HAS_SENSORS: coordinator.has_sensors}
+            )
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_persist_capabilities))
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
+    coordinator.scheduler.async_start()
+    entry.async_on_unload(coordinator.scheduler.async_stop)
+
     async def _async_stop(event: Event) -> None:
         """Close the connection."""
         await coordinator.stop()
@@ -77,11 +112,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.counters.async_flush()
         await coordinator.stop()
     return unload_ok
 
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
-    coordinator = hass.data[DOMAIN].pop(entry.entry_id)
-    if entry.title != coordinator.name:
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    options = {key: value for key, value in entry.options.items() if key != CONF_SCHEDULE}
+    current = {key: value for key, value in coordinator.options.items() if key != CONF_SCHEDULE}
+    if entry.title != coordinator.device_info["name"] or options != current:
         await hass.config_entries.async_reload(entry.entry_id)
+    elif entry.options.get(CONF_SCHEDULE, []) != coordinator.options.get(CONF_SCHEDULE, []):
+        # A new schedule only needs re-arming, not a reconnect
+        coordinator.options = dict(entry.options)
+        coordinator.scheduler.async_set_programs(entry.options.get(CONF_SCHEDULE, []))
@@ -0,0 +1,6 @@
+"""Allow ``python -m prana``."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
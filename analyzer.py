@@ -0,0 +1,180 @@
+"""Find which frame bytes a command changes, from before/after captures.
+
+A probe records a few state frames, sends one ``Cmd``, and records a few
+more: ``<label>.before.prc`` and ``<label>.after.prc`` (``python -m prana
+probe`` writes them). ``analyze`` compares every pair byte by byte and
+classifies each offset of the state frame:
+
+* ``constant``: the same value in every frame of every capture;
+* ``noisy``: changes between frames of one capture, i.e. without a
+  command (sensor readings, counters);
+* ``command``: stable within captures but different before and after at
+  least one command;
+* ``stable``: none of the above (differs only between probes).
+
+Command offsets that the decoder does not read yet are the candidates for
+new fields. Needs NumPy, like ``batch``.
+"""
+import os
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .batch import FIELDS, FRAME_LENGTH, np, _require_numpy
+from .capture import HEADER, RECORD_HEAD, RECORD_SIZE, CaptureReader
+from .protocol import STATE_MSG_PREFIX
+
+BEFORE_SUFFIX = ".before.prc"
+AFTER_SUFFIX = ".after.prc"
+# Distinct values listed per offset
+MAX_VALUES = 16
+
+def _known_offsets() -> Dict[int, str]:
+    """Frame offset -> decoder field, for every byte decode_state reads."""
+    known: Dict[int, str] = {}
+    for name, fmt, start in FIELDS:
+        for offset in range(start, start + (2 if fmt.endswith("2") else 1)):
+            known.setdefault(offset, name)
+    return known
+
+KNOWN_OFFSETS = _known_offsets()
+
+def state_frames(reader: CaptureReader) -> "np.ndarray":
+    """(frames, FRAME_LENGTH) uint8 array of the full-length state frames of a capture.
+
+    The records are read in place; only the selected frames are copied, so
+    the result outlives the reader.
+    """
+    _require_numpy()
+    if not len(reader):
+        return np.zeros((0, FRAME_LENGTH), np.uint8)
+    records = np.frombuffer(
+        reader.buffer,
+        dtype=np.dtype({"names": ["length", "frame"], "formats": ["u1", ("u1", FRAME_LENGTH)],
+                        "offsets": [RECORD_HEAD.size - 1, RECORD_HEAD.size], "itemsize": RECORD_SIZE}),
+        count=len(reader),
+        offset=HEADER.size,
+    )
+    frames = records["frame"]
+    prefix = np.frombuffer(STATE_MSG_PREFIX, np.uint8)
+    keep = (records["length"] >= FRAME_LENGTH) & (frames[:, :2] == prefix).all(axis=1)
+    return frames[keep]
+
+def find_pairs(directory: str) -> Dict[str, Tuple[str, str]]:
+    """Label -> (before, after) paths of the complete pairs in ``directory``."""
+    pairs = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(BEFORE_SUFFIX):
+            label = name[: -len(BEFORE_SUFFIX)]
+            after = os.path.join(directory, label + AFTER_SUFFIX)
+            if os.path.exists(after):
+                pairs[label] = (os.path.join(directory, name), after)
+    return pairs
+
+def _kind(values: List[int], transitions: List[Tuple[int, int]]) -> str:
+    """Guess what a byte holds from the values it takes."""
+    if set(values) <= {0, 1}:
+        return "flag"
+    changed = [before ^ after for before, after in transitions]
+    if changed and all(bits and not bits & (bits - 1) for bits in changed):
+        return "bits " + ",".join(str(bit) for bit in sorted({bits.bit_length() - 1 for bits in changed}))
+    if all(value and not value & (value - 1) for value in values):
+        return "one-hot"
+    if all(value % 10 == 0 for value in values):
+        return "level x10"
+    return "byte"
+
+def analyze(pairs: Mapping[str, Tuple["np.ndarray", "np.ndarray"]]) -> dict:
+    """Classify every offset from label -> (before frames, after frames) arrays.
+
+    Returns ``offsets`` (one entry per offset), ``candidates`` (command
+    offsets grouped into runs changed by the same commands, as 16-bit
+    words when two neighbours move together) and the ``constant`` and
+    ``unmapped`` offset lists.
+    """
+    _require_numpy()
+    captures = [frames for pair in pairs.values() for frames in pair if len(frames)]
+    if not captures:
+        raise ValueError("no state frames in the captures")
+    everything = np.concatenate(captures)
+    constant = (everything == everything[0]).all(axis=0)
+    noisy = np.zeros(FRAME_LENGTH, bool)
+    for frames in captures:
+        noisy |= (frames != frames[0]).any(axis=0)
+
+    changed_by: Dict[int, Dict[str, Tuple[int, int]]] = {}
+    for label, (before, after) in pairs.items():
+        if not len(before) or not len(after):
+            continue
+        # Last frame before the command, first frame after it
+        for offset in np.nonzero((before[-1] != after[0]) & ~noisy)[0].tolist():
+            changed_by.setdefault(offset, {})[label] = (int(before[-1, offset]), int(after[0, offset]))
+
+    offsets = {}
+    for offset in range(FRAME_LENGTH):
+        values = np.unique(everything[:, offset]).tolist()
+        if constant[offset]:
+            kind = "constant"
+        elif noisy[offset]:
+            kind = "noisy"
+        elif offset in changed_by:
+            kind = "command"
+        else:
+            kind = "stable"
+        offsets[offset] = {
+            "class": kind,
+            "known": KNOWN_OFFSETS.get(offset),
+            "values": values[:MAX_VALUES],
+            "changed_by": changed_by.get(offset, {}),
+        }
+
+    candidates = []
+    command_offsets = sorted(changed_by)
+    index = 0
+    while index < len(command_offsets):
+        offset = command_offsets[index]
+        labels = set(changed_by[offset])
+        group = [offset]
+        following = offset + 1
+        if following in changed_by and set(changed_by[following]) == labels:
+            group.append(following)
+            index += 1
+        index += 1
+        if len(group) == 2:
+            transitions = [
+                (changed_by[offset][label][0] << 8 | changed_by[following][label][0],
+                 changed_by[offset][label][1] << 8 | changed_by[following][label][1])
+                for label in sorted(labels)
+            ]
+            kind = "word"
+        else:
+            transitions = [changed_by[offset][label] for label in sorted(labels)]
+            kind = _kind(offsets[offset]["values"], transitions)
+        candidates.append({
+            "offsets": group,
+            "known": sorted({KNOWN_OFFSETS[o] for o in group if o in KNOWN_OFFSETS}),
+            "kind": kind,
+            "changed_by": dict(zip(sorted(labels), transitions)),
+        })
+
+    return {
+        "frames": len(everything),
+        "pairs": len(pairs),
+        "offsets": offsets,
+        "candidates": candidates,
+        "constant": [offset for offset in range(FRAME_LENGTH) if constant[offset]],
+        "unmapped": [offset for offset in command_offsets if offset not in KNOWN_OFFSETS],
+    }
+
+def analyze_directory(directory: str, labels: Optional[List[str]] = None) -> dict:
+    """Run ``analyze`` over the capture pairs in ``directory``."""
+    _require_numpy()
+    pairs = find_pairs(directory)
+    if labels:
+        pairs = {label: paths for label, paths in pairs.items() if label in labels}
+    arrays = {}
+    for label, paths in pairs.items():
+        frames = []
+        for path in paths:
+            with CaptureReader(path) as reader:
+                frames.append(state_frames(reader))
+        arrays[label] = tuple(frames)
+    return analyze(arrays)
@@ -0,0 +1,152 @@
+"""Constant-memory anomaly checks on the decoded sensor channels."""
+from math import sqrt
+from typing import Dict, List, Mapping, Optional, Union
+
+# Largest believable change between two frames; bigger steps are glitches,
+# e.g. the temperature layout picked for the wrong firmware
+MAX_STEP = {
+    "co2": 1500,
+    "voc": 3000,
+    "temperature_in": 8.0,
+    "temperature_out": 8.0,
+    "humidity": 25,
+    "pressure": 15,
+}
+# Readings that never move for this long, on a channel that used to move,
+# are stuck. Whole-unit channels can sit still through a quiet night, and
+# pressure in whole mmHg for days, so it is never called stuck.
+STUCK_AFTER = {
+    "co2": 3 * 60 * 60,
+    "voc": 12 * 60 * 60,
+    "temperature_in": 6 * 60 * 60,
+    "temperature_out": 6 * 60 * 60,
+    "humidity": 12 * 60 * 60,
+    "pressure": None,
+}
+# Identical raw frames for this long mean the unit stopped refreshing them
+FROZEN_AFTER = 60 * 60
+# A jump keeps its flag raised this long so it is seen
+JUMP_HOLD = 15 * 60
+# After this many out-of-step frames in a row the new level is taken as real
+JUMP_ACCEPT = 6
+
+class Welford:
+    """Running mean and variance in O(1) memory."""
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return sqrt(self.variance)
+
+class ChannelMonitor:
+    """Statistics and change tracking for one channel."""
+    __slots__ = ("stats", "max_step", "stuck_after", "value", "changed_at", "jump_at", "jumps", "_rejected")
+
+    def __init__(self, max_step: float, stuck_after: Optional[float] = None) -> None:
+        self.stats = Welford()
+        self.max_step = max_step
+        self.stuck_after = stuck_after
+        self.value: Optional[float] = None
+        self.changed_at: Optional[float] = None
+        self.jump_at: Optional[float] = None
+        self.jumps = 0
+        self._rejected = 0
+
+    def update(self, value: Optional[float], now: float) -> None:
+        if value is None:
+            return
+        if self.value is not None and abs(value - self.value) > self.max_step:
+            self.jump_at = now
+            self.jumps += 1
+            self._rejected += 1
+            if self._rejected < JUMP_ACCEPT:
+                # Keep the glitch out of the statistics and wait for a believable reading
+                return
+        self._rejected = 0
+        if value != self.value:
+            self.value = value
+            self.changed_at = now
+        self.stats.add(value)
+
+    def stuck(self, now: float) -> bool:
+        return (
+            self.stuck_after is not None
+            and self.changed_at is not None
+            and self.stats.variance > 0
+            and now - self.changed_at > self.stuck_after
+        )
+
+    def jumped(self, now: float) -> bool:
+        return self.jump_at is not None and now - self.jump_at < JUMP_HOLD
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "count": self.stats.count,
+            "mean": round(self.stats.mean, 3),
+            "stddev": round(self.stats.stddev, 3),
+            "unchanged_for": None if self.changed_at is None else round(now - self.changed_at),
+            "jumps": self.jumps,
+        }
+
+class AnomalyDetector:
+    """Flag stuck channels, impossible jumps and frozen frames, per unit."""
+
+    def __init__(self, fields=tuple(MAX_STEP)) -> None:
+        self.channels: Dict[str, ChannelMonitor] = {
+            field: ChannelMonitor(MAX_STEP[field], STUCK_AFTER[field]) for field in fields
+        }
+        self._frame: bytes = b""
+        self._frame_changed_at: Optional[float] = None
+
+    def update(self, frame: bytes, values: Mapping[str, Optional[float]], now: float) -> Dict[str, Union[List[str], bool]]:
+        """Feed one frame read at monotonic ``now``; return the flags.
+
+        ``sensor_stuck`` and ``sensor_jump`` list the affected channels. A
+        channel only counts as stuck while another one of the unit still
+        moves; when all of them are flat the air is, too.
+        """
+        if frame != self._frame:
+            self._frame = frame
+            self._frame_changed_at = now
+        readings = False
+        for field, channel in self.channels.items():
+            value = values.get(field)
+            if value is not None:
+                readings = True
+                channel.update(value, now)
+        stuck = [field for field, channel in self.channels.items() if channel.stuck(now)]
+        if stuck:
+            moving = any(
+                channel.changed_at is not None and now - channel.changed_at < channel.stuck_after
+                for field, channel in self.channels.items()
+                if field not in stuck and channel.stuck_after is not None
+            )
+            if not moving:
+                stuck = []
+        return {
+            "sensor_stuck": stuck,
+            "sensor_jump": [field for field, channel in self.channels.items() if channel.jumped(now)],
+            # Without the sensor board an idle unit legitimately repeats its frame
+            "frame_frozen": readings and now - self._frame_changed_at > FROZEN_AFTER,
+        }
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "frame_unchanged_for": None if self._frame_changed_at is None else round(now - self._frame_changed_at),
+            "channels": {field: channel.as_dict(now) for field, channel in self.channels.items()},
+        }
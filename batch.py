@@ -0,0 +1,285 @@
+"""Columnar decoding of many frames at once with NumPy.
+
+The frame layout of ``protocol.decode_state`` is expressed as a structured
+dtype, so a buffer of frames (or the records of a capture file) is viewed
+as an array without copying, and every field is decoded with array
+operations. The results match ``decode_state`` bit for bit; ``verify``
+checks that on real frames. NumPy is optional: importing this module works
+without it, using it does not.
+"""
+from math import log2
+import os
+import random
+import struct
+import tempfile
+import time
+from typing import Dict, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .capture import FRAME_SIZE, HEADER, RECORD_HEAD, RECORD_SIZE, CaptureReader, CaptureWriter
+from .const import Display, PranaState
+from .protocol import STATE_MSG_PREFIX, decode_state
+from .simulator import OPCODES, SimulatedUnit
+
+FRAME_LENGTH = 137
+SENSOR_MASK = 0b0011111111111111
+NO_SENSORS_CO2 = (0, 10000)
+
+# (name, dtype, offset) of every byte range decode_state reads
+FIELDS = (
+    ("prefix", "S2", 0),
+    ("is_on", "u1", 10),
+    ("brightness", "u1", 12),
+    ("mini_heating_enabled", "u1", 14),
+    ("night_mode", "u1", 16),
+    ("boost_mode", "u1", 18),
+    ("auto_mode", "u1", 20),
+    ("flows_locked", "u1", 22),
+    ("speed_locked", "u1", 26),
+    ("is_input_fan_on", "u1", 28),
+    ("speed_in", "u1", 30),
+    ("is_output_fan_on", "u1", 32),
+    ("speed_out", "u1", 34),
+    ("timer_on", "u1", 38),
+    ("timer", ">u2", 39),
+    ("winter_mode_enabled", "u1", 42),
+    # The firmware variants overlap: 14-bit words at 51/54, single bytes at 49/55
+    ("temperature_in_byte", "u1", 49),
+    ("temperature_in", ">u2", 51),
+    ("temperature_out", ">u2", 54),
+    ("temperature_out_byte", "u1", 55),
+    ("humidity", "u1", 60),
+    ("co2", ">u2", 61),
+    ("voc", ">u2", 63),
+    ("pressure", "u1", 78),
+    ("display", "u1", 99),
+)
+
+# decode_state reads up to the display byte
+MIN_FRAME_LENGTH = max(start + (2 if fmt.endswith("2") else 1) for _, fmt, start in FIELDS)
+
+# Columns checked against the PranaState fields of the same name
+COMPARED = frozenset(name for name, _, _ in FIELDS if name not in ("prefix",)) - {
+    "temperature_in_byte", "temperature_out_byte"
+} | {"speed", "auto_mode_plus", "has_sensors"}
+
+# decode_state's brightness for every byte value; 0 is not a valid frame
+BRIGHTNESS = [int(log2(value) + 1) if value else -1 for value in range(256)]
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("NumPy is required for batch decoding")
+
+def frame_dtype(itemsize: int = FRAME_LENGTH, offset: int = 0) -> "np.dtype":
+    """Structured dtype of one frame starting ``offset`` bytes into items of ``itemsize`` bytes."""
+    _require_numpy()
+    return np.dtype(
+        {
+            "names": [name for name, _, _ in FIELDS],
+            "formats": [fmt for _, fmt, _ in FIELDS],
+            "offsets": [offset + start for _, _, start in FIELDS],
+            "itemsize": itemsize,
+        }
+    )
+
+def decode_array(raw: "np.ndarray") -> Dict[str, "np.ndarray"]:
+    """Decode a structured array of frames into columns named like PranaState.
+
+    ``valid`` marks state frames that decode_state would accept;
+    ``has_sensors`` marks the frames where it would set ``sensors``. The
+    other columns are computed for every row.
+    """
+    _require_numpy()
+    brightness = np.asarray(BRIGHTNESS, dtype=np.int8)[raw["brightness"]]
+    display = raw["display"].astype(np.int16)
+    columns = {
+        "valid": (raw["prefix"] == STATE_MSG_PREFIX) & (brightness > 0) & (display < len(Display)),
+        "brightness": brightness,
+        "speed_locked": raw["speed_locked"] // 10,
+        "speed_in": raw["speed_in"] // 10,
+        "speed_out": raw["speed_out"] // 10,
+        "auto_mode": (raw["auto_mode"] & 1).astype(bool),
+        "auto_mode_plus": (raw["auto_mode"] & 2).astype(bool),
+        "timer": raw["timer"].astype(np.int32),
+        "display": display,
+    }
+    for name in ("night_mode", "boost_mode", "flows_locked", "is_on", "mini_heating_enabled",
+                 "winter_mode_enabled", "is_input_fan_on", "is_output_fan_on", "timer_on"):
+        columns[name] = raw[name].astype(bool)
+    columns["speed"] = np.where(
+        columns["is_on"],
+        np.where(columns["flows_locked"], columns["speed_locked"], (columns["speed_in"] + columns["speed_out"]) // 2),
+        0,
+    )
+
+    humidity = raw["humidity"].astype(np.int16) - 128
+    co2 = raw["co2"] & SENSOR_MASK
+    newer = (co2 > NO_SENSORS_CO2[0]) & (co2 < NO_SENSORS_CO2[1])
+    columns.update(
+        has_sensors=humidity > 0,
+        humidity=humidity,
+        pressure=raw["pressure"].astype(np.int16) + 512,
+        co2=co2,
+        voc=raw["voc"] & SENSOR_MASK,
+        temperature_in=np.where(newer, raw["temperature_in"] & SENSOR_MASK, raw["temperature_in_byte"]) / 10.0,
+        temperature_out=np.where(newer, raw["temperature_out"] & SENSOR_MASK, raw["temperature_out_byte"]) / 10.0,
+    )
+    return columns
+
+def decode_frames(buffer, count: Optional[int] = None) -> Dict[str, "np.ndarray"]:
+    """Decode a buffer of back-to-back 137-byte frames."""
+    _require_numpy()
+    return decode_array(np.frombuffer(buffer, dtype=frame_dtype(), count=-1 if count is None else count))
+
+def decode_capture(reader: CaptureReader, start: int = 0, stop: Optional[int] = None) -> Dict[str, "np.ndarray"]:
+    """Decode records ``start`` to ``stop`` of a capture, straight from the map.
+
+    Adds ``timestamp`` (datetime64[ns]) and ``rssi`` columns. Records too
+    short for every field decode_state reads are marked invalid.
+    """
+    _require_numpy()
+    stop = len(reader) if stop is None else min(stop, len(reader))
+    count = max(0, stop - start)
+    meta_dtype = np.dtype(
+        {"names": ["timestamp", "rssi", "length"], "formats": ["<i8", "i1", "u1"],
+         "offsets": [0, RECORD_HEAD.size - 2, RECORD_HEAD.size - 1], "itemsize": RECORD_SIZE}
+    )
+    raw_dtype = frame_dtype(RECORD_SIZE, RECORD_HEAD.size)
+    if count:
+        offset = HEADER.size + start * RECORD_SIZE
+        meta = np.frombuffer(reader.buffer, dtype=meta_dtype, count=count, offset=offset)
+        raw = np.frombuffer(reader.buffer, dtype=raw_dtype, count=count, offset=offset)
+    else:
+        meta, raw = np.zeros(0, meta_dtype), np.zeros(0, raw_dtype)
+    columns = decode_array(raw)
+    columns["valid"] &= meta["length"] >= MIN_FRAME_LENGTH
+    columns["timestamp"] = meta["timestamp"].astype("datetime64[ns]")
+    columns["rssi"] = meta["rssi"]
+    return columns
+
+def _decode_or_error(frame) -> object:
+    """decode_state, returning the error class for frames it rejects by raising.
+
+    Not the exception itself: its traceback would keep ``frame``, and so the
+    map, alive.
+    """
+    try:
+        return decode_state(frame)
+    except (ValueError, IndexError, struct.error) as error:
+        return type(error)
+
+def verify(reader: CaptureReader, start: int = 0, stop: Optional[int] = None) -> dict:
+    """Decode a capture both ways and count the fields that differ.
+
+    A row must be ``valid`` exactly when decode_state returns a state (it
+    returns None for other frames and raises on malformed ones). Returns
+    frame counts, timings of both decoders and up to ten examples of
+    mismatches as (record, field, scalar value, batch value).
+    """
+    _require_numpy()
+    stop = len(reader) if stop is None else min(stop, len(reader))
+    began = time.perf_counter()
+    columns = decode_capture(reader, start, stop)
+    batch_seconds = time.perf_counter() - began
+
+    began = time.perf_counter()
+    states = [_decode_or_error(frame) for frame in reader.frames(start, stop)]
+    scalar_seconds = time.perf_counter() - began
+
+    mismatches = 0
+    examples = []
+    for row, state in enumerate(states):
+        decoded = isinstance(state, PranaState)
+        valid = bool(columns["valid"][row])
+        if valid != decoded:
+            mismatches += 1
+            if len(examples) < 10:
+                examples.append((start + row, "valid", decoded, valid))
+            continue
+        if not decoded:
+            continue
+        expected = state.to_dict()
+        expected["display"] = expected["display"].value
+        if bool(columns["has_sensors"][row]) != (state.sensors is not None):
+            expected = {"has_sensors": state.sensors is not None}
+        elif state.sensors is not None:
+            expected.update(state.sensors.to_dict())
+        for field, scalar in expected.items():
+            if field not in COMPARED:
+                continue
+            batch = columns[field][row].item()
+            if batch == scalar and type(batch) is type(scalar):
+                continue
+            mismatches += 1
+            if len(examples) < 10:
+                examples.append((start + row, field, scalar, batch))
+    return {
+        "frames": stop - start,
+        "state_frames": sum(isinstance(state, PranaState) for state in states),
+        "mismatches": mismatches,
+        "examples": examples,
+        "batch_seconds": round(batch_seconds, 6),
+        "scalar_seconds": round(scalar_seconds, 6),
+    }
+
+# Share of each kind of frame in the self-check capture
+CHECK_MIX = (("simulator", 0.4), ("mutated", 0.3), ("random", 0.15), ("truncated", 0.15))
+
+def write_check_capture(path: Union[str, os.PathLike], frames: int = 20000, seed: int = 0) -> Dict[str, int]:
+    """Write a capture of simulator, mutated, random and truncated frames.
+
+    Simulator frames come from units with and without the sensor board,
+    changed by a random opcode before each frame; mutated ones have a few
+    random bytes, and truncated ones are cut around MIN_FRAME_LENGTH, so
+    every branch of decode_state is hit. Returns the frames of each kind.
+    """
+    rng = random.Random(seed)
+    units = [SimulatedUnit(has_sensors, seed + index) for index, has_sensors in enumerate((True, False))]
+    opcodes = list(OPCODES)
+    kinds = [kind for kind, _ in CHECK_MIX]
+    weights = [share for _, share in CHECK_MIX]
+    counts = dict.fromkeys(kinds, 0)
+    with CaptureWriter(path) as writer:
+        for index in range(frames):
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "random":
+                frame = bytes(rng.getrandbits(8) for _ in range(rng.randint(0, FRAME_SIZE)))
+                if rng.random() < 0.5:
+                    frame = STATE_MSG_PREFIX + frame[2:]
+            else:
+                unit = rng.choice(units)
+                unit.apply(rng.choice(opcodes))
+                frame = unit.frame()
+                if kind == "mutated":
+                    data = bytearray(frame)
+                    for _ in range(rng.randint(1, 8)):
+                        data[rng.randrange(2, len(data))] = rng.getrandbits(8)
+                    frame = bytes(data)
+                elif kind == "truncated":
+                    frame = frame[:rng.randint(MIN_FRAME_LENGTH - 10, len(frame) - 1)]
+            writer.append(frame, index / 10)
+            counts[kind] += 1
+            if not index % 4096:
+                writer.flush()
+    return counts
+
+def self_check(frames: int = 20000, seed: int = 0, path: Optional[Union[str, os.PathLike]] = None) -> dict:
+    """``verify`` on a capture from ``write_check_capture``; rerun it after changing decode_state.
+
+    The capture goes to a temporary file unless ``path`` is given, which
+    is replaced.
+    """
+    _require_numpy()
+    with tempfile.TemporaryDirectory() as directory:
+        if path is None:
+            path = os.path.join(directory, "check.prc")
+        elif os.path.exists(path):
+            os.remove(path)
+        kinds = write_check_capture(path, frames, seed)
+        with CaptureReader(path) as reader:
+            result = verify(reader)
+    return {"kinds": kinds, "seed": seed, **result}
@@ -0,0 +1,88 @@
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+
+"""Diagnostic problem flags for Prana units."""
+from . import DOMAIN
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+import logging
+
+from homeassistant.helpers.entity import EntityCategory
+
+from .entity import PranaEntity
+
+LOGGER = logging.getLogger(__name__)
+
+@dataclass(frozen=True, kw_only=True)
+class PranaBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describes a Prana binary sensor; the key doubles as the unique id suffix."""
+    value_fn: Callable[[Any], bool]
+    # Channels behind the flag, shown as an attribute
+    fields_fn: Callable[[Any], list] | None = None
+    depends_on: frozenset[str]
+
+BINARY_SENSORS: tuple[PranaBinarySensorEntityDescription, ...] = (
+    PranaBinarySensorEntityDescription(
+        key="sensor_stuck",
+        name="Sensor Stuck",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: bool(coordinator.sensor_stuck),
+        fields_fn=lambda coordinator: coordinator.sensor_stuck,
+        depends_on=frozenset({"sensor_stuck"}),
+    ),
+    PranaBinarySensorEntityDescription(
+        key="sensor_jump",
+        name="Sensor Jump",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: bool(coordinator.sensor_jump),
+        fields_fn=lambda coordinator: coordinator.sensor_jump,
+        depends_on=frozenset({"sensor_jump"}),
+    ),
+    PranaBinarySensorEntityDescription(
+        key="frame_frozen",
+        name="Frames Frozen",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.frame_frozen,
+        depends_on=frozenset({"frame_frozen"}),
+    ),
+)
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    name = config_entry.data["name"]
+
+    async_add_entities(PranaBinarySensor(coordinator, name, description) for description in BINARY_SENSORS)
+
+class PranaBinarySensor(PranaEntity, BinarySensorEntity):
+    """Prana problem flag driven by an entity description."""
+    entity_description: PranaBinarySensorEntityDescription
+
+    def __init__(self, coordinator, name: str, description: PranaBinarySensorEntityDescription):
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, name)
+        self.entity_description = description
+        self._depends_on = description.depends_on
+        self._attr_unique_id = f"{name}_{description.key}"
+
+    def _render(self) -> tuple:
+        return (self.available, self.state, self.extra_state_attributes)
+
+    @property
+    def is_on(self):
+        """Return true if the problem is present."""
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the affected channels."""
+        if self.entity_description.fields_fn is None:
+            return None
+        return {"fields": list(self.entity_description.fields_fn(self.coordinator))}
@@ -36,6 +36,8 @@ from homeassistant.util.percentage import (
     ranged_value_to_percentage,
 )
 
+from .entity import PranaEntity
+
 LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
@@ -49,40 +51,15 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     async_add_entities(controls_to_add)
 
-class BasePranaButton(CoordinatorEntity, ButtonEntity):
-    # Implement one of these methods.
+class BasePranaButton(PranaEntity, ButtonEntity):
     """Representation of a Prana fan."""
+    _depends_on = frozenset()
+
     def __init__(self, hass, coordinator, name: str, entry_id: str):
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        _attr_has_entity_name = True
+        super().__init__(coordinator, name)
         self._hass = hass
-        self.coordinator = coordinator
-        self._name = name
         self._entry_id = entry_id
-        self._hass.bus.async_listen("prana_update", self._handle_coordinator_update)
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)},
-        )
 
 #Test
 class PranaTestRunButton(BasePranaButton):
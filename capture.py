@@ -0,0 +1,226 @@
+"""Fixed-record binary captures of raw notification frames.
+
+File layout, little-endian::
+
+    header   8s magic, H version, H record size, H frame size, 2x pad
+    record   q timestamp (ns since the epoch), 6s device (MAC bytes),
+             b RSSI (-128 when unknown), B frame length, frame bytes
+             zero-padded to the frame size
+
+Every record has the same size, so record ``i`` starts at
+``HEADER.size + i * RECORD_SIZE`` and a reader can mmap the file and hand
+out frames as memoryview slices without copying.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+from datetime import datetime
+import mmap
+import os
+import struct
+from typing import NamedTuple, Optional, Union
+
+MAGIC = b"PRNACAP\x00"
+VERSION = 1
+FRAME_SIZE = 144  # 137-byte state frames, padded to a multiple of 8
+HEADER = struct.Struct("<8sHHH2x")
+RECORD_HEAD = struct.Struct("<q6sbB")
+RECORD_SIZE = RECORD_HEAD.size + FRAME_SIZE
+NO_RSSI = -128
+# Records the coordinator buffers before writing them out
+FLUSH_RECORDS = 64
+
+class CaptureError(Exception):
+    """The file is not a capture this module can read."""
+
+class CaptureRecord(NamedTuple):
+    timestamp: float
+    device: str
+    rssi: Optional[int]
+    frame: memoryview
+
+def _device_bytes(device: str) -> bytes:
+    try:
+        raw = bytes.fromhex(device.replace(":", "").replace("-", ""))
+    except ValueError:
+        raw = b""
+    # Addresses that are not MACs (macOS hands out UUIDs) are stored as zeros
+    return raw if len(raw) == 6 else bytes(6)
+
+def _device_str(raw: bytes) -> str:
+    return ":".join(f"{byte:02X}" for byte in raw)
+
+def pack_record(frame: bytes, timestamp: float, device: str = "", rssi: Optional[int] = None) -> bytes:
+    """Encode one record; frames longer than FRAME_SIZE are truncated."""
+    length = min(len(frame), FRAME_SIZE)
+    rssi = NO_RSSI if rssi is None else max(NO_RSSI + 1, min(127, int(rssi)))
+    head = RECORD_HEAD.pack(round(timestamp * 1e9), _device_bytes(device), rssi, length)
+    return head + bytes(frame[:length]).ljust(FRAME_SIZE, b"\0")
+
+class CaptureWriter:
+    """Append records to a capture file.
+
+    ``append`` and ``detach`` only touch memory, so they are safe on the
+    event loop; ``open``, ``write`` and ``close`` do the file I/O and belong
+    in an executor there. Outside an event loop use ``flush``.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = os.fspath(path)
+        self.records = 0
+        self._pending = bytearray()
+        self._file = None
+
+    def open(self) -> "CaptureWriter":
+        """Create the file, or check the header of an existing one and drop its partial last record."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "ab+")
+        self._file.seek(0)
+        header = self._file.read(HEADER.size)
+        if not header:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, FRAME_SIZE))
+        else:
+            _check_header(header, self.path)
+            # Drop a record cut short by a crash, so new ones start aligned
+            size = self._file.seek(0, os.SEEK_END)
+            self._file.truncate(size - (size - HEADER.size) % RECORD_SIZE)
+        return self
+
+    def append(self, frame: bytes, timestamp: Optional[float] = None, device: str = "", rssi: Optional[int] = None) -> None:
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        self._pending += pack_record(frame, timestamp, device, rssi)
+        self.records += 1
+
+    @property
+    def pending(self) -> int:
+        """Records appended but not written yet."""
+        return len(self._pending) // RECORD_SIZE
+
+    def detach(self) -> bytes:
+        """Take the pending records for ``write``."""
+        data, self._pending = bytes(self._pending), bytearray()
+        return data
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+
+    def flush(self) -> None:
+        self.write(self.detach())
+
+    def close(self) -> None:
+        """Write what is pending and close the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "CaptureWriter":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _check_header(header: bytes, path: str) -> None:
+    if len(header) < HEADER.size:
+        raise CaptureError(f"{path}: truncated header")
+    magic, version, record_size, frame_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise CaptureError(f"{path}: not a Prana capture")
+    if version != VERSION or record_size != RECORD_SIZE or frame_size != FRAME_SIZE:
+        raise CaptureError(f"{path}: unsupported capture version {version} ({record_size}/{frame_size})")
+
+class CaptureReader:
+    """Memory-mapped, random-access view of a capture file.
+
+    Frames are memoryview slices of the map; they stay valid until the
+    reader is closed, and closing fails with BufferError while any of them
+    is still referenced. A trailing partial record (a capture still being
+    written) is ignored.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            _check_header(file.read(HEADER.size), self.path)
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size > HEADER.size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self._count = max(0, (size - HEADER.size) // RECORD_SIZE)
+        self._timestamps: Optional[array] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return HEADER.size + index * RECORD_SIZE
+
+    @property
+    def buffer(self) -> memoryview:
+        """The whole file; record ``i`` starts at ``HEADER.size + i * RECORD_SIZE``."""
+        return self._view
+
+    def frame(self, index: int) -> memoryview:
+        """Frame bytes of one record, without copying."""
+        offset = self._offset(index)
+        length = self._view[offset + RECORD_HEAD.size - 1]
+        start = offset + RECORD_HEAD.size
+        return self._view[start:start + length]
+
+    def __getitem__(self, index: int) -> CaptureRecord:
+        offset = self._offset(index)
+        timestamp, device, rssi, length = RECORD_HEAD.unpack_from(self._view, offset)
+        start = offset + RECORD_HEAD.size
+        return CaptureRecord(
+            timestamp / 1e9, _device_str(device), None if rssi == NO_RSSI else rssi, self._view[start:start + length]
+        )
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        for index in range(self._count):
+            yield self[index]
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[memoryview]:
+        """Frame slices of records ``start`` to ``stop``, the fast path for decoders."""
+        view = self._view
+        head = RECORD_HEAD.size
+        stop = self._count if stop is None else min(stop, self._count)
+        offset = HEADER.size + start * RECORD_SIZE
+        for _ in range(start, stop):
+            length = view[offset + head - 1]
+            yield view[offset + head:offset + head + length]
+            offset += RECORD_SIZE
+
+    @property
+    def timestamps(self) -> array:
+        """Record timestamps in ns, built on first use."""
+        if self._timestamps is None:
+            unpack = struct.Struct("<q").unpack_from
+            view = self._view
+            self._timestamps = array(
+                "q", (unpack(view, HEADER.size + index * RECORD_SIZE)[0] for index in range(self._count))
+            )
+        return self._timestamps
+
+    def seek(self, when: Union[float, datetime]) -> int:
+        """Index of the first record at or after ``when``; records are assumed in time order."""
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        return bisect_left(self.timestamps, round(when * 1e9))
+
+    def close(self) -> None:
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,302 @@
+"""Chaos scenarios for the connection and retry logic.
+
+    python -m custom_components.prana.chaos [--scenario NAME ...] [--commands 200] [--json]
+
+The real ``BleakTransport``, ``PranaClient`` and
+``retry_bluetooth_connection_error`` run against stand-ins for
+``establish_connection`` and ``BleakClientWithServiceCache`` that talk to a
+``SimulatedUnit`` and inject faults: links dropping in the middle of a
+write, ``BleakDBusError`` bursts while connecting, ``BleakNotFoundError``
+while the unit is out of range, a slow ``start_notify``, and notifications
+that still arrive after a disconnect. Commands are sent one after the other
+through a retried wrapper, like the coordinator's. Per scenario:
+
+* success rate of the commands and their latency p50/p99 (ms);
+* wasted attempts: connection attempts and writes that failed;
+* time to recover (ms): from a fault to the end of the next command that
+  succeeds, mean and max;
+* late frames: notifications of a closed connection that reached the
+  listeners.
+
+The stand-ins raise what ``establish_connection`` lets through; its own
+retries are not modelled. Needs bleak for the exception types.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from bleak.exc import BleakDBusError, BleakError
+from bleak_retry_connector import BleakNotFoundError
+
+from .client import BleakTransport, PranaClient, retry_bluetooth_connection_error
+from .protocol import Cmd
+from .simulator import SIMULATED_ADDRESS, SIMULATED_NAME, SimulatedUnit
+from .timing import format_table, percentile
+
+LOGGER = logging.getLogger(__name__)
+
+COMMANDS = (Cmd.SPEED_1, Cmd.SPEED_2, Cmd.SPEED_3, Cmd.SPEED_4, Cmd.SPEED_5)
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    # Chance that a write drops the link before it completes
+    drop_rate: float = 0.0
+    # Every n-th command drops the link and fails the next ``dbus_burst`` connects
+    dbus_every: int = 0
+    dbus_burst: int = 0
+    # Every n-th command the unit goes out of range for ``not_found_for`` seconds
+    not_found_every: int = 0
+    not_found_for: float = 0.0
+    notify_delay: float = 0.0
+    # A closed connection still delivers a frame this many seconds later
+    late_notify: Optional[float] = None
+    disconnect_delay: float = 120.0
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("baseline", "no faults"),
+        Scenario("drop_mid_write", "10% of writes lose the link", drop_rate=0.1),
+        Scenario("dbus_burst", "every 20th command: link lost, then 4 DBus errors", dbus_every=20, dbus_burst=4),
+        Scenario("not_found", "every 40th command: out of range for 1 s", not_found_every=40, not_found_for=1.0),
+        Scenario("slow_notify", "start_notify takes 0.5 s, 10% of writes lose the link", drop_rate=0.1, notify_delay=0.5),
+        Scenario("late_notify", "idle disconnects, a frame 20 ms after each", late_notify=0.02, disconnect_delay=0.05),
+    )
+}
+
+class ChaosRadio:
+    """The air between the client and a simulated unit, with the faults of a scenario.
+
+    ``establish_connection`` is the stand-in handed to ``BleakTransport``;
+    it creates ``ChaosClient`` instances.
+    """
+
+    def __init__(self, scenario: Scenario, unit: SimulatedUnit, seed: int = 0) -> None:
+        self.scenario = scenario
+        self.unit = unit
+        self.services = object()
+        self.client: Optional["ChaosClient"] = None
+        self.stats = dict.fromkeys(
+            ("connect_attempts", "connect_failures", "writes", "write_failures", "late_sent", "late_delivered"), 0
+        )
+        # Monotonic times of the faults not recovered from yet
+        self.faults: List[float] = []
+        self.delivering_late = False
+        self._random = random.Random(seed)
+        self._dbus_pending = 0
+        self._gone_until = 0.0
+
+    def drop(self) -> None:
+        """Lose the link of the current connection."""
+        if self.client is not None and self.client.is_connected:
+            self.client.lost()
+
+    def dbus_burst(self, count: int) -> None:
+        self.faults.append(time.monotonic())
+        self._dbus_pending = count
+        self.drop()
+
+    def go_away(self, seconds: float) -> None:
+        self.faults.append(time.monotonic())
+        self._gone_until = time.monotonic() + seconds
+        self.drop()
+
+    async def establish_connection(
+        self, client_class: type, device: Any, name: str, disconnected_callback: Callable[[Any], None], **kwargs: Any
+    ) -> "ChaosClient":
+        self.stats["connect_attempts"] += 1
+        if self._dbus_pending:
+            self._dbus_pending -= 1
+            self.stats["connect_failures"] += 1
+            raise BleakDBusError("org.bluez.Error.InProgress", ["Operation already in progress"])
+        if time.monotonic() < self._gone_until:
+            self.stats["connect_failures"] += 1
+            raise BleakNotFoundError(f"{name}: device not found")
+        self.client = client_class(self, disconnected_callback)
+        return self.client
+
+class ChaosClient:
+    """Stand-in for BleakClientWithServiceCache, on a ChaosRadio."""
+
+    def __init__(self, radio: ChaosRadio, disconnected_callback: Callable[[Any], None]) -> None:
+        self._radio = radio
+        self._disconnected_callback = disconnected_callback
+        self._connected = True
+        self._handler: Optional[Callable[[Any, bytearray], Any]] = None
+        self.services = radio.services
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def lost(self) -> None:
+        """The link drops without the client asking."""
+        self._connected = False
+        self._closed()
+
+    def _closed(self) -> None:
+        self._disconnected_callback(self)
+        late = self._radio.scenario.late_notify
+        if late is not None and self._handler is not None:
+            asyncio.get_running_loop().call_later(late, self._send_late, self._handler)
+
+    def _send_late(self, handler: Callable[[Any, bytearray], Any]) -> None:
+        self._radio.stats["late_sent"] += 1
+        asyncio.create_task(self._deliver_late(handler))
+
+    async def _deliver_late(self, handler: Callable[[Any, bytearray], Any]) -> None:
+        self._radio.delivering_late = True
+        try:
+            await handler(None, bytearray(self._radio.unit.frame()))
+        finally:
+            self._radio.delivering_late = False
+
+    async def start_notify(self, uuid: str, handler: Callable[[Any, bytearray], Any]) -> None:
+        if self._radio.scenario.notify_delay:
+            await asyncio.sleep(self._radio.scenario.notify_delay)
+        if not self._connected:
+            self._radio.stats["connect_failures"] += 1
+            raise BleakError("Not connected")
+        self._handler = handler
+
+    async def stop_notify(self, uuid: str) -> None:
+        if not self._connected:
+            raise BleakError("Not connected")
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        radio = self._radio
+        radio.stats["writes"] += 1
+        if not self._connected:
+            radio.stats["write_failures"] += 1
+            raise BleakError("Not connected")
+        if radio.scenario.drop_rate and radio._random.random() < radio.scenario.drop_rate:
+            radio.faults.append(time.monotonic())
+            radio.stats["write_failures"] += 1
+            self.lost()
+            raise BleakError("Disconnected during write")
+        if bytes(data) == bytes(Cmd.READ_STATE):
+            await self._handler(None, bytearray(radio.unit.frame()))
+        else:
+            radio.unit.apply(data)
+
+    async def disconnect(self) -> None:
+        if self._connected:
+            self._connected = False
+            self._closed()
+
+class _Commands:
+    """The coordinator's command path: a retried call of PranaClient.write."""
+
+    def __init__(self, client: PranaClient) -> None:
+        self.client = client
+        self.name = client.name
+
+    @retry_bluetooth_connection_error
+    async def send(self, opcode: bytes) -> None:
+        await self.client.write(opcode)
+
+async def run(scenario: Scenario, commands: int = 200, interval: float = 0.1, seed: int = 0) -> Dict[str, Any]:
+    """Send ``commands`` commands through a faulty radio and return the metrics."""
+    radio = ChaosRadio(scenario, SimulatedUnit(seed=seed), seed)
+    transport = BleakTransport(
+        SimpleNamespace(address=SIMULATED_ADDRESS, name=SIMULATED_NAME),
+        SIMULATED_NAME,
+        establish_connection=radio.establish_connection,
+        client_class=ChaosClient,
+    )
+    client = PranaClient(transport, scenario.disconnect_delay)
+    sender = _Commands(client)
+
+    def _count_frame(state, data) -> None:
+        if radio.delivering_late:
+            radio.stats["late_delivered"] += 1
+
+    client.add_listener(_count_frame)
+    latencies: List[float] = []
+    recoveries: List[float] = []
+    failures: Dict[str, int] = {}
+    for index in range(commands):
+        if scenario.dbus_every and index and index % scenario.dbus_every == 0:
+            radio.dbus_burst(scenario.dbus_burst)
+        if scenario.not_found_every and index and index % scenario.not_found_every == 0:
+            radio.go_away(scenario.not_found_for)
+        began = time.monotonic()
+        try:
+            await sender.send(COMMANDS[index % len(COMMANDS)])
+        except Exception as err:
+            failures[type(err).__name__] = failures.get(type(err).__name__, 0) + 1
+            LOGGER.debug("command %s failed: %s", index, err)
+        else:
+            done = time.monotonic()
+            latencies.append(done - began)
+            recoveries.extend(done - fault for fault in radio.faults)
+            radio.faults.clear()
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - began)))
+    await client.disconnect()
+    # Let the frames of the last disconnect arrive
+    if scenario.late_notify is not None:
+        await asyncio.sleep(scenario.late_notify * 2)
+
+    stats = radio.stats
+    return {
+        "scenario": scenario.name,
+        "commands": commands,
+        "succeeded": len(latencies),
+        "success_rate": round(len(latencies) / commands, 3) if commands else None,
+        "failures": failures,
+        "connect_attempts": stats["connect_attempts"],
+        "wasted_attempts": stats["connect_failures"] + stats["write_failures"],
+        "recoveries": len(recoveries),
+        "unrecovered": len(radio.faults),
+        "recover_mean_ms": round(statistics.fmean(recoveries) * 1000, 1) if recoveries else None,
+        "recover_max_ms": round(max(recoveries) * 1000, 1) if recoveries else None,
+        "command_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "command_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "late_frames": stats["late_delivered"],
+    }
+
+COLUMNS = (
+    ("scenario", "scenario"),
+    ("success_rate", "success"),
+    ("connect_attempts", "connects"),
+    ("wasted_attempts", "wasted"),
+    ("recoveries", "faults"),
+    ("recover_mean_ms", "recover ms"),
+    ("recover_max_ms", "recover max"),
+    ("command_p50_ms", "cmd p50"),
+    ("command_p99_ms", "cmd p99"),
+    ("late_frames", "late frames"),
+)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m custom_components.prana.chaos", description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these (repeatable)")
+    parser.add_argument("--commands", type=int, default=200, help="commands per scenario")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between command starts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR, stream=sys.stderr)
+
+    rows = []
+    for name in args.scenario or SCENARIOS:
+        row = asyncio.run(run(SCENARIOS[name], args.commands, args.interval, args.seed))
+        rows.append(row)
+        if args.json:
+            print(json.dumps(row), flush=True)
+        elif row["failures"]:
+            print(f"{name}: failed commands {row['failures']}", file=sys.stderr)
+    if not args.json:
+        print(format_table(COLUMNS, rows))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
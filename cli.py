@@ -0,0 +1,357 @@
+"""Command line tool: ``python -m prana <command>``.
+
+Talks to a unit through PranaClient, without Home Assistant. Use the
+address ``sim`` (or ``--simulate``) for the in-process simulator; it is
+also used when bleak is not installed or no Bluetooth adapter is present.
+Decoded states are printed as JSON lines.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from enum import Enum
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Optional
+
+from .capture import FLUSH_RECORDS, CaptureReader, CaptureWriter
+from .client import BleakTransport, PranaClient
+from .const import PranaState
+from .protocol import Cmd, decode_state
+from .simulator import SIMULATED_ADDRESS, SIMULATED_NAME, SimulatedTransport
+
+SERVICE_UUID = "000000ee-0000-1000-8000-00805f9b34fb"
+NAME_PREFIX = "prna"
+SIMULATED = "sim"
+
+LOGGER = logging.getLogger(__name__)
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _print(record: dict) -> None:
+    print(json.dumps(record, default=_json_default), flush=True)
+
+def _state_record(address: str, state: PranaState, data: bytes, raw: bool) -> dict:
+    record = {"address": address, **state.to_dict()}
+    if raw:
+        record["raw"] = data
+    return record
+
+def _bleak_available() -> bool:
+    try:
+        import bleak  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _no_adapter(err: BaseException) -> bool:
+    """Whether ``err`` means there is no Bluetooth adapter to use."""
+    return isinstance(err, FileNotFoundError) or "adapter" in str(err).lower()
+
+def _warn(message: str) -> None:
+    print(message, file=sys.stderr)
+
+class Session:
+    """A connected PranaClient, on a real unit or on the simulator."""
+
+    def __init__(
+        self, address: str, simulate: bool, disconnect_delay: float, capture: Optional[CaptureWriter] = None
+    ) -> None:
+        self.simulated = simulate or address.lower() == SIMULATED or not _bleak_available()
+        if self.simulated and address.lower() != SIMULATED and not simulate:
+            _warn("bleak is not installed; using the simulator")
+        self.address = SIMULATED_ADDRESS if self.simulated else address
+        self._disconnect_delay = disconnect_delay
+        self.capture = capture
+        self.client = self._client()
+        self.frames: "asyncio.Queue[tuple[PranaState, bytes]]" = asyncio.Queue()
+
+    def _client(self) -> PranaClient:
+        transport = SimulatedTransport() if self.simulated else BleakTransport(self.address)
+        client = PranaClient(transport, self._disconnect_delay)
+        client.add_listener(self._on_frame)
+        return client
+
+    def _on_frame(self, state: Optional[PranaState], data: bytes) -> None:
+        if self.capture is not None:
+            # Every frame, state or not, goes into the capture
+            self.capture.append(data, device=self.address)
+            if self.capture.pending >= FLUSH_RECORDS:
+                self.capture.flush()
+        if state is not None:
+            self.frames.put_nowait((state, bytes(data)))
+
+    async def connect(self) -> None:
+        try:
+            await self.client.connect()
+        except Exception as err:
+            if self.simulated or not _no_adapter(err):
+                raise
+            _warn(f"no Bluetooth adapter ({err}); using the simulator")
+            self.simulated = True
+            self.address = SIMULATED_ADDRESS
+            self.client = self._client()
+            await self.client.connect()
+
+    async def next_state(self, timeout: float) -> tuple:
+        return await asyncio.wait_for(self.frames.get(), timeout)
+
+    async def close(self) -> None:
+        await self.client.disconnect()
+        if self.capture is not None:
+            self.capture.close()
+
+async def _scan(args: argparse.Namespace) -> int:
+    if not args.simulate and _bleak_available():
+        from bleak import BleakScanner
+
+        try:
+            found = await BleakScanner.discover(timeout=args.timeout, return_adv=True)
+        except Exception as err:
+            if not _no_adapter(err):
+                raise
+            _warn(f"no Bluetooth adapter ({err}); listing the simulator")
+        else:
+            for device, adv in sorted(found.values(), key=lambda item: -item[1].rssi):
+                name = adv.local_name or device.name or ""
+                if name.lower().startswith(NAME_PREFIX) or SERVICE_UUID in adv.service_uuids:
+                    _print({"address": device.address, "name": name, "rssi": adv.rssi})
+            return 0
+    _print({"address": SIMULATED, "name": SIMULATED_NAME, "rssi": 0})
+    return 0
+
+async def _state(args: argparse.Namespace) -> int:
+    session = Session(args.address, args.simulate, args.timeout)
+    try:
+        await session.connect()
+        await session.client.request_state()
+        state, data = await session.next_state(args.timeout)
+        _print(_state_record(session.address, state, data, args.raw))
+    finally:
+        await session.close()
+    return 0
+
+async def _watch(args: argparse.Namespace) -> int:
+    capture = CaptureWriter(args.capture).open() if args.capture else None
+    session = Session(args.address, args.simulate, args.interval + args.timeout, capture)
+    printed = 0
+    try:
+        await session.connect()
+        while args.count is None or printed < args.count:
+            await session.client.request_state()
+            # Print everything that arrived, including frames the unit pushed by itself
+            state, data = await session.next_state(args.timeout)
+            while True:
+                _print(_state_record(session.address, state, data, args.raw))
+                printed += 1
+                if session.frames.empty() or printed == args.count:
+                    break
+                state, data = session.frames.get_nowait()
+            if args.count is None or printed < args.count:
+                await asyncio.sleep(args.interval)
+    finally:
+        await session.close()
+    return 0
+
+async def _send(args: argparse.Namespace) -> int:
+    opcode = getattr(Cmd, args.opcode.upper(), None)
+    if not isinstance(opcode, bytearray):
+        _warn(f"unknown opcode {args.opcode}; see the opcodes command")
+        return 2
+    session = Session(args.address, args.simulate, args.timeout)
+    try:
+        await session.connect()
+        # The client follows every command with a state request
+        await session.client.write(opcode)
+        state, data = await session.next_state(args.timeout)
+        _print(_state_record(session.address, state, data, args.raw))
+    finally:
+        await session.close()
+    return 0
+
+async def _replay(args: argparse.Namespace) -> int:
+    with CaptureReader(args.file) as reader:
+        start = reader.seek(datetime.fromisoformat(args.since)) if args.since else 0
+        stop = len(reader) if args.count is None else start + args.count
+        for index in range(start, min(stop, len(reader))):
+            record = reader[index]
+            state = decode_state(record.frame, datetime.fromtimestamp(record.timestamp))
+            if state is not None:
+                _print({**_state_record(record.device, state, record.frame, args.raw), "rssi": record.rssi})
+            del record
+    return 0
+
+async def _decode(args: argparse.Namespace) -> int:
+    from . import batch
+
+    if batch.np is None:
+        _warn("decode needs NumPy")
+        return 2
+    with CaptureReader(args.file) as reader:
+        if args.verify:
+            result = batch.verify(reader)
+            _print(result)
+            return 1 if result["mismatches"] else 0
+        began = time.perf_counter()
+        columns = batch.decode_capture(reader)
+        seconds = time.perf_counter() - began
+        valid = columns["valid"]
+        summary = {"frames": len(reader), "state_frames": int(valid.sum()), "seconds": round(seconds, 6)}
+        if valid.any():
+            summary["fields"] = {
+                name: {"min": column[valid].min().item(), "max": column[valid].max().item()}
+                for name, column in columns.items()
+                if name not in ("valid", "timestamp") and column.dtype.kind in "iuf"
+            }
+        del columns, valid
+    _print(summary)
+    return 0
+
+async def _check_decoder(args: argparse.Namespace) -> int:
+    from . import batch
+
+    if batch.np is None:
+        _warn("check-decoder needs NumPy")
+        return 2
+    result = batch.self_check(args.frames, args.seed, args.keep)
+    _print(result)
+    return 1 if result["mismatches"] else 0
+
+async def _probe(args: argparse.Namespace) -> int:
+    from .analyzer import AFTER_SUFFIX, BEFORE_SUFFIX
+
+    os.makedirs(args.directory, exist_ok=True)
+    opcodes = [(name.upper(), getattr(Cmd, name.upper(), None)) for name in args.opcodes]
+    unknown = [name for name, opcode in opcodes if not isinstance(opcode, bytearray)]
+    if unknown:
+        _warn(f"unknown opcodes {', '.join(unknown)}; see the opcodes command")
+        return 2
+    session = Session(args.address, args.simulate, args.timeout)
+    try:
+        await session.connect()
+        for name, opcode in opcodes:
+            for suffix, command in ((BEFORE_SUFFIX, None), (AFTER_SUFFIX, opcode)):
+                session.capture = CaptureWriter(os.path.join(args.directory, name + suffix)).open()
+                if command is not None:
+                    # The client reads the state right after the command
+                    await session.client.write(command)
+                    await session.next_state(args.timeout)
+                    await asyncio.sleep(args.settle)
+                while session.capture.records < args.frames:
+                    await session.client.request_state()
+                    await session.next_state(args.timeout)
+                session.capture.close()
+                session.capture = None
+            _print({"opcode": name, "frames": args.frames})
+    finally:
+        await session.close()
+    return 0
+
+async def _analyze(args: argparse.Namespace) -> int:
+    from . import analyzer
+
+    if analyzer.np is None:
+        _warn("analyze needs NumPy")
+        return 2
+    result = analyzer.analyze_directory(args.directory, args.labels)
+    # One line per candidate field, then the summary
+    for candidate in result["candidates"]:
+        _print(candidate)
+    summary = {key: result[key] for key in ("frames", "pairs", "constant", "unmapped")}
+    if args.offsets:
+        summary["offsets"] = result["offsets"]
+    _print(summary)
+    return 0
+
+def _opcode_names() -> list:
+    return [name for name, value in vars(Cmd).items() if isinstance(value, bytearray)]
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m prana", description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging to stderr")
+    parser.add_argument("--simulate", action="store_true", help="use the in-process simulator")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for the unit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("scan", help="list Prana advertisements with RSSI")
+
+    state = commands.add_parser("state", help="read the state once")
+    state.add_argument("address", help="unit address, or 'sim'")
+
+    watch = commands.add_parser("watch", help="stream decoded frames as JSON lines")
+    watch.add_argument("address", help="unit address, or 'sim'")
+    watch.add_argument("--interval", type=float, default=5.0, help="seconds between state requests")
+    watch.add_argument("--count", type=int, help="stop after this many frames")
+    watch.add_argument("--capture", metavar="FILE", help="also append the raw frames to a capture file")
+
+    send = commands.add_parser("send", help="send a named Cmd opcode and print the resulting state")
+    send.add_argument("address", help="unit address, or 'sim'")
+    send.add_argument("opcode", help="Cmd name, e.g. SPEED_3")
+
+    commands.add_parser("opcodes", help="list the Cmd names send accepts")
+
+    replay = commands.add_parser("replay", help="decode the state frames of a capture file as JSON lines")
+    replay.add_argument("file", help="capture file")
+    replay.add_argument("--since", metavar="ISO_TIME", help="start at the first frame at or after this time")
+    replay.add_argument("--count", type=int, help="stop after this many records")
+
+    decode = commands.add_parser("decode", help="batch-decode a capture file with NumPy and summarize it")
+    decode.add_argument("file", help="capture file")
+    decode.add_argument("--verify", action="store_true", help="check the batch decoder against decode_state")
+
+    check = commands.add_parser(
+        "check-decoder", help="verify the batch decoder on simulator, mutated, random and truncated frames"
+    )
+    check.add_argument("--frames", type=int, default=20000, help="frames in the generated capture")
+    check.add_argument("--seed", type=int, default=0, help="seed of the generated capture")
+    check.add_argument("--keep", metavar="FILE", help="write the capture here instead of a temporary file")
+
+    probe = commands.add_parser("probe", help="record before/after captures around each opcode")
+    probe.add_argument("address", help="unit address, or 'sim'")
+    probe.add_argument("directory", help="where to write <OPCODE>.before.prc/.after.prc")
+    probe.add_argument("opcodes", nargs="+", help="Cmd names to probe, sent in order")
+    probe.add_argument("--frames", type=int, default=3, help="frames per capture")
+    probe.add_argument("--settle", type=float, default=1.0, help="seconds to wait after each command")
+
+    analyze = commands.add_parser("analyze", help="map the frame bytes each probed opcode changes")
+    analyze.add_argument("directory", help="directory of probe captures")
+    analyze.add_argument("labels", nargs="*", help="only these probes")
+    analyze.add_argument("--offsets", action="store_true", help="include the per-offset table")
+
+    for command in (state, watch, send, replay):
+        command.add_argument("--raw", action="store_true", help="include the frame as hex")
+    return parser
+
+def main(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr)
+    if args.command == "opcodes":
+        print("\n".join(_opcode_names()))
+        return 0
+    handler = {
+        "scan": _scan,
+        "state": _state,
+        "watch": _watch,
+        "send": _send,
+        "replay": _replay,
+        "decode": _decode,
+        "check-decoder": _check_decoder,
+        "probe": _probe,
+        "analyze": _analyze,
+    }[args.command]
+    try:
+        return asyncio.run(handler(args))
+    except KeyboardInterrupt:
+        return 130
+    except asyncio.TimeoutError:
+        _warn("timed out waiting for the unit")
+        return 1
@@ -0,0 +1,366 @@
+"""Async Prana client that runs without Home Assistant.
+
+``PranaClient`` owns the connection lifecycle (connect on demand, idle
+disconnect, retries), sends commands and decodes notifications. The radio
+is behind a small transport interface: ``BleakTransport`` talks to a real
+unit, and tools can plug in their own.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import inspect
+import logging
+import time
+from typing import Any, List, Optional, Protocol, TypeVar, cast
+
+from .const import PranaState
+from .protocol import READ_CHARACTERISTIC_UUID, WRITE_CHARACTERISTIC_UUID, Cmd, decode_state
+from .timing import Timings, now_ns
+from . import tracing
+from .tracing import Tracer
+
+try:
+    from bleak.exc import BleakDBusError
+    from bleak_retry_connector import BLEAK_RETRY_EXCEPTIONS as BLEAK_EXCEPTIONS
+    from bleak_retry_connector import BleakNotFoundError
+    RETRY_BACKOFF_EXCEPTIONS: tuple = (BleakDBusError,)
+except ImportError:
+    # Without bleak only non-Bluetooth transports can be used; nothing to retry
+    class BleakNotFoundError(Exception):
+        """Stand-in so the retry wrapper works without bleak."""
+    BLEAK_EXCEPTIONS = ()
+    RETRY_BACKOFF_EXCEPTIONS = ()
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_ATTEMPTS = 3
+DISCONNECT_DELAY = 120
+BLEAK_BACKOFF_TIME = 0.25
+# A state request within this long of an unanswered one is answered by its frame
+READ_COALESCE_NS = 2_000_000_000
+WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
+
+# Called with the decoded state (None for non-state frames) and the raw frame
+StateListener = Callable[[Optional[PranaState], bytes], Optional[Awaitable[None]]]
+
+def retry_bluetooth_connection_error(func: WrapFuncType) -> WrapFuncType:
+    """Define a wrapper to retry on bleak error.
+
+    The accessory is allowed to disconnect us any time so
+    we need to retry the operation.
+    """
+
+    async def _async_wrap_retry_bluetooth_connection_error(
+        self: "Prana", *args: Any, **kwargs: Any
+    ) -> Any:
+        # Commands run in a trace span of their own; the retries are its events
+        tracer: Tracer | None = getattr(self, "tracer", None)
+        if tracer is None:
+            return await _async_attempts(self, *args, **kwargs)
+        with tracer.span(func.__name__):
+            return await _async_attempts(self, *args, **kwargs)
+
+    async def _async_attempts(self: "Prana", *args: Any, **kwargs: Any) -> Any:
+        attempts = DEFAULT_ATTEMPTS
+        max_attempts = attempts - 1
+        timings: Timings | None = getattr(self, "timings", None)
+
+        for attempt in range(attempts):
+            if attempt and timings is not None:
+                timings.count("retries")
+            try:
+                return await func(self, *args, **kwargs)
+            except BleakNotFoundError:
+                # The lock cannot be found so there is no
+                # point in retrying.
+                raise
+            except RETRY_BACKOFF_EXCEPTIONS as err:
+                if attempt >= max_attempts:
+                    LOGGER.debug("%s: %s error calling %s, reach max attempts (%s/%s)",self.name,type(err),func,attempt,max_attempts,exc_info=True,)
+                    raise
+                LOGGER.debug("%s: %s error calling %s, backing off %ss, retrying (%s/%s)...",self.name,type(err),func,BLEAK_BACKOFF_TIME,attempt,max_attempts,exc_info=True,)
+                tracing.add_event("retry", attempt=attempt + 1, error=type(err).__name__, backoff=BLEAK_BACKOFF_TIME)
+                await asyncio.sleep(BLEAK_BACKOFF_TIME)
+            except BLEAK_EXCEPTIONS as err:
+                if attempt >= max_attempts:
+                    LOGGER.debug("%s: %s error calling %s, reach max attempts (%s/%s): %s",self.name,type(err),func,attempt,max_attempts,err,exc_info=True,)
+                    raise
+                LOGGER.debug("%s: %s error calling %s, retrying  (%s/%s)...: %s",self.name,type(err),func,attempt,max_attempts,err,exc_info=True,)
+                tracing.add_event("retry", attempt=attempt + 1, error=type(err).__name__)
+
+    return cast(WrapFuncType, _async_wrap_retry_bluetooth_connection_error)
+
+class Transport(Protocol):
+    """Byte pipe to one unit."""
+    name: str
+
+    @property
+    def is_connected(self) -> bool:
+        ...
+
+    async def connect(self, on_notify: Callable[[bytes], Awaitable[None]], on_disconnect: Callable[[], None]) -> None:
+        """Connect and deliver every notification to ``on_notify``."""
+
+    async def write(self, data: bytes, response: bool) -> None:
+        ...
+
+    async def disconnect(self) -> None:
+        ...
+
+class BleakTransport:
+    """Transport over bleak, with the service cache and retrying connect of bleak_retry_connector."""
+
+    def __init__(
+        self,
+        device: Any,
+        name: str | None = None,
+        ble_device_callback: Callable[[], Any] | None = None,
+        establish_connection: Callable[..., Awaitable[Any]] | None = None,
+        client_class: type | None = None,
+    ) -> None:
+        """``device`` is a BLEDevice, or an address to look up when connecting.
+
+        ``establish_connection`` and ``client_class`` replace the ones of
+        bleak_retry_connector (the chaos harness injects faults this way).
+        """
+        self._device = device
+        self._ble_device_callback = ble_device_callback
+        self._establish_connection = establish_connection
+        self._client_class = client_class
+        self.name = name or getattr(device, "name", None) or str(device)
+        self._client = None
+        self._cached_services = None
+        self._expected_disconnect = False
+        self._on_disconnect: Callable[[], None] | None = None
+        # Set by PranaClient; start_notify is timed into it
+        self.timings: Timings | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None and self._client.is_connected
+
+    async def _async_resolve_device(self) -> Any:
+        device = self._ble_device_callback() if self._ble_device_callback is not None else self._device
+        if isinstance(device, str):
+            from bleak import BleakScanner
+
+            found = await BleakScanner.find_device_by_address(device)
+            if found is None:
+                raise BleakNotFoundError(f"{self.name}: no device with address {device}")
+            self._device = device = found
+        return device
+
+    async def connect(self, on_notify: Callable[[bytes], Awaitable[None]], on_disconnect: Callable[[], None]) -> None:
+        establish_connection, client_class = self._establish_connection, self._client_class
+        if establish_connection is None or client_class is None:
+            from bleak_retry_connector import BleakClientWithServiceCache, establish_connection as establish
+
+            establish_connection = establish_connection or establish
+            client_class = client_class or BleakClientWithServiceCache
+
+        device = await self._async_resolve_device()
+        self._on_disconnect = on_disconnect
+        self._expected_disconnect = False
+        client = await establish_connection(
+            client_class,
+            device,
+            self.name,
+            self._disconnected,
+            cached_services=self._cached_services,
+            ble_device_callback=self._ble_device_callback or (lambda: device),
+        )
+        self._cached_services = client.services
+        self._client = client
+
+        async def _notification_handler(_sender: Any, data: bytearray) -> None:
+            await on_notify(data)
+
+        LOGGER.debug("%s: Subscribe to notifications", self.name)
+        started = now_ns()
+        with tracing.span("start_notify"):
+            await client.start_notify(READ_CHARACTERISTIC_UUID, _notification_handler)
+        if self.timings is not None:
+            self.timings.record("start_notify", started)
+
+    def _disconnected(self, client: Any) -> None:
+        """Disconnected callback."""
+        if self._expected_disconnect:
+            LOGGER.debug("%s: Disconnected from device", self.name)
+        else:
+            LOGGER.warning("%s: Device unexpectedly disconnected", self.name)
+        if self._on_disconnect is not None:
+            self._on_disconnect()
+
+    async def write(self, data: bytes, response: bool) -> None:
+        await self._client.write_gatt_char(WRITE_CHARACTERISTIC_UUID, data, response)
+
+    async def disconnect(self) -> None:
+        client = self._client
+        self._expected_disconnect = True
+        self._client = None
+        if client and client.is_connected:
+            await client.stop_notify(READ_CHARACTERISTIC_UUID)
+            await client.disconnect()
+
+class PranaClient:
+    """Connect on demand, send commands, decode notifications.
+
+    Every command is followed by a state request, so listeners see its
+    effect. The connection is dropped after ``disconnect_delay`` seconds
+    without commands. ``timings`` holds the latency histograms and event
+    counters of the connection, ``tracer`` the traces of its commands.
+    """
+
+    def __init__(self, transport: Transport, disconnect_delay: float = DISCONNECT_DELAY) -> None:
+        self.transport = transport
+        self.name = transport.name
+        self._disconnect_delay = disconnect_delay
+        self._connect_lock = asyncio.Lock()
+        self._disconnect_timer: asyncio.TimerHandle | None = None
+        self._listeners: List[StateListener] = []
+        self.timings = Timings()
+        self.tracer = Tracer()
+        if hasattr(transport, "timings"):
+            transport.timings = self.timings
+        self._disconnecting = False
+        # When the last READ_STATE went out, until its frame arrives
+        self._read_sent: int | None = None
+        # Span of the traced command waiting for that frame
+        self._confirmation: tracing.Span | None = None
+        # Writes started and not finished, including those waiting to connect
+        self.in_flight = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.transport.is_connected
+
+    def add_listener(self, listener: StateListener) -> Callable[[], None]:
+        """Call ``listener`` for every frame; return a function that removes it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def _on_notify(self, data: bytes) -> None:
+        timings = self.timings
+        timings.count("frames")
+        started = now_ns()
+        state = decode_state(data)
+        received = timings.record("parse", started)
+        if state is not None and self._read_sent is not None:
+            timings.histograms["response"].record(received - self._read_sent)
+            self._read_sent = None
+            self._end_confirmation()
+        for listener in list(self._listeners):
+            result = listener(state, data)
+            if inspect.isawaitable(result):
+                await result
+
+    def _on_disconnect(self) -> None:
+        self.timings.count("disconnects")
+        if not self._disconnecting:
+            self.timings.count("unexpected_disconnects")
+        self._read_sent = None
+        self._end_confirmation("disconnected")
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+            self._disconnect_timer = None
+
+    def _end_confirmation(self, error: str | None = None) -> None:
+        if self._confirmation is not None:
+            self._confirmation.end(error)
+            self._confirmation = None
+
+    @retry_bluetooth_connection_error
+    async def connect(self) -> None:
+        """Ensure connection to device is established."""
+        if self._connect_lock.locked():
+            LOGGER.debug("%s: Connection already in progress, waiting for it to complete", self.name)
+        if self.transport.is_connected:
+            self._reset_disconnect_timer()
+            return
+        queued = time.time_ns() if self._connect_lock.locked() else None
+        async with self._connect_lock:
+            if queued is not None:
+                tracing.record_span("queue", queued, waiting_for="connect")
+            # Check again while holding the lock
+            if self.transport.is_connected:
+                self._reset_disconnect_timer()
+                return
+            LOGGER.debug("%s: Connecting", self.name)
+            self.timings.count("connect_attempts")
+            started = now_ns()
+            with tracing.span("establish"):
+                await self.transport.connect(self._on_notify, self._on_disconnect)
+            self.timings.record("connect", started)
+            self.timings.count("connects")
+            LOGGER.debug("%s: Connected", self.name)
+            self._reset_disconnect_timer()
+
+    async def write(self, data: bytes, await_response: bool = False) -> None:
+        """Send a command, then ask for the state it produced.
+
+        A bare state request is dropped while an earlier one is still
+        unanswered: the frame on its way answers both.
+        """
+        self.in_flight += 1
+        try:
+            await self.connect()
+            if (
+                Cmd.READ_STATE == data
+                and self._read_sent is not None
+                and now_ns() - self._read_sent < READ_COALESCE_NS
+            ):
+                self.timings.count("reads_coalesced")
+                tracing.add_event("read_coalesced")
+                return
+            await self._timed_write(data, await_response)
+            if Cmd.READ_STATE != data:
+                await self._timed_write(Cmd.READ_STATE, True)
+        finally:
+            self.in_flight -= 1
+
+    async def _timed_write(self, data: bytes, response: bool) -> None:
+        timings = self.timings
+        timings.count("writes")
+        started = now_ns()
+        if Cmd.READ_STATE == data:
+            self._read_sent = started
+            # An earlier request still unanswered is not going to be
+            self._end_confirmation("unanswered")
+            self._confirmation = tracing.start_span("notification")
+        with tracing.span("write", opcode=bytes(data).hex(), response=response):
+            await self.transport.write(data, response)
+        timings.record("write", started)
+
+    async def request_state(self) -> None:
+        await self.write(Cmd.READ_STATE)
+
+    def _reset_disconnect_timer(self) -> None:
+        """Reset disconnect timer."""
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+        self._disconnect_timer = asyncio.get_running_loop().call_later(
+            self._disconnect_delay, self._disconnect
+        )
+
+    def _disconnect(self) -> None:
+        """Disconnect from device."""
+        self._disconnect_timer = None
+        asyncio.create_task(self._execute_timed_disconnect())
+
+    async def _execute_timed_disconnect(self) -> None:
+        """Execute timed disconnection."""
+        LOGGER.debug("%s: Disconnecting after timeout of %s", self.name, self._disconnect_delay)
+        await self.disconnect()
+
+    async def disconnect(self) -> None:
+        """Execute disconnection."""
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+            self._disconnect_timer = None
+        async with self._connect_lock:
+            self._disconnecting = True
+            try:
+                await self.transport.disconnect()
+            finally:
+                self._disconnecting = False
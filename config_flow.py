@@ -1,11 +1,50 @@
 import asyncio
 from .coordinator import PranaCoordinator
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_CONTROL,
+    CONF_CONTROL_CO2,
+    CONF_CONTROL_CO2_BAND,
+    CONF_CONTROL_DWELL,
+    CONF_CONTROL_HUMIDITY,
+    CONF_CONTROL_MAX_SPEED,
+    CONF_CONTROL_MIN_SPEED,
+    CONF_CONTROL_VOC,
+    CONF_DEADBAND_CO2,
+    CONF_DEADBAND_HUMIDITY,
+    CONF_DEADBAND_PRESSURE,
+    CONF_DEADBAND_TEMPERATURE,
+    CONF_DEADBAND_VOC,
+    CONF_EWMA_ALPHA,
+    CONF_EXTERNAL_STATISTICS,
+    CONF_MAX_SILENCE,
+    CONF_MEDIAN,
+    CONF_MODEL,
+    CONF_MODEL_AIRFLOW,
+    CONF_MODEL_HEATER_POWER,
+    CONF_TRACE_EXPORT,
+    DEFAULT_CONTROL,
+    DEFAULT_CONTROL_CO2,
+    DEFAULT_CONTROL_CO2_BAND,
+    DEFAULT_CONTROL_DWELL,
+    DEFAULT_CONTROL_MAX_SPEED,
+    DEFAULT_CONTROL_MIN_SPEED,
+    DEFAULT_DEADBAND,
+    DEFAULT_EWMA_ALPHA,
+    DEFAULT_EXTERNAL_STATISTICS,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MEDIAN,
+    DEFAULT_MODEL,
+    DEFAULT_TRACE_EXPORT,
+)
+from .control import CONTROL_MODES
+from .derived import MODELS
 
 from typing import Any
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_MAC
+from homeassistant.core import callback
 import voluptuous as vol
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.data_entry_flow import FlowResult
@@ -59,6 +98,12 @@ class BLEDOMFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self._discovered_device: DeviceData | None = None
         self._discovered_devices = []
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> "PranaOptionsFlowHandler":
+        """Get the options flow for this handler."""
+        return PranaOptionsFlowHandler(config_entry)
+
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfoBleak
     ) -> FlowResult:
@@ -187,3 +232,86 @@ class BLEDOMFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             return error
         finally:
             await self._instance.stop()
+
+class PranaOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Prana options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: "dict[str, Any] | None" = None) -> FlowResult:
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_CONTROL_MIN_SPEED] > user_input[CONF_CONTROL_MAX_SPEED]:
+                errors["base"] = "control_speed_range"
+            else:
+                # Keep options managed elsewhere, e.g. the schedule set by prana.set_schedule
+                return self.async_create_entry(title="", data={**self._entry.options, **user_input})
+
+        # Show what was entered again when it was rejected
+        options = {**self._entry.options, **(user_input or {})}
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_MEDIAN, default=options.get(CONF_MEDIAN, DEFAULT_MEDIAN)): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=31)
+                    ),
+                    vol.Required(CONF_EWMA_ALPHA, default=options.get(CONF_EWMA_ALPHA, DEFAULT_EWMA_ALPHA)): vol.All(
+                        vol.Coerce(float), vol.Range(min=0.05, max=1.0)
+                    ),
+                    vol.Required(CONF_DEADBAND_CO2, default=options.get(CONF_DEADBAND_CO2, DEFAULT_DEADBAND)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=500)
+                    ),
+                    vol.Required(CONF_DEADBAND_VOC, default=options.get(CONF_DEADBAND_VOC, DEFAULT_DEADBAND)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=500)
+                    ),
+                    vol.Required(CONF_DEADBAND_TEMPERATURE, default=options.get(CONF_DEADBAND_TEMPERATURE, DEFAULT_DEADBAND)): vol.All(
+                        vol.Coerce(float), vol.Range(min=0, max=5)
+                    ),
+                    vol.Required(CONF_DEADBAND_HUMIDITY, default=options.get(CONF_DEADBAND_HUMIDITY, DEFAULT_DEADBAND)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=20)
+                    ),
+                    vol.Required(CONF_DEADBAND_PRESSURE, default=options.get(CONF_DEADBAND_PRESSURE, DEFAULT_DEADBAND)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=20)
+                    ),
+                    vol.Required(CONF_MAX_SILENCE, default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)): vol.All(
+                        vol.Coerce(int), vol.Range(min=30, max=86400)
+                    ),
+                    vol.Required(
+                        CONF_EXTERNAL_STATISTICS,
+                        default=options.get(CONF_EXTERNAL_STATISTICS, DEFAULT_EXTERNAL_STATISTICS),
+                    ): bool,
+                    vol.Required(CONF_TRACE_EXPORT, default=options.get(CONF_TRACE_EXPORT, DEFAULT_TRACE_EXPORT)): bool,
+                    vol.Required(CONF_MODEL, default=options.get(CONF_MODEL, DEFAULT_MODEL)): vol.In(
+                        {DEFAULT_MODEL: "Unknown", **{key: model.name for key, model in MODELS.items()}}
+                    ),
+                    vol.Required(CONF_MODEL_AIRFLOW, default=options.get(CONF_MODEL_AIRFLOW, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=1000)
+                    ),
+                    vol.Required(CONF_MODEL_HEATER_POWER, default=options.get(CONF_MODEL_HEATER_POWER, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=2000)
+                    ),
+                    vol.Required(CONF_CONTROL, default=options.get(CONF_CONTROL, DEFAULT_CONTROL)): vol.In(CONTROL_MODES),
+                    vol.Required(CONF_CONTROL_CO2, default=options.get(CONF_CONTROL_CO2, DEFAULT_CONTROL_CO2)): vol.All(
+                        vol.Coerce(int), vol.Range(min=400, max=5000)
+                    ),
+                    vol.Required(CONF_CONTROL_CO2_BAND, default=options.get(CONF_CONTROL_CO2_BAND, DEFAULT_CONTROL_CO2_BAND)): vol.All(
+                        vol.Coerce(int), vol.Range(min=10, max=1000)
+                    ),
+                    vol.Required(CONF_CONTROL_VOC, default=options.get(CONF_CONTROL_VOC, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=5000)
+                    ),
+                    vol.Required(CONF_CONTROL_HUMIDITY, default=options.get(CONF_CONTROL_HUMIDITY, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=100)
+                    ),
+                    vol.Required(CONF_CONTROL_MIN_SPEED, default=options.get(CONF_CONTROL_MIN_SPEED, DEFAULT_CONTROL_MIN_SPEED)): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=6)
+                    ),
+                    vol.Required(CONF_CONTROL_MAX_SPEED, default=options.get(CONF_CONTROL_MAX_SPEED, DEFAULT_CONTROL_MAX_SPEED)): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=6)
+                    ),
+                    vol.Required(CONF_CONTROL_DWELL, default=options.get(CONF_CONTROL_DWELL, DEFAULT_CONTROL_DWELL)): vol.All(
+                        vol.Coerce(int), vol.Range(min=30, max=3600)
+                    ),
+                }
+            ), errors=errors)
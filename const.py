@@ -5,6 +5,69 @@ from typing import NamedTuple, List, Optional
 
 DOMAIN = "prana"
 
+# Config entry data: whether the unit has the sensor board (CO2/VOC/...)
+CONF_HAS_SENSORS = "has_sensors"
+
+# Options: smoothing of the sensor board readings
+CONF_MEDIAN = "median"
+DEFAULT_MEDIAN = 1
+CONF_EWMA_ALPHA = "ewma_alpha"
+DEFAULT_EWMA_ALPHA = 1.0
+
+# Options: dead-band reporting, 0 publishes every change
+CONF_DEADBAND_CO2 = "deadband_co2"
+CONF_DEADBAND_VOC = "deadband_voc"
+CONF_DEADBAND_TEMPERATURE = "deadband_temperature"
+CONF_DEADBAND_HUMIDITY = "deadband_humidity"
+CONF_DEADBAND_PRESSURE = "deadband_pressure"
+DEFAULT_DEADBAND = 0
+CONF_MAX_SILENCE = "max_silence"
+DEFAULT_MAX_SILENCE = 900
+
+# Options: aggregate the sensor board readings into recorder statistics ourselves
+CONF_EXTERNAL_STATISTICS = "external_statistics"
+DEFAULT_EXTERNAL_STATISTICS = False
+
+# Options: write command traces to <config>/prana/traces/ as OpenTelemetry JSON
+CONF_TRACE_EXPORT = "trace_export"
+DEFAULT_TRACE_EXPORT = False
+
+# Options: unit model, enables the derived airflow/efficiency/energy metrics
+CONF_MODEL = "model"
+DEFAULT_MODEL = ""
+# Measured figures of the installed unit instead of the table's, 0 = table
+CONF_MODEL_AIRFLOW = "model_airflow"
+CONF_MODEL_HEATER_POWER = "model_heater_power"
+
+# Options: closed-loop speed control from the sensor board
+CONF_CONTROL = "control"
+DEFAULT_CONTROL = "off"
+CONF_CONTROL_CO2 = "control_co2"
+DEFAULT_CONTROL_CO2 = 800
+CONF_CONTROL_CO2_BAND = "control_co2_band"
+DEFAULT_CONTROL_CO2_BAND = 100
+CONF_CONTROL_VOC = "control_voc"
+CONF_CONTROL_HUMIDITY = "control_humidity"
+CONF_CONTROL_MIN_SPEED = "control_min_speed"
+DEFAULT_CONTROL_MIN_SPEED = 1
+CONF_CONTROL_MAX_SPEED = "control_max_speed"
+DEFAULT_CONTROL_MAX_SPEED = 5
+CONF_CONTROL_DWELL = "control_dwell"
+DEFAULT_CONTROL_DWELL = 300
+
+# Options: weekly programs, applied without reloading the entry
+CONF_SCHEDULE = "schedule"
+
+# Dead-band option for each sensor board field
+DEADBAND_OPTIONS = {
+    "co2": CONF_DEADBAND_CO2,
+    "voc": CONF_DEADBAND_VOC,
+    "temperature_in": CONF_DEADBAND_TEMPERATURE,
+    "temperature_out": CONF_DEADBAND_TEMPERATURE,
+    "humidity": CONF_DEADBAND_HUMIDITY,
+    "pressure": CONF_DEADBAND_PRESSURE,
+}
+
 class Display(Enum):
     FAN = 0
     TEMPERATURE_IN = 1
@@ -0,0 +1,108 @@
+"""Closed-loop fan speed control from the sensor board readings."""
+from typing import Dict, Mapping, Optional
+
+CONTROL_OFF = "off"
+CONTROL_HYSTERESIS = "hysteresis"
+CONTROL_PI = "pi"
+CONTROL_MODES = (CONTROL_OFF, CONTROL_HYSTERESIS, CONTROL_PI)
+
+# Bands of the optional channels; the CO2 band is an option
+CONTROL_BANDS = {"voc": 100, "humidity": 5}
+# Integral term is clamped to this many speed levels (anti-windup)
+MAX_INTEGRAL_LEVELS = 3.0
+
+class Co2Controller:
+    """Pick a fan speed from CO2 and, optionally, VOC and humidity.
+
+    Each channel has a target and a band. Its demand is how far the reading
+    is above the target, in bands; the highest demand drives the loop.
+
+    ``hysteresis`` steps one speed up when a demand is above +1 and one
+    speed down when every demand is below -1. ``pi`` maps ``kp * demand``
+    plus the integral of the demand over time (in minutes, times ``ki``)
+    onto the speed range. Either way the speed is held for at least
+    ``dwell`` seconds after any change, including changes made by hand.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        targets: Mapping[str, float],
+        bands: Mapping[str, float],
+        min_speed: int,
+        max_speed: int,
+        dwell: float,
+        kp: float = 1.0,
+        ki: float = 0.1,
+    ) -> None:
+        if mode not in (CONTROL_HYSTERESIS, CONTROL_PI):
+            raise ValueError(f"unknown control mode {mode}")
+        if min_speed > max_speed:
+            raise ValueError(f"lowest speed {min_speed} is above the highest speed {max_speed}")
+        self.mode = mode
+        self._targets = {field: target for field, target in targets.items() if target > 0}
+        self._bands = {field: max(bands[field], 1e-6) for field in self._targets}
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self._dwell = dwell
+        self._kp = kp
+        self._ki = ki
+        self._integral = 0.0
+        self._last_update: Optional[float] = None
+        self._speed: Optional[int] = None
+        self._changed_at: Optional[float] = None
+        self.demand: Optional[float] = None
+        self.commands = 0
+
+    def _demand(self, values: Mapping[str, Optional[float]]) -> Optional[float]:
+        demands = [
+            (value - target) / self._bands[field]
+            for field, target in self._targets.items()
+            if (value := values.get(field)) is not None
+        ]
+        return max(demands) if demands else None
+
+    def reset(self) -> None:
+        """Forget the integral, e.g. while the loop is suspended."""
+        self._integral = 0.0
+        self._last_update = None
+
+    def update(self, values: Mapping[str, Optional[float]], speed: int, now: float) -> Optional[int]:
+        """Return the speed to command for a frame read at monotonic ``now``, or None to leave it."""
+        if speed != self._speed:
+            # Speed changed outside the loop (or this is the first frame): hold it for a dwell time
+            self._speed = speed
+            self._changed_at = now
+        demand = self.demand = self._demand(values)
+        if demand is None:
+            return None
+
+        if self.mode == CONTROL_PI:
+            if self._last_update is not None:
+                limit = MAX_INTEGRAL_LEVELS / self._ki if self._ki > 0 else 0.0
+                self._integral = min(max(self._integral + demand * (now - self._last_update) / 60, -limit), limit)
+            self._last_update = now
+            output = self.min_speed + self._kp * demand + self._ki * self._integral
+            target = int(round(min(max(output, self.min_speed), self.max_speed)))
+        elif demand > 1:
+            target = min(max(speed + 1, self.min_speed), self.max_speed)
+        elif demand < -1:
+            target = max(min(speed - 1, self.max_speed), self.min_speed)
+        else:
+            target = min(max(speed, self.min_speed), self.max_speed)
+
+        if target == speed or now - self._changed_at < self._dwell:
+            return None
+        self._speed = target
+        self._changed_at = now
+        self.commands += 1
+        return target
+
+    def as_dict(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "targets": dict(self._targets),
+            "demand": None if self.demand is None else round(self.demand, 3),
+            "integral": round(self._integral, 3),
+            "commands": self.commands,
+        }
@@ -4,205 +4,120 @@ import binascii
 import async_timeout
 
 from homeassistant.components import bluetooth
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry, issue_registry
 from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
-from .const import PranaState, Speed, PranaSensorsState, Display, PranaTimer
-
-from typing import Dict, List, Union, Optional
-from bleak.backends.device import BLEDevice
-from bleak.backends.service import BleakGATTCharacteristic, BleakGATTServiceCollection
-from bleak.exc import BleakDBusError
-from bleak_retry_connector import BLEAK_RETRY_EXCEPTIONS as BLEAK_EXCEPTIONS
-from bleak_retry_connector import (
-    BleakClientWithServiceCache,
-    BleakError,
-    BleakNotFoundError,
-    ble_device_has_changed,
-    establish_connection,
+from .const import (
+    DOMAIN,
+    CONF_CONTROL,
+    CONF_CONTROL_CO2,
+    CONF_CONTROL_CO2_BAND,
+    CONF_CONTROL_DWELL,
+    CONF_CONTROL_HUMIDITY,
+    CONF_CONTROL_MAX_SPEED,
+    CONF_CONTROL_MIN_SPEED,
+    CONF_CONTROL_VOC,
+    CONF_EWMA_ALPHA,
+    CONF_EXTERNAL_STATISTICS,
+    CONF_MAX_SILENCE,
+    CONF_MEDIAN,
+    CONF_MODEL,
+    CONF_MODEL_AIRFLOW,
+    CONF_MODEL_HEATER_POWER,
+    CONF_SCHEDULE,
+    CONF_TRACE_EXPORT,
+    DEADBAND_OPTIONS,
+    DEFAULT_CONTROL,
+    DEFAULT_CONTROL_CO2,
+    DEFAULT_CONTROL_CO2_BAND,
+    DEFAULT_CONTROL_DWELL,
+    DEFAULT_CONTROL_MAX_SPEED,
+    DEFAULT_CONTROL_MIN_SPEED,
+    DEFAULT_DEADBAND,
+    DEFAULT_EWMA_ALPHA,
+    DEFAULT_EXTERNAL_STATISTICS,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MEDIAN,
+    DEFAULT_MODEL,
+    DEFAULT_TRACE_EXPORT,
+    PranaState,
+    Speed,
+    PranaSensorsState,
+    Display,
+    PranaTimer,
 )
-from typing import Any, TypeVar, cast, Tuple
+from .anomaly import AnomalyDetector
+from .capture import FLUSH_RECORDS, CaptureWriter
+from .counters import RuntimeCounters
+from .control import CONTROL_BANDS, CONTROL_OFF, Co2Controller
+from .derived import MODELS, DerivedMetrics, with_overrides
+from .filters import DeadBand, SensorFilter
+from .external_statistics import StatisticsExporter
+from .history import History
+from .schedule import Scheduler
+from .timing import PERCENTILES, now_ns
+from .tracing import OtlpFileExporter, Trace, untraced
+from .client import BleakTransport, PranaClient, Transport, retry_bluetooth_connection_error
+from . import protocol
+
+from typing import Dict, List, Mapping, Union, Optional
+from bleak.backends.device import BLEDevice
+from typing import Any, Tuple
 from collections.abc import Callable
-from math import log2
+from math import ceil
 import traceback
 import asyncio
 import logging
-import struct
+import time
 
 
 LOGGER = logging.getLogger(__name__)
-WRITE_CHARACTERISTIC_UUIDS = ["0000cccc-0000-1000-8000-00805f9b34fb"]
-READ_CHARACTERISTIC_UUIDS  = ["0000cccc-0000-1000-8000-00805f9b34fb"]
-
-DEFAULT_ATTEMPTS = 3
-DISCONNECT_DELAY = 120
-BLEAK_BACKOFF_TIME = 0.25
-RETRY_BACKOFF_EXCEPTIONS = (BleakDBusError,)
-WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
-
-def retry_bluetooth_connection_error(func: WrapFuncType) -> WrapFuncType:
-    """Define a wrapper to retry on bleak error.
-
-    The accessory is allowed to disconnect us any time so
-    we need to retry the operation.
-    """
-
-    async def _async_wrap_retry_bluetooth_connection_error(
-        self: "Prana", *args: Any, **kwargs: Any
-    ) -> Any:
-        attempts = DEFAULT_ATTEMPTS
-        max_attempts = attempts - 1
-
-        for attempt in range(attempts):
-            try:
-                return await func(self, *args, **kwargs)
-            except BleakNotFoundError:
-                # The lock cannot be found so there is no
-                # point in retrying.
-                raise
-            except RETRY_BACKOFF_EXCEPTIONS as err:
-                if attempt >= max_attempts:
-                    LOGGER.debug("%s: %s error calling %s, reach max attempts (%s/%s)",self.name,type(err),func,attempt,max_attempts,exc_info=True,)
-                    raise
-                LOGGER.debug("%s: %s error calling %s, backing off %ss, retrying (%s/%s)...",self.name,type(err),func,BLEAK_BACKOFF_TIME,attempt,max_attempts,exc_info=True,)
-                await asyncio.sleep(BLEAK_BACKOFF_TIME)
-            except BLEAK_EXCEPTIONS as err:
-                if attempt >= max_attempts:
-                    LOGGER.debug("%s: %s error calling %s, reach max attempts (%s/%s): %s",self.name,type(err),func,attempt,max_attempts,err,exc_info=True,)
-                    raise
-                LOGGER.debug("%s: %s error calling %s, retrying  (%s/%s)...: %s",self.name,type(err),func,attempt,max_attempts,err,exc_info=True,)
-
-    return cast(WrapFuncType, _async_wrap_retry_bluetooth_connection_error)
-
+AVAILABILITY_TIMEOUT = timedelta(minutes=5)
+# Remaining timer minutes are re-published this often between frames
+TIMER_TICK = timedelta(seconds=30)
+# Sensor board channels smoothed before they are published
+FILTERED_FIELDS = ("co2", "voc", "temperature_in", "temperature_out", "humidity", "pressure")
+# Coordinator fields set by the anomaly detector
+ANOMALY_FIELDS = frozenset({"sensor_stuck", "sensor_jump", "frame_frozen"})
+# Coordinator field -> client histogram whose last duration (ms) it shows
+TIMING_FIELDS = {
+    "connect_time": "connect",
+    "start_notify_time": "start_notify",
+    "write_latency": "write",
+    "response_latency": "response",
+    "parse_time": "parse",
+    "fan_out_time": "fan_out",
+}
+# Coordinator field -> client counter it shows
+TIMING_COUNTERS = {"connection_retries": "retries", "disconnects": "disconnects"}
 class PranaCoordinator(DataUpdateCoordinator):
-    CONTROL_SERVICE_UUID = "0000baba-0000-1000-8000-00805f9b34fb"
-    CONTROL_RW_CHARACTERISTIC_UUID = "0000cccc-0000-1000-8000-00805f9b34fb"
-    STATE_MSG_PREFIX = b"\xbe\xef"
-    MAX_BRIGHTNESS = 6
-
-    class Cmd:
-        STOP = bytearray([0xBE, 0xEF, 0x04, 0x01])
-
-        CHANGE_BRIGHTNESS = bytearray([0xBE, 0xEF, 0x04, 0x02])
-
-        TOGGLE_HEATING = bytearray([0xBE, 0xEF, 0x04, 0x05])
-        TOGGLE_NIGHT_MODE = bytearray([0xBE, 0xEF, 0x04, 0x06])
-        TOGGLE_BOOST_MODE = bytearray([0xBE, 0xEF, 0x04, 0x07])
-
-        TOGGLE_FLOW_LOCK = bytearray([0xBE, 0xEF, 0x04, 0x09])
-
-        START = bytearray([0xBE, 0xEF, 0x04, 0x0A])
-
-        SPEED_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x0B])
-        SPEED_UP = bytearray([0xBE, 0xEF, 0x04, 0x0C])
-
-        FLOW_IN_OFF = bytearray([0xBE, 0xEF, 0x04, 0x0D])
-
-        SPEED_IN_UP = bytearray([0xBE, 0xEF, 0x04, 0x0E])
-        SPEED_IN_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x0F])
-
-        FLOW_OUT_OFF = bytearray([0xBE, 0xEF, 0x04, 0x10])
-
-        SPEED_OUT_UP = bytearray([0xBE, 0xEF, 0x04, 0x11])
-        SPEED_OUT_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x12])
-
-        TOGGLE_TIMER = bytearray([0xBE, 0xEF, 0x04, 0x13])
-        TIMER_DOWN_START = bytearray([0xBE, 0xEF, 0x04, 0x14])
-        TIMER_UP_START = bytearray([0xBE, 0xEF, 0x04, 0x15])
-
-        TOGGLE_WINTER_MODE = bytearray([0xBE, 0xEF, 0x04, 0x16])
-        AUTO_MODE = bytearray([0xBE, 0xEF, 0x04, 0x18])
-
-        DISPLAY_LEFT = bytearray([0xBE, 0xEF, 0x04, 0x19])
-        DISPLAY_RIGHT = bytearray([0xBE, 0xEF, 0x04, 0x1A])
-
-        SPEED_IN_1 = bytearray([0xBE, 0xEF, 0x04, 0x1F])
-        SPEED_IN_2 = bytearray([0xBE, 0xEF, 0x04, 0x20])
-        SPEED_IN_3 = bytearray([0xBE, 0xEF, 0x04, 0x21])
-        SPEED_IN_4 = bytearray([0xBE, 0xEF, 0x04, 0x22])
-        SPEED_IN_5 = bytearray([0xBE, 0xEF, 0x04, 0x23])
-        SPEED_IN_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x24])
-        SPEED_IN_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x25])
-        SPEED_IN_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x26])
-        SPEED_IN_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x27])
-        SPEED_IN_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x28])
-
-        SPEED_OUT_1 = bytearray([0xBE, 0xEF, 0x04, 0x29])
-        SPEED_OUT_2 = bytearray([0xBE, 0xEF, 0x04, 0x2A])
-        SPEED_OUT_3 = bytearray([0xBE, 0xEF, 0x04, 0x2B])
-        SPEED_OUT_4 = bytearray([0xBE, 0xEF, 0x04, 0x2C])
-        SPEED_OUT_5 = bytearray([0xBE, 0xEF, 0x04, 0x2D])
-        SPEED_OUT_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x2E])
-        SPEED_OUT_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x2F])
-        SPEED_OUT_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x30])
-        SPEED_OUT_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x31])
-        SPEED_OUT_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x32])
-
-        SPEED_1 = bytearray([0xBE, 0xEF, 0x04, 0x33])
-        SPEED_2 = bytearray([0xBE, 0xEF, 0x04, 0x34])
-        SPEED_3 = bytearray([0xBE, 0xEF, 0x04, 0x35])
-        SPEED_4 = bytearray([0xBE, 0xEF, 0x04, 0x36])
-        SPEED_5 = bytearray([0xBE, 0xEF, 0x04, 0x37])
-        SPEED_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x38])
-        SPEED_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x39])
-        SPEED_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x3A])
-        SPEED_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x3B])
-        SPEED_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x3C])
-
-        TOGGLE_AUTO_MODE_2 = bytearray([0xBE, 0xEF, 0x04, 0x43])
-        TOGGLE_AUTO_PLUS_MODE = bytearray([0xBE, 0xEF, 0x04, 0x44])
-
-        DISPLAY_TEMPERATURE_IN_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x47])
-        DISPLAY_TEMPERATURE_OUT_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x48])
-        DISPLAY_CO2_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x49])
-        DISPLAY_VOC_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4A])
-        DISPLAY_HUMIDITY_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4B])
-        DISPLAY_PRESURE_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4C])
-        DISPLAY_COMPATIBILITY_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4D])
-        DISPLAY_ALL_SYMBOLS_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4E])
-
-        TIMER_STOP = bytearray([0xBE, 0xEF, 0x04, 0x50])
-        TIMER_START_10M = bytearray([0xBE, 0xEF, 0x04, 0x51])
-        TIMER_START_20M = bytearray([0xBE, 0xEF, 0x04, 0x52])
-        TIMER_START_30M = bytearray([0xBE, 0xEF, 0x04, 0x53])
-        TIMER_START_1H = bytearray([0xBE, 0xEF, 0x04, 0x54])
-        TIMER_START_1H30M = bytearray([0xBE, 0xEF, 0x04, 0x55])
-        TIMER_START_2H = bytearray([0xBE, 0xEF, 0x04, 0x56])
-        TIMER_START_3H = bytearray([0xBE, 0xEF, 0x04, 0x57])
-        TIMER_START_5H = bytearray([0xBE, 0xEF, 0x04, 0x58])
-        TIMER_START_9H = bytearray([0xBE, 0xEF, 0x04, 0x59])
-
-        DISPLAY_FAN = bytearray([0xBE, 0xEF, 0x04, 0x5A])
-        DISPLAY_TEMPERATURE_IN = bytearray([0xBE, 0xEF, 0x04, 0x5B])
-        DISPLAY_TEMPERATURE_OUT = bytearray([0xBE, 0xEF, 0x04, 0x5C])
-        DISPLAY_CO2 = bytearray([0xBE, 0xEF, 0x04, 0x5D])
-        DISPLAY_VOC = bytearray([0xBE, 0xEF, 0x04, 0x5E])
-        DISPLAY_HUMIDITY = bytearray([0xBE, 0xEF, 0x04, 0x5F])
-        DISPLAY_QUALITY_FAN = bytearray([0xBE, 0xEF, 0x04, 0x60])
-        DISPLAY_PRESURE = bytearray([0xBE, 0xEF, 0x04, 0x61])
-        DISPLAY_FAN_2 = bytearray([0xBE, 0xEF, 0x04, 0x62])
-        DISPLAY_DATE = bytearray([0xBE, 0xEF, 0x04, 0x63])
-        DISPLAY_TIME = bytearray([0xBE, 0xEF, 0x04, 0x64])
-
-        SET_BRIGHTNESS_0 = bytearray([0xBE, 0xEF, 0x04, 0x6E])
-        SET_BRIGHTNESS_1 = bytearray([0xBE, 0xEF, 0x04, 0x6F])
-        SET_BRIGHTNESS_2 = bytearray([0xBE, 0xEF, 0x04, 0x70])
-        SET_BRIGHTNESS_3 = bytearray([0xBE, 0xEF, 0x04, 0x71])
-        SET_BRIGHTNESS_4 = bytearray([0xBE, 0xEF, 0x04, 0x72])
-        SET_BRIGHTNESS_5 = bytearray([0xBE, 0xEF, 0x04, 0x73])
-        SET_BRIGHTNESS_6 = bytearray([0xBE, 0xEF, 0x04, 0x74])
-
-        READ_STATE = bytearray([0xBE, 0xEF, 0x05, 0x01, 0x00, 0x00, 0x00, 0x00, 0x5A])
-        READ_DEVICE_DETAILS = bytearray([0xBE, 0xEF, 0x05, 0x02, 0x00, 0x00, 0x00, 0x00, 0x5A])
-
-
-
-    def __init__(self, address, hass) -> None:
-        """Initialize prana coordinator."""
+    """Home Assistant adapter for one unit: PranaClient plus the per-frame pipeline."""
+    CONTROL_SERVICE_UUID = protocol.CONTROL_SERVICE_UUID
+    CONTROL_RW_CHARACTERISTIC_UUID = protocol.CONTROL_RW_CHARACTERISTIC_UUID
+    STATE_MSG_PREFIX = protocol.STATE_MSG_PREFIX
+    MAX_BRIGHTNESS = protocol.MAX_BRIGHTNESS
+    Cmd = protocol.Cmd
+    TIMER_STEPS = protocol.TIMER_STEPS
+
+    def __init__(
+        self,
+        address,
+        hass,
+        device_name: str | None = None,
+        has_sensors: bool | None = None,
+        options: Mapping[str, Any] | None = None,
+        history: History | None = None,
+        transport: Transport | None = None,
+    ) -> None:
+        """Initialize prana coordinator; ``transport`` replaces Bluetooth when given."""
         super().__init__(
             hass,
             LOGGER,
@@ -210,18 +125,47 @@ class PranaCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=30),
         )
 
-        self.loop = asyncio.get_running_loop()
         self.mac = address
         self._hass = hass
         self._device: BLEDevice | None = None
-        self._device = bluetooth.async_ble_device_from_address(self._hass, address, connectable=True)
-        self._connect_lock: asyncio.Lock = asyncio.Lock()
-        self._client: BleakClientWithServiceCache | None = None
-        self._disconnect_timer: asyncio.TimerHandle | None = None
-        self._cached_services: BleakGATTServiceCollection | None = None
-        self._expected_disconnect = False
-        self._write_uuid = None
-        self._read_uuid = None
+        if transport is None:
+            self._device = bluetooth.async_ble_device_from_address(self._hass, address, connectable=True)
+            transport = BleakTransport(self._device, device_name or address, ble_device_callback=lambda: self._device)
+        self.client = PranaClient(transport)
+        self.client.add_listener(self._notification_handler)
+        # Shared with the client; the retry wrapper counts and traces the coordinator's commands
+        self.timings = self.client.timings
+        self.tracer = self.client.tracer
+        self.device_info = DeviceInfo(
+            identifiers={
+                # Serial numbers are unique identifiers within a specific domain
+                (DOMAIN, address)
+            },
+            name=device_name,
+            connections={(device_registry.CONNECTION_NETWORK_MAC, address)},
+        )
+
+        # Computed once per update and shared by all entities
+        self.available = False
+        self.changed_fields: frozenset = frozenset()
+        self._pending_changes: set = set()
+        self._last_rssi = None
+
+        # Hardware capabilities, None until the first frame (or the config entry) tells
+        self.has_sensors: Optional[bool] = has_sensors
+
+        self.options = dict(options or {})
+        median = self.options.get(CONF_MEDIAN, DEFAULT_MEDIAN)
+        ewma_alpha = self.options.get(CONF_EWMA_ALPHA, DEFAULT_EWMA_ALPHA)
+        self._filters: Dict[str, SensorFilter] = {}
+        if median > 1 or ewma_alpha < 1:
+            self._filters = {field: SensorFilter(median, ewma_alpha) for field in FILTERED_FIELDS}
+        max_silence = self.options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+        self._deadbands: Dict[str, DeadBand] = {}
+        for field, option in DEADBAND_OPTIONS.items():
+            band = self.options.get(option, DEFAULT_DEADBAND)
+            if band > 0:
+                self._deadbands[field] = DeadBand(band, max_silence)
 
         # Device data
         self.speed = 0 #calculated
@@ -231,6 +175,7 @@ class PranaCoordinator(DataUpdateCoordinator):
         self.night_mode: Optional[bool] = None
         self.boost_mode: Optional[bool] = None
         self.auto_mode: Optional[bool] = None
+        self.auto_mode_plus: Optional[bool] = None
         self.flows_locked: Optional[bool] = None
         self.is_on: Optional[bool] = None
         self.mini_heating_enabled: Optional[bool] = None
@@ -252,6 +197,101 @@ class PranaCoordinator(DataUpdateCoordinator):
         self.isAirOutOn = None
         self.display = None
 
+        # Passed in by the integration so it outlives config entry reloads
+        self.history = history if history is not None else History()
+        self.statistics: StatisticsExporter | None = None
+        if self.options.get(CONF_EXTERNAL_STATISTICS, DEFAULT_EXTERNAL_STATISTICS):
+            self.statistics = StatisticsExporter(hass, address, device_name)
+
+        # Derived metrics, only when the model is known
+        self.derived: Optional[DerivedMetrics] = None
+        model = self.options.get(CONF_MODEL, DEFAULT_MODEL)
+        if model in MODELS:
+            self.derived = DerivedMetrics(with_overrides(
+                MODELS[model], self.options.get(CONF_MODEL_AIRFLOW, 0), self.options.get(CONF_MODEL_HEATER_POWER, 0)
+            ))
+        self.supply_airflow: Optional[int] = None
+        self.extract_airflow: Optional[int] = None
+        self.recovery_efficiency: Optional[int] = None
+        self.recovered_power: Optional[int] = None
+        self.heater_power: Optional[int] = None
+        self.heater_energy: Optional[float] = None
+
+        # Runtime/filter/heater hours, loaded by the integration at setup
+        self.counters = RuntimeCounters(hass, address)
+        self.runtime_hours: Optional[float] = None
+        self.filter_hours: Optional[float] = None
+        self.heater_hours: Optional[float] = None
+
+        # Device timer countdown, in minutes, kept locally between frames
+        self.timer_remaining: Optional[int] = None
+        self._timer_deadline: Optional[float] = None
+        self._timer_unsub: Optional[Callable[[], None]] = None
+
+        # Sanity checks on the raw readings
+        self.anomalies = AnomalyDetector()
+        self.sensor_stuck: list = []
+        self.sensor_jump: list = []
+        self.frame_frozen = False
+
+        # Connection stage durations and events, mirrored from the client timings
+        self.connect_time: Optional[float] = None
+        self.start_notify_time: Optional[float] = None
+        self.write_latency: Optional[float] = None
+        self.response_latency: Optional[float] = None
+        self.parse_time: Optional[float] = None
+        self.fan_out_time: Optional[float] = None
+        self.connection_retries = 0
+        self.disconnects = 0
+
+        # Closed-loop speed control, off unless configured
+        self.controller: Optional[Co2Controller] = None
+        self._control_task: Optional[asyncio.Task] = None
+        control = self.options.get(CONF_CONTROL, DEFAULT_CONTROL)
+        if control != CONTROL_OFF:
+            try:
+                self.controller = Co2Controller(
+                    control,
+                    {
+                        "co2": self.options.get(CONF_CONTROL_CO2, DEFAULT_CONTROL_CO2),
+                        "voc": self.options.get(CONF_CONTROL_VOC, 0),
+                        "humidity": self.options.get(CONF_CONTROL_HUMIDITY, 0),
+                    },
+                    {"co2": self.options.get(CONF_CONTROL_CO2_BAND, DEFAULT_CONTROL_CO2_BAND), **CONTROL_BANDS},
+                    self.options.get(CONF_CONTROL_MIN_SPEED, DEFAULT_CONTROL_MIN_SPEED),
+                    self.options.get(CONF_CONTROL_MAX_SPEED, DEFAULT_CONTROL_MAX_SPEED),
+                    self.options.get(CONF_CONTROL_DWELL, DEFAULT_CONTROL_DWELL),
+                )
+            except ValueError as error:
+                # Options saved before the form checked them
+                LOGGER.warning("%s: speed control is off: %s", address, error)
+
+        # Weekly programs, started by the integration once the entry is set up
+        self.scheduler = Scheduler(hass, self, self.options.get(CONF_SCHEDULE, []))
+
+        # Raw frame capture, started on demand by prana.start_capture
+        self.capture: Optional[CaptureWriter] = None
+        self._capture_unsub: Optional[Callable[[], None]] = None
+        self._capture_write: Optional[asyncio.Future] = None
+
+        # Complete command traces, also written to a file when configured
+        self.trace_exporter: Optional[OtlpFileExporter] = None
+        self._trace_flush: Optional[asyncio.Future] = None
+        if self.options.get(CONF_TRACE_EXPORT, DEFAULT_TRACE_EXPORT):
+            self.trace_exporter = OtlpFileExporter(
+                hass.config.path(DOMAIN, "traces", f"{address.replace(':', '').lower()}.jsonl"),
+                {"service.instance.id": address, "device.name": device_name or address},
+            )
+            self.tracer.listeners.append(self._async_export_trace)
+
+        # Entity write accounting: frames in vs. state machine writes out
+        self.frames_received = 0
+        # Frames identical to the one before (polls of an idle unit, pushes racing a read)
+        self.frames_duplicate = 0
+        self._last_frame = b""
+        self.state_writes = 0
+        self.state_writes_skipped = 0
+
         #Test
         self.byte4: int = 0
         #Test
@@ -261,7 +301,9 @@ class PranaCoordinator(DataUpdateCoordinator):
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            await self.get_status_details()
+            # Polls would crowd the commands out of the trace log
+            with untraced():
+                await self.get_status_details()
 
         except (Exception) as error:
             self.is_on = False
@@ -270,21 +312,24 @@ class PranaCoordinator(DataUpdateCoordinator):
             LOGGER.debug(track)
 
     async def _write(self, data: bytearray, await_response: bool = False):
-        """Send command to device and read response."""
-        await self._ensure_connected()
-        return await self._write_while_connected(data, await_response)
+        """Send command to device; the client asks for the resulting state."""
+        await self.client.write(data, await_response)
 
-    async def _write_while_connected(self, data: bytearray, await_response: bool = False):
-        LOGGER.debug("Before command")
-        await self._client.write_gatt_char(self._write_uuid, data, await_response)
-
-        # Update the info after each command
-        if(self.Cmd.READ_STATE != data):
-            LOGGER.debug("Before read state")
-            return await self._client.write_gatt_char(self._write_uuid, self.Cmd.READ_STATE, True)
+    @property
+    def adapter(self) -> str | None:
+        """Return the adapter or proxy the device is reached through."""
+        details = self._device.details if self._device is not None else None
+        if not isinstance(details, dict):
+            return None
+        if "source" in details:
+            return details["source"]
+        # BlueZ object path: /org/bluez/hci0/dev_XX_XX_XX_XX_XX_XX
+        return details.get("path", "").rpartition("/")[0] or None
 
     @property
     def rssi(self):
+        if self._device is None:
+            return None
         return self._device.rssi
 
 # NEW DATA
@@ -292,6 +337,20 @@ class PranaCoordinator(DataUpdateCoordinator):
     async def toggle_boost_mode(self):
         await self._write(self.Cmd.TOGGLE_BOOST_MODE)
 
+    @retry_bluetooth_connection_error
+    async def boost_for(self, minutes: int):
+        """Boost and let the device timer end it; the shortest step covering ``minutes`` is used."""
+        seconds, command = next(
+            (step for step in self.TIMER_STEPS if step[0] >= minutes * 60), self.TIMER_STEPS[-1]
+        )
+        if not self.is_on:
+            await self.turn_on()
+        if not self.boost_mode:
+            await self._write(self.Cmd.TOGGLE_BOOST_MODE)
+            self.boost_mode = True
+        await self._write(command)
+        self._async_start_countdown(time.monotonic() + seconds)
+
     @retry_bluetooth_connection_error
     async def speed_up(self):
         await self._write(self.Cmd.SPEED_UP)
@@ -553,78 +612,243 @@ class PranaCoordinator(DataUpdateCoordinator):
             await self._write(self.Cmd.AUTO_MODE)
 
 
-    def __parse_state(self, data: bytearray) -> Optional[PranaState]:
-        if not data[:2] == self.STATE_MSG_PREFIX:
+    def _apply_fields(self, fields: dict) -> None:
+        """Store decoded fields, remembering which ones changed."""
+        for key, value in fields.items():
+            if getattr(self, key, None) != value:
+                self._pending_changes.add(key)
+                setattr(self, key, value)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Recompute shared state once, then notify the entities."""
+        available = self.lastRead is not None and self.lastRead > datetime.now() - AVAILABILITY_TIMEOUT
+        if available != self.available:
+            self.available = available
+            self._pending_changes.add("available")
+        rssi = self.rssi
+        if rssi != self._last_rssi:
+            self._last_rssi = rssi
+            self._pending_changes.add("rssi")
+        timings = self.timings
+        self._apply_fields({field: timings.last_ms(histogram) for field, histogram in TIMING_FIELDS.items()})
+        self._apply_fields({field: timings.counters[counter] for field, counter in TIMING_COUNTERS.items()})
+        self.changed_fields = frozenset(self._pending_changes)
+        self._pending_changes.clear()
+        started = now_ns()
+        super().async_update_listeners()
+        timings.record("fan_out", started)
+
+    def stats(self) -> dict:
+        """Performance snapshot for prana.get_stats."""
+        counters = self.timings.counters
+        histograms = self.timings.histograms
+        return {
+            "frames_received": self.frames_received,
+            "frames_duplicate": self.frames_duplicate,
+            "state_writes": self.state_writes,
+            "state_writes_skipped": self.state_writes_skipped,
+            "gatt_writes": counters["writes"],
+            "reads_coalesced": counters["reads_coalesced"],
+            "connect_attempts": counters["connect_attempts"],
+            "connects": counters["connects"],
+            "retries": counters["retries"],
+            "disconnects": counters["disconnects"],
+            "unexpected_disconnects": counters["unexpected_disconnects"],
+            "connection_mode": "connected" if self.client.is_connected else "idle",
+            "adapter": self.adapter,
+            "poll_interval": self.update_interval.total_seconds() if self.update_interval else None,
+            "queue_depth": self.client.in_flight,
+            "latency_ms": {
+                name: {f"p{percent}": histograms[name].percentile(percent) for percent in PERCENTILES}
+                for name in ("connect", "write", "response", "fan_out")
+            },
+        }
+
+    async def async_load_counters(self) -> None:
+        """Restore the persisted counters before the first frame."""
+        await self.counters.async_load()
+        if self.derived is not None:
+            self.derived.heater_energy = self.counters.values["heater_energy"]
+
+    @callback
+    def async_reset_filter(self) -> None:
+        """Zero the filter load after the filters were replaced."""
+        self.counters.async_reset_filter(datetime.now().isoformat())
+        self._apply_fields({"filter_hours": 0.0})
+        self.async_update_listeners()
+
+    async def async_start_capture(self, minutes: int | None = None) -> dict:
+        """Record every raw frame to a capture file, optionally for ``minutes``."""
+        if self.capture is not None:
+            await self.async_stop_capture()
+        name = f"{self.mac.replace(':', '')}_{datetime.now():%Y%m%d_%H%M%S}.prc"
+        writer = CaptureWriter(self.hass.config.path(DOMAIN, "captures", name))
+        await self.hass.async_add_executor_job(writer.open)
+        self.capture = writer
+        if minutes:
+            self._capture_unsub = async_call_later(self.hass, minutes * 60, self._async_capture_timeout)
+        LOGGER.debug("%s: capturing frames to %s", self.mac, writer.path)
+        return {"path": writer.path}
+
+    async def async_stop_capture(self) -> dict | None:
+        """Close the running capture; return its path and record count."""
+        writer, self.capture = self.capture, None
+        if self._capture_unsub is not None:
+            self._capture_unsub()
+            self._capture_unsub = None
+        if writer is None:
             return None
-        LOGGER.warning("%s %s %s %s %s %s", data[36], data[37], data[38], data[39], data[40], data[41])
-        #LOGGER.warning("DATA SIZE: %s", len(data))#137
-        LOGGER.warning(''.join(format(x, '02x') + ' ' for x in data))
-
-        s = PranaState()
-        s.timestamp = datetime.now()
-        s.brightness = int(log2(data[12]) + 1)
-        s.speed_locked = int(data[26] / 10)
-        s.speed_in = int(data[30] / 10)
-        s.speed_out = int(data[34] / 10)
-        s.auto_mode = bool(data[20] & 1)
-        s.auto_mode_plus = bool(data[20] & 2)
-        s.night_mode = bool(data[16])
-        s.boost_mode = bool(data[18])
-        s.flows_locked = bool(data[22])
-        s.is_on = bool(data[10])
-        s.mini_heating_enabled = bool(data[14])
-        s.winter_mode_enabled = bool(data[42])
-        s.is_input_fan_on = bool(data[28])
-        s.is_output_fan_on = bool(data[32])
-        s.display = Display(int(data[99]))
-        s.timer_on = bool(data[38])
-        s.timer = ((int(data[39]) << 8) + int(data[40]))
+        if self._capture_write is not None:
+            await self._capture_write
+            self._capture_write = None
+        await self.hass.async_add_executor_job(writer.close)
+        return {"path": writer.path, "records": writer.records}
+
+    async def _async_capture_timeout(self, _now) -> None:
+        self._capture_unsub = None
+        await self.async_stop_capture()
+
+    @callback
+    def _async_capture_frame(self, data: bytes) -> None:
+        self.capture.append(data, device=self.mac, rssi=self.rssi)
+        # One write in flight at a time keeps the records in order
+        if self.capture.pending >= FLUSH_RECORDS and (self._capture_write is None or self._capture_write.done()):
+            self._capture_write = self.hass.async_add_executor_job(self.capture.write, self.capture.detach())
+
+    @callback
+    def _async_export_trace(self, trace: Trace) -> None:
+        self.trace_exporter.export(trace)
+        # One flush in flight at a time; what arrives meanwhile goes with the next
+        if self._trace_flush is None or self._trace_flush.done():
+            self._trace_flush = self.hass.async_add_executor_job(
+                self.trace_exporter.write, self.trace_exporter.detach()
+            )
 
-        if not self.is_on:
-            self.speed = 0
-        elif self.auto_mode:
-            self.speed = self.speed_in #same as self.speedOut
-        elif self.speed_locked:
-            self.speed = self.speed_locked
-        elif self.air_in and self.air_in:
-            self.speed = int((self.speed_in + self.speed_out) / 2)
-        elif self.isAirInOn:
-            self.speed = self.speed_in
-        elif self.isAirOutOn:
-            self.speed = self.speed_out
-
-        # Reading sensors
-        sensors = PranaSensorsState()
-        sensors.humidity = int(data[60] - 128)
-        sensors.pressure = 512 + int(data[78])
-        # co2 and voc
-        sensors.co2 = int(struct.unpack_from(">h", data, 61)[0] & 0b0011111111111111)
-        sensors.voc = int(struct.unpack_from(">h", data, 63)[0] & 0b0011111111111111)
-        if 0 < sensors.co2 < 10000:
-            # Different version of firmware ???
-            sensors.temperature_in = float(struct.unpack_from(">h", data, 51)[0] & 0b0011111111111111) / 10.0
-            sensors.temperature_out = float(struct.unpack_from(">h", data, 54)[0] & 0b0011111111111111) / 10.0
-        else:
-            sensors.temperature_in = float(data[49]) / 10
-            sensors.temperature_out = float(data[55]) / 10
-        # Add sensors to the state only in case device has corresponding hardware
-        if sensors.humidity > 0:
-            s.sensors = sensors
-        return s
-
-    async def _notification_handler(self, _sender: int, data: bytearray) -> None:
-        """Handle notification responses."""
-        state = self.__parse_state(data)
+    @callback
+    def _async_update_anomaly_issue(self) -> None:
+        """Raise a repairs issue while any anomaly flag is set."""
+        problems = [f"stuck: {', '.join(self.sensor_stuck)}"] if self.sensor_stuck else []
+        if self.sensor_jump:
+            problems.append(f"implausible jump: {', '.join(self.sensor_jump)}")
+        if self.frame_frozen:
+            problems.append("frames not refreshing")
+        issue_id = f"sensor_anomaly_{self.mac}"
+        if not problems:
+            issue_registry.async_delete_issue(self.hass, DOMAIN, issue_id)
+            return
+        issue_registry.async_create_issue(
+            self.hass,
+            DOMAIN,
+            issue_id,
+            is_fixable=False,
+            severity=issue_registry.IssueSeverity.WARNING,
+            translation_key="sensor_anomaly",
+            translation_placeholders={"name": self.device_info["name"], "problems": "; ".join(problems)},
+        )
+
+    @callback
+    def _async_start_countdown(self, deadline: float) -> None:
+        self._timer_deadline = deadline
+        if self._timer_unsub is None:
+            self._timer_unsub = async_track_time_interval(self.hass, self._async_timer_tick, TIMER_TICK)
+        self._async_timer_tick()
+
+    @callback
+    def _async_stop_countdown(self) -> None:
+        self._timer_deadline = None
+        if self._timer_unsub is not None:
+            self._timer_unsub()
+            self._timer_unsub = None
+        self._apply_fields({"timer_remaining": None})
+
+    @callback
+    def _async_timer_tick(self, _now=None) -> None:
+        remaining = max(0, ceil((self._timer_deadline - time.monotonic()) / 60))
+        self._apply_fields({"timer_remaining": remaining})
+        if remaining == 0 and self._timer_unsub is not None:
+            # Wait for the frame that shows the timer off
+            self._timer_unsub()
+            self._timer_unsub = None
+        if _now is not None and self._pending_changes:
+            self.async_update_listeners()
+
+    @callback
+    def _async_sync_timer(self, now: float) -> None:
+        """Follow the device timer from the frame; count down locally in between."""
+        if not self.timer_on:
+            if self._timer_deadline is not None:
+                self._async_stop_countdown()
+            return
+        # The frame carries the remaining minutes
+        deadline = now + (self.timer or 0) * 60
+        if self._timer_deadline is None or abs(deadline - self._timer_deadline) > 90:
+            self._async_start_countdown(deadline)
+
+    @callback
+    def _run_controller(self, sensors: dict, now: float) -> None:
+        """Feed a frame to the control loop; write only when the target speed changes."""
+        if not self.is_on or self.auto_mode:
+            # The unit is off or regulating itself
+            self.controller.reset()
+            return
+        if self._control_task is not None and not self._control_task.done():
+            return
+        target = self.controller.update(sensors, self.speed, now)
+        if target is not None:
+            LOGGER.debug("%s: control loop sets speed %s -> %s", self.mac, self.speed, target)
+            self._control_task = self.hass.async_create_task(self._async_control_set_speed(target))
+
+    async def _async_control_set_speed(self, speed: int) -> None:
+        try:
+            await self.set_speed(speed)
+        except Exception:
+            LOGGER.warning("%s: control loop could not set speed %s", self.mac, speed, exc_info=True)
+
+    async def _notification_handler(self, state: Optional[PranaState], data: bytes) -> None:
+        """Run a decoded frame through the pipeline and notify the entities."""
         self.lastRead = datetime.now()
+        self.frames_received += 1
+        if data == self._last_frame:
+            self.frames_duplicate += 1
+        else:
+            self._last_frame = bytes(data)
+        if self.capture is not None:
+            self._async_capture_frame(data)
         LOGGER.debug("State data from notifiation: %s", state)
         if state is not None:
             dict_state = state.to_dict()
-            for key in dict_state:
-                setattr(self, key, dict_state[key])
-            if state.sensors is not None:
-                sensors = state.sensors.to_dict()
-                for key in sensors:
-                    setattr(self, key, sensors[key])
+            sensors = state.sensors.to_dict() if state.sensors is not None else None
+            # History and statistics use the readings as decoded, before any smoothing
+            values = {**dict_state, **(sensors or {})}
+            timestamp = time.time()
+            now = time.monotonic()
+            self.history.append(timestamp, values)
+            if self.statistics is not None:
+                self.statistics.async_add(timestamp, values)
+            self._apply_fields(dict_state)
+            self._async_sync_timer(now)
+            self._apply_fields(self.anomalies.update(bytes(data), values, now))
+            if self._pending_changes & ANOMALY_FIELDS:
+                self._async_update_anomaly_issue()
+            if sensors is not None:
+                for key, sensor_filter in self._filters.items():
+                    sensors[key] = sensor_filter.update(sensors[key])
+                if self.controller is not None:
+                    # Smoothed, but not dead-banded, readings drive the loop
+                    self._run_controller(sensors, now)
+                for key, deadband in self._deadbands.items():
+                    sensors[key] = deadband.update(sensors[key], now)
+                self._apply_fields(sensors)
+            if self.derived is not None:
+                self._apply_fields(self.derived.update(values, now))
+                self.counters.values["heater_energy"] = self.derived.heater_energy
+            self._apply_fields(self.counters.async_update(values, now))
+            # A sensor board seen once is there; its absence only counts before that
+            if state.sensors is not None and not self.has_sensors:
+                self.has_sensors = True
+            elif state.sensors is None and self.has_sensors is None:
+                self.has_sensors = False
             LOGGER.debug("Send update event %s", dict_state)
             await self.async_request_refresh()
 
@@ -639,88 +863,16 @@ class PranaCoordinator(DataUpdateCoordinator):
 
 
 # OLD
-    @retry_bluetooth_connection_error
-    async def _ensure_connected(self) -> None:
-        """Ensure connection to device is established."""
-        if self._connect_lock.locked():
-            LOGGER.debug(
-                "%s: Connection already in progress, waiting for it to complete; RSSI: %s",
-                self.name,
-                self.rssi,
-            )
-        if self._client and self._client.is_connected:
-            self._reset_disconnect_timer()
-            return
-        async with self._connect_lock:
-            # Check again while holding the lock
-            if self._client and self._client.is_connected:
-                self._reset_disconnect_timer()
-                return
-            LOGGER.debug("%s: Connecting; RSSI: %s", self.name, self.rssi)
-            client = await establish_connection(
-                BleakClientWithServiceCache,
-                self._device,
-                self.name,
-                self._disconnected,
-                cached_services=self._cached_services,
-                ble_device_callback=lambda: self._device,
-            )
-            LOGGER.debug("%s: Connected; RSSI: %s", self.name, self.rssi)
-
-            self._read_uuid = READ_CHARACTERISTIC_UUIDS[0]
-            self._write_uuid = WRITE_CHARACTERISTIC_UUIDS[0]
-            self._cached_services = client.services
-            self._client = client
-            self._reset_disconnect_timer()
-
-            LOGGER.debug("%s: Subscribe to notifications; RSSI: %s", self.name, self.rssi)
-            await client.start_notify(self._read_uuid, self._notification_handler)
-
-
-    def _reset_disconnect_timer(self) -> None:
-        """Reset disconnect timer."""
-        if self._disconnect_timer:
-            self._disconnect_timer.cancel()
-        self._expected_disconnect = False
-        self._disconnect_timer = self.loop.call_later(
-            DISCONNECT_DELAY, self._disconnect
-        )
-
-    def _disconnected(self, client: BleakClientWithServiceCache) -> None:
-        """Disconnected callback."""
-        if self._expected_disconnect:
-            LOGGER.debug("%s: Disconnected from device; RSSI: %s", self.name, self.rssi)
-            return
-        LOGGER.warning("%s: Device unexpectedly disconnected; RSSI: %s",self.name,self.rssi,)
-
-    def _disconnect(self) -> None:
-        """Disconnect from device."""
-        self._disconnect_timer = None
-        asyncio.create_task(self._execute_timed_disconnect())
-
     async def stop(self) -> None:
         """Stop the LEDBLE."""
         # LOGGER.debug("%s: Stop", self.name)
-        await self._execute_disconnect()
-
-    async def _execute_timed_disconnect(self) -> None:
-        """Execute timed disconnection."""
-        LOGGER.debug(
-            "%s: Disconnecting after timeout of %s",
-            self.name,
-            DISCONNECT_DELAY,
-        )
-        await self._execute_disconnect()
-
-    async def _execute_disconnect(self) -> None:
-        """Execute disconnection."""
-        async with self._connect_lock:
-            read_char = self._read_uuid
-            client = self._client
-            self._expected_disconnect = True
-            self._client = None
-            self._write_uuid = None
-            self._read_uuid = None
-            if client and client.is_connected:
-                await client.stop_notify(read_char)
-                await client.disconnect()
+        await self.async_stop_capture()
+        if self._timer_unsub is not None:
+            self._timer_unsub()
+            self._timer_unsub = None
+        await self.client.disconnect()
+        if self.trace_exporter is not None:
+            # Disconnecting completes the traces still waiting for a notification
+            if self._trace_flush is not None:
+                await self._trace_flush
+            await self.hass.async_add_executor_job(self.trace_exporter.write, self.trace_exporter.detach())
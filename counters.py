@@ -0,0 +1,93 @@
+"""Runtime, filter and heater counters kept across restarts."""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .derived import MAX_INTEGRATION_GAP
+
+STORAGE_VERSION = 1
+# Counters reach the disk at most this often; the final write on shutdown catches the rest
+SAVE_DELAY = 15 * 60
+# Speed level counted as one full hour of filter load
+FILTER_NOMINAL_SPEED = 5
+
+COUNTERS = ("runtime_hours", "filter_hours", "heater_hours", "heater_energy")
+
+class RuntimeCounters:
+    """Hours integrated per frame in memory, persisted in batches.
+
+    ``filter_hours`` weighs the fan time by the speed levels of both fans,
+    so an hour at speed 5 in and out counts as one hour and an hour at
+    speed 1 as a fifth. ``heater_energy`` only stores the derived heater
+    energy so it carries across restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, mac: str) -> None:
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{mac.replace(':', '').lower()}_counters")
+        self.values: Dict[str, float] = dict.fromkeys(COUNTERS, 0.0)
+        self.filter_reset_at: Optional[str] = None
+        self._fields: Mapping[str, Any] = {}
+        self._last_update: Optional[float] = None
+        self._save_pending = False
+        self.saves = 0
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if data:
+            for counter in COUNTERS:
+                self.values[counter] = float(data.get(counter, 0.0))
+            self.filter_reset_at = data.get("filter_reset_at")
+
+    def _data_to_save(self) -> dict:
+        self._save_pending = False
+        self.saves += 1
+        return {**self.values, "filter_reset_at": self.filter_reset_at}
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        # async_delay_save restarts its timer on every call; call it once per batch
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write now, e.g. when the entry unloads."""
+        self._save_pending = False
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_update(self, fields: Mapping[str, Any], now: float) -> Dict[str, float]:
+        """Integrate the interval ending at monotonic ``now`` and return the rounded counters.
+
+        The interval is counted with the state seen at its start.
+        """
+        if self._last_update is not None and now - self._last_update <= MAX_INTEGRATION_GAP:
+            previous = self._fields
+            hours = (now - self._last_update) / 3600
+            if previous.get("is_on"):
+                level_in = (previous.get("speed_in") or 0) if previous.get("is_input_fan_on") else 0
+                level_out = (previous.get("speed_out") or 0) if previous.get("is_output_fan_on") else 0
+                if level_in or level_out:
+                    self.values["runtime_hours"] += hours
+                    self.values["filter_hours"] += hours * (level_in + level_out) / (2 * FILTER_NOMINAL_SPEED)
+                if previous.get("mini_heating_enabled"):
+                    self.values["heater_hours"] += hours
+            self._async_schedule_save()
+        self._last_update = now
+        self._fields = fields
+        return {
+            "runtime_hours": round(self.values["runtime_hours"], 1),
+            "filter_hours": round(self.values["filter_hours"], 1),
+            "heater_hours": round(self.values["heater_hours"], 1),
+        }
+
+    @callback
+    def async_reset_filter(self, when: str) -> None:
+        """Start a new filter: zero its load, keep the other counters."""
+        self.values["filter_hours"] = 0.0
+        self.filter_reset_at = when
+        self._async_schedule_save()
@@ -0,0 +1,100 @@
+"""Metrics derived from the decoded frame and a per-model table of nominal figures."""
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Volumetric heat capacity of air, J/(m³·K), near 20 °C
+AIR_HEAT_CAPACITY = 1.2 * 1005
+# Frames further apart than this are not integrated (unit offline, HA restart)
+MAX_INTEGRATION_GAP = 300
+
+class ModelSpec(NamedTuple):
+    """Nominal figures of one model, indexed by fan speed 1..N."""
+    name: str
+    # m³/h per fan speed
+    airflow: Tuple[int, ...]
+    # Recuperator efficiency per fan speed, 0..1
+    efficiency: Tuple[float, ...]
+    # Mini-heating element, W
+    heater_power: int
+
+# Approximate figures, speeds 1-6 (6 is boost). Airflow and heater power
+# are rounded from the ranges the manufacturer advertises for each model;
+# efficiency is one assumed curve falling with speed, not a published
+# per-speed figure. The options override airflow and heater power.
+MODELS: Dict[str, ModelSpec] = {
+    "150": ModelSpec("Prana 150", (15, 30, 50, 70, 95, 115), (0.96, 0.92, 0.86, 0.80, 0.74, 0.70), 120),
+    "200g": ModelSpec("Prana 200G", (20, 40, 65, 90, 115, 135), (0.96, 0.92, 0.87, 0.82, 0.77, 0.72), 180),
+    "210g": ModelSpec("Prana 210G", (20, 45, 70, 100, 125, 150), (0.96, 0.92, 0.87, 0.82, 0.77, 0.72), 180),
+    "340a": ModelSpec("Prana 340A", (30, 65, 105, 145, 190, 235), (0.96, 0.91, 0.86, 0.81, 0.76, 0.72), 260),
+}
+
+def with_overrides(model: ModelSpec, max_airflow: int = 0, heater_power: int = 0) -> ModelSpec:
+    """The model with the user's figures; airflow scales the curve to ``max_airflow`` at boost, 0 keeps the table."""
+    if max_airflow:
+        top = model.airflow[-1]
+        model = model._replace(airflow=tuple(round(value * max_airflow / top) for value in model.airflow))
+    if heater_power:
+        model = model._replace(heater_power=heater_power)
+    return model
+
+# Fields the derived metrics are computed from
+DERIVED_INPUTS = frozenset({
+    "is_on",
+    "speed_in",
+    "speed_out",
+    "is_input_fan_on",
+    "is_output_fan_on",
+    "mini_heating_enabled",
+    "temperature_in",
+    "temperature_out",
+})
+
+class DerivedMetrics:
+    """Incremental derived metrics for one unit, updated once per frame.
+
+    Airflow and efficiency are looked up from the model table; the recovered
+    heat uses the indoor/outdoor temperature difference from the sensor
+    board; heater energy is integrated between frames while the heater is on.
+    ``temperature_in`` is the room side, ``temperature_out`` the street side.
+    """
+
+    def __init__(self, model: ModelSpec) -> None:
+        self.model = model
+        self.heater_energy = 0.0
+        self._heater_power = 0
+        self._last_update: Optional[float] = None
+
+    def _lookup(self, table: Tuple, speed: Optional[int]):
+        if not speed:
+            return 0
+        return table[min(speed, len(table)) - 1]
+
+    def update(self, fields: Dict, now: float) -> Dict[str, Optional[float]]:
+        """Return the derived fields for a frame read at monotonic ``now``."""
+        if self._last_update is not None and now - self._last_update <= MAX_INTEGRATION_GAP:
+            # Energy of the interval ending now, at the power seen at its start
+            self.heater_energy += self._heater_power * (now - self._last_update) / 3_600_000
+        self._last_update = now
+
+        is_on = bool(fields.get("is_on"))
+        supply = self._lookup(self.model.airflow, fields.get("speed_in")) if is_on and fields.get("is_input_fan_on") else 0
+        extract = self._lookup(self.model.airflow, fields.get("speed_out")) if is_on and fields.get("is_output_fan_on") else 0
+        self._heater_power = self.model.heater_power if is_on and fields.get("mini_heating_enabled") else 0
+
+        efficiency = None
+        recovered_power = None
+        if supply and extract:
+            # Less extract than supply air leaves less heat to recover
+            efficiency = self._lookup(self.model.efficiency, fields.get("speed_in")) * min(1.0, extract / supply)
+            inside = fields.get("temperature_in")
+            outside = fields.get("temperature_out")
+            if inside is not None and outside is not None:
+                recovered_power = supply / 3600 * AIR_HEAT_CAPACITY * efficiency * (inside - outside)
+
+        return {
+            "supply_airflow": supply,
+            "extract_airflow": extract,
+            "recovery_efficiency": None if efficiency is None else round(efficiency * 100),
+            "recovered_power": None if recovered_power is None else round(recovered_power),
+            "heater_power": self._heater_power,
+            "heater_energy": round(self.heater_energy, 2),
+        }
@@ -0,0 +1,68 @@
+"""Diagnostics support for Prana."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_MAC
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_MAC}
+# History windows summarised in the download, in minutes
+HISTORY_WINDOWS = (15, 60, 24 * 60)
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    history = coordinator.history
+    now = time.time()
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "device": {
+            "available": coordinator.available,
+            "has_sensors": coordinator.has_sensors,
+            "last_read": coordinator.lastRead,
+            "frames_received": coordinator.frames_received,
+            "state_writes": coordinator.state_writes,
+            "state_writes_skipped": coordinator.state_writes_skipped,
+        },
+        "timings": coordinator.timings.as_dict(),
+        "traces": coordinator.tracer.as_list(),
+        "anomalies": coordinator.anomalies.as_dict(time.monotonic()),
+        "counters": {
+            **coordinator.counters.values,
+            "filter_reset_at": coordinator.counters.filter_reset_at,
+            "saves": coordinator.counters.saves,
+        },
+        "schedule": coordinator.scheduler.as_dict(),
+        "control": None if coordinator.controller is None else coordinator.controller.as_dict(),
+        "capture": None if coordinator.capture is None else {
+            "path": coordinator.capture.path,
+            "records": coordinator.capture.records,
+        },
+        "statistics": None if coordinator.statistics is None else {
+            "hours_imported": coordinator.statistics.hours_imported,
+            "recent_5m": list(coordinator.statistics.recent)[-12:],
+        },
+        "history": {
+            "capacity": history.capacity,
+            "frames": len(history),
+            "oldest": history.oldest,
+            "newest": history.newest,
+            "windows": {
+                f"{minutes}m": {
+                    field: history.stats(field, now - minutes * 60, now, (5, 50, 95))
+                    for field in history.fields
+                }
+                for minutes in HISTORY_WINDOWS
+            },
+        },
+    }
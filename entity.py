@@ -0,0 +1,56 @@
+"""Base entity shared by the Prana platforms."""
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+class PranaEntity(CoordinatorEntity):
+    """Coordinator entity that only writes state when its rendering changed.
+
+    Device info and availability are computed once per update on the
+    coordinator and shared by every entity of the device.
+    """
+    # Coordinator fields this entity renders; None means "all of them".
+    _depends_on: frozenset | None = None
+
+    def __init__(self, coordinator, name: str):
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._name = name
+        self._last_rendered = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        changed = self.coordinator.changed_fields
+        if (
+            self._depends_on is not None
+            and self._last_rendered is not None
+            and "available" not in changed
+            and self._depends_on.isdisjoint(changed)
+        ):
+            self.coordinator.state_writes_skipped += 1
+            return
+        rendered = self._render()
+        if rendered == self._last_rendered:
+            self.coordinator.state_writes_skipped += 1
+            return
+        self._last_rendered = rendered
+        self.coordinator.state_writes += 1
+        self.async_write_ha_state()
+
+    def _render(self) -> tuple:
+        """Return everything that ends up in the state machine."""
+        return (self.available, self.state)
+
+    @property
+    def available(self):
+        """Return if the device has reported recently."""
+        return self.coordinator.available
+
+    @property
+    def device_info(self):
+        """Return device info."""
+        return self.coordinator.device_info
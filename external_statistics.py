@@ -0,0 +1,168 @@
+"""Long-term statistics computed in the integration and imported into the recorder."""
+from __future__ import annotations
+
+from collections import deque
+import logging
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .history import History
+
+LOGGER = logging.getLogger(__name__)
+
+# Exported fields: (name suffix, unit)
+STATISTIC_FIELDS = {
+    "co2": ("CO2", "ppm"),
+    "voc": ("TVOC", "ppb"),
+    "temperature_in": ("Temperature in", "°C"),
+    "temperature_out": ("Temperature out", "°C"),
+    "humidity": ("Humidity", "%"),
+    "pressure": ("Pressure", "mmHg"),
+}
+SHORT_TERM_PERIOD = 5 * 60
+LONG_TERM_PERIOD = 60 * 60
+# Closed 5-minute buckets kept for diagnostics (24 h)
+SHORT_TERM_KEEP = 288
+
+class Bucket:
+    """Running mean/min/max of one field over one period."""
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        if self.count:
+            if value < self.min:
+                self.min = value
+            elif value > self.max:
+                self.max = value
+        else:
+            self.min = self.max = value
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+    def as_dict(self) -> dict:
+        return {"mean": round(self.mean, 3), "min": self.min, "max": self.max, "count": self.count}
+
+class PeriodAggregator:
+    """Fold frames into fixed, clock-aligned periods, one bucket per field."""
+
+    def __init__(self, period: int, fields=tuple(STATISTIC_FIELDS)) -> None:
+        self.period = period
+        self.fields = tuple(fields)
+        self.start: Optional[int] = None
+        self.buckets: Dict[str, Bucket] = {}
+
+    def add(self, timestamp: float, values: Mapping[str, Optional[float]]) -> Optional[Tuple[int, Dict[str, Bucket]]]:
+        """Add a frame; return (start, buckets) of the period it closed, if any."""
+        start = int(timestamp) - int(timestamp) % self.period
+        closed = None
+        if start != self.start:
+            if self.start is not None and self.buckets:
+                closed = (self.start, self.buckets)
+            self.start = start
+            self.buckets = {}
+        for field in self.fields:
+            value = values.get(field)
+            if value is None or value != value:
+                continue
+            bucket = self.buckets.get(field)
+            if bucket is None:
+                bucket = self.buckets[field] = Bucket()
+            bucket.add(value)
+        return closed
+
+class StatisticsExporter:
+    """Incremental 5-minute and hourly aggregation with hourly recorder import.
+
+    The recorder only accepts imported statistics on whole hours, so the
+    hourly buckets are imported and the 5-minute buckets are kept in memory
+    for diagnostics.
+    """
+
+    def __init__(self, hass: HomeAssistant, mac: str, device_name: str | None) -> None:
+        self._hass = hass
+        self._device_name = device_name or mac
+        self._object_id = mac.replace(":", "").lower()
+        self.short_term = PeriodAggregator(SHORT_TERM_PERIOD)
+        self.long_term = PeriodAggregator(LONG_TERM_PERIOD)
+        self.recent: Deque[Tuple[int, Dict[str, dict]]] = deque(maxlen=SHORT_TERM_KEEP)
+        self.hours_imported = 0
+
+    def statistic_id(self, field: str) -> str:
+        return f"{DOMAIN}:{self._object_id}_{field}"
+
+    @callback
+    def async_add(self, timestamp: float, values: Mapping[str, Optional[float]]) -> None:
+        """Fold in one decoded frame."""
+        closed = self.short_term.add(timestamp, values)
+        if closed is not None:
+            start, buckets = closed
+            self.recent.append((start, {field: bucket.as_dict() for field, bucket in buckets.items()}))
+        closed = self.long_term.add(timestamp, values)
+        if closed is not None:
+            self._async_import([closed])
+
+    @callback
+    def async_backfill(self, history: History) -> None:
+        """Rebuild the buckets from the in-memory history and import closed hours.
+
+        Importing an hour that is already in the recorder overwrites it, so
+        replaying the whole buffer is safe.
+        """
+        hours: List[Tuple[int, Dict[str, Bucket]]] = []
+        for index in range(len(history)):
+            slot = history.physical(index)
+            timestamp = history.timestamps[slot]
+            values = {field: history.values[field][slot] for field in STATISTIC_FIELDS}
+            closed = self.short_term.add(timestamp, values)
+            if closed is not None:
+                start, buckets = closed
+                self.recent.append((start, {field: bucket.as_dict() for field, bucket in buckets.items()}))
+            closed = self.long_term.add(timestamp, values)
+            if closed is not None:
+                hours.append(closed)
+        if hours:
+            LOGGER.debug("%s: backfilling %s hours of statistics", self._device_name, len(hours))
+            self._async_import(hours)
+
+    @callback
+    def _async_import(self, hours: List[Tuple[int, Dict[str, Bucket]]]) -> None:
+        if "recorder" not in self._hass.config.components:
+            return
+        for field, (name, unit) in STATISTIC_FIELDS.items():
+            statistics = [
+                StatisticData(
+                    start=dt_util.utc_from_timestamp(start),
+                    mean=buckets[field].mean,
+                    min=buckets[field].min,
+                    max=buckets[field].max,
+                )
+                for start, buckets in hours
+                if field in buckets
+            ]
+            if not statistics:
+                continue
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{self._device_name} {name}",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(field),
+                unit_of_measurement=unit,
+            )
+            async_add_external_statistics(self._hass, metadata, statistics)
+        self.hours_imported += len(hours)
@@ -5,6 +5,7 @@ import asyncio
 from datetime import datetime, timedelta
 import logging
 import math
+import time
 
 from homeassistant.components.fan import PLATFORM_SCHEMA, FanEntity, FanEntityFeature
 from homeassistant.const import (
@@ -24,7 +25,8 @@ from homeassistant.helpers.update_coordinator import (
 from homeassistant.helpers import device_registry
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.const import STATE_OFF
-from homeassistant.core import callback
+from homeassistant.core import ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.dispatcher import dispatcher_send, async_dispatcher_connect
 from homeassistant.util.percentage import (
     int_states_in_range,
@@ -35,7 +37,11 @@ from homeassistant.util.percentage import (
 import voluptuous as vol
 import homeassistant.helpers.config_validation as cv
 
-from .const import PranaState, Speed, PranaSensorsState, Display
+from .const import CONF_SCHEDULE, PranaState, Speed, PranaSensorsState, Display
+from .history import HISTORY_FIELDS
+from .schedule import SCHEDULE_SCHEMA
+from .entity import PranaEntity
+from . import tracing
 
 LOGGER = logging.getLogger(__name__)
 
@@ -44,6 +50,13 @@ SPEED_MANUAL = "manual"
 SPEED_RANGE = (1, 5)
 
 DATA_KEY = "fan.prana"
+DATA_ADAPTER_LIMITS = "fan.prana_adapter_limits"
+
+# Concurrent BLE connections we open through a single adapter or proxy
+MAX_CONNECTIONS_PER_ADAPTER = 3
+
+# Services handled in the integration: no radio traffic, no state refresh
+LOCAL_SERVICES = {"get_history_stats", "get_stats", "reset_filter", "set_schedule", "start_capture", "stop_capture"}
 
 PRANA_SERVICE_BASE_SCHEMA = vol.Schema({vol.Required(ATTR_ENTITY_ID): cv.entity_ids})
 
@@ -65,6 +78,32 @@ PRANA_SERVICE_SET_DISPLAY_SCHEMA = PRANA_SERVICE_BASE_SCHEMA.extend(
     }
 )
 
+PRANA_SERVICE_GET_HISTORY_STATS_SCHEMA = PRANA_SERVICE_BASE_SCHEMA.extend(
+    {
+        vol.Required("field") : vol.In(HISTORY_FIELDS),
+        vol.Optional("minutes", default=15) : vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+        vol.Optional("percentiles", default=[]) : vol.All(cv.ensure_list, [vol.All(vol.Coerce(float), vol.Range(min=0, max=100))]),
+    }
+)
+
+PRANA_SERVICE_BOOST_FOR_SCHEMA = PRANA_SERVICE_BASE_SCHEMA.extend(
+    {
+        vol.Required("minutes") : vol.All(vol.Coerce(int), vol.Range(min=1, max=9 * 60)),
+    }
+)
+
+PRANA_SERVICE_SET_SCHEDULE_SCHEMA = PRANA_SERVICE_BASE_SCHEMA.extend(
+    {
+        vol.Required("programs") : SCHEDULE_SCHEMA,
+    }
+)
+
+PRANA_SERVICE_START_CAPTURE_SCHEMA = PRANA_SERVICE_BASE_SCHEMA.extend(
+    {
+        vol.Optional("minutes") : vol.All(vol.Coerce(int), vol.Range(min=1, max=7 * 24 * 60)),
+    }
+)
+
 async def async_setup_entry(hass, config_entry, async_add_devices):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
@@ -80,8 +119,8 @@ async def async_setup_entry(hass, config_entry, async_add_devices):
 
     async_add_devices(devices)
 
-    async def async_service_handler(service):
-        """Map services to methods on XiaomiAirPurifier."""
+    async def async_service_handler(service: ServiceCall) -> ServiceResponse:
+        """Dispatch the service to all targeted units concurrently."""
         method = "async_" + service.service
         params = {
             key: value for key, value in service.data.items() if key != ATTR_ENTITY_ID
@@ -95,37 +134,120 @@ async def async_setup_entry(hass, config_entry, async_add_devices):
             ]
         else:
             devices = hass.data[DATA_KEY].values()
-
-        update_tasks = []
-        for device in devices:
-            if not hasattr(device, method):
-                continue
-            await getattr(device, method)(**params)
-            update_tasks.append(asyncio.create_task(device.async_update_ha_state(True)))
-
-        if update_tasks:
-            await asyncio.wait(update_tasks)
-
-    hass.services.async_register(DOMAIN, "set_speed", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA)
-    hass.services.async_register(DOMAIN, "set_speed_in", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA)
-    hass.services.async_register(DOMAIN, "set_speed_out", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA)
-    hass.services.async_register(DOMAIN, "set_brightness", async_service_handler, schema=PRANA_SERVICE_SET_BRIGHTNESS_SCHEMA)
-    hass.services.async_register(DOMAIN, "set_display", async_service_handler, schema=PRANA_SERVICE_SET_DISPLAY_SCHEMA)
-
-class PranaFan(CoordinatorEntity, FanEntity):
+        devices = [device for device in devices if hasattr(device, method)]
+
+        # Shared across service calls so parallel automations respect the limit too
+        adapter_limits = hass.data.setdefault(DATA_ADAPTER_LIMITS, {})
+
+        async def _async_run(device) -> dict:
+            try:
+                result = await getattr(device, method)(**params)
+            except Exception as error:
+                LOGGER.debug("%s: %s failed", device.entity_id, method, exc_info=True)
+                return {"success": False, "error": str(error) or type(error).__name__}
+            if result is None:
+                return {"success": True}
+            return {"success": True, "result": result}
+
+        async def _async_call(device) -> dict:
+            if service.service in LOCAL_SERVICES:
+                return await _async_run(device)
+            adapter = device.coordinator.adapter
+            if adapter not in adapter_limits:
+                adapter_limits[adapter] = asyncio.Semaphore(MAX_CONNECTIONS_PER_ADAPTER)
+            with device.coordinator.tracer.span(f"{DOMAIN}.{service.service}", entity_id=device.entity_id) as span:
+                queued = time.time_ns()
+                async with adapter_limits[adapter]:
+                    tracing.record_span("queue", queued, waiting_for="adapter", adapter=str(adapter))
+                    result = await _async_run(device)
+                if result["success"]:
+                    try:
+                        await device.async_update_ha_state(True)
+                    except Exception as error:
+                        # The command went through, the state read after it did not
+                        LOGGER.debug("%s: refresh after %s failed", device.entity_id, method, exc_info=True)
+                        result = {**result, "success": False, "error": f"refresh failed: {str(error) or type(error).__name__}"}
+                if not result["success"] and span is not None:
+                    span.error = result["error"]
+            if span is not None:
+                result["trace_id"] = span.trace.trace_id
+            return result
+
+        results = dict(zip(
+            (device.entity_id for device in devices),
+            await asyncio.gather(*(_async_call(device) for device in devices)),
+        ))
+
+        if service.return_response:
+            return results
+        failed = {entity_id: result["error"] for entity_id, result in results.items() if not result["success"]}
+        if failed:
+            raise HomeAssistantError(f"prana.{service.service} failed for {failed}")
+        return None
+
+    hass.services.async_register(DOMAIN, "set_speed", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "set_speed_in", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "set_speed_out", async_service_handler, schema=PRANA_SERVICE_SET_SPEED_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "set_brightness", async_service_handler, schema=PRANA_SERVICE_SET_BRIGHTNESS_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "set_display", async_service_handler, schema=PRANA_SERVICE_SET_DISPLAY_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "boost_for", async_service_handler, schema=PRANA_SERVICE_BOOST_FOR_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "get_history_stats", async_service_handler, schema=PRANA_SERVICE_GET_HISTORY_STATS_SCHEMA, supports_response=SupportsResponse.ONLY)
+    hass.services.async_register(DOMAIN, "get_stats", async_service_handler, schema=PRANA_SERVICE_BASE_SCHEMA, supports_response=SupportsResponse.ONLY)
+    hass.services.async_register(DOMAIN, "set_schedule", async_service_handler, schema=PRANA_SERVICE_SET_SCHEDULE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "reset_filter", async_service_handler, schema=PRANA_SERVICE_BASE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "start_capture", async_service_handler, schema=PRANA_SERVICE_START_CAPTURE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "stop_capture", async_service_handler, schema=PRANA_SERVICE_BASE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+
+class PranaFan(PranaEntity, FanEntity):
     """Representation of a Prana fan."""
+    # Readings duplicated from the sensor entities change with almost every
+    # frame; keep them on the state but out of the recorder attributes table.
+    _unrecorded_attributes = frozenset(
+        {
+            "brightness",
+            "humidity",
+            "pressure",
+            "temperature_in",
+            "temperature_out",
+            "co2",
+            "voc",
+            "speed_in&out",
+            "speed_in",
+            "speed_out",
+            "last_updated",
+            "display",
+            "timer",
+        }
+    )
+
     def __init__(self, coordinator, config_entry):
         """Initialize the sensor."""
-        super().__init__(coordinator, config_entry)
-        self.coordinator = coordinator
-        self._name = config_entry.data["name"]
+        super().__init__(coordinator, config_entry.data["name"])
         LOGGER.debug('entry id : %s', config_entry.entry_id)
         self._entry_id = f"{config_entry.entry_id}_fan"
+        self._config_entry = config_entry
+        self._attributes = {}
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        LOGGER.debug('Received data is on: %s', self.coordinator.is_on)
+        attributes = self._build_attributes()
+        rendered = (
+            self.available,
+            self.is_on,
+            self.percentage,
+            self.preset_mode,
+            self.current_direction,
+            attributes,
+        )
+        if rendered == self._last_rendered:
+            self.coordinator.state_writes_skipped += 1
+            return
+        self._last_rendered = rendered
+        # last_updated changes with every frame, so it is kept out of the comparison
+        attributes["last_updated"] = self.coordinator.lastRead
+        self._attributes = attributes
+        self.coordinator.state_writes += 1
         self.async_write_ha_state()
 
     @property
@@ -141,19 +263,16 @@ class PranaFan(CoordinatorEntity, FanEntity):
     @property
     def is_on(self):
         """Return state of the fan."""
-        LOGGER.debug('Reading if device data is on: %s', self.coordinator.is_on)
         return self.coordinator.is_on
 
-    @property
-    def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
-
     @property
     def extra_state_attributes(self):
         """Provide attributes for display on device card."""
-        LOGGER.debug("Setting device attributes")
-        attributes = {
+        return self._attributes
+
+    def _build_attributes(self) -> dict:
+        """Collect the device attributes from the coordinator."""
+        return {
             "brightness": self.coordinator.brightness,
             "humidity": self.coordinator.humidity,
             "pressure": self.coordinator.pressure,
@@ -172,25 +291,11 @@ class PranaFan(CoordinatorEntity, FanEntity):
             "speed_out": self.coordinator.speed_out,
             "air_in": self.coordinator.is_input_fan_on,
             "air_out": self.coordinator.is_output_fan_on,
-            "last_updated": self.coordinator.lastRead,
             "flows_locked": self.coordinator.flows_locked,
             "display": self.coordinator.display,
             "timer_on": self.coordinator.timer_on,
             "timer": self.coordinator.timer,
         }
-        return attributes
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)}
-        )
 
     @property
     def supported_features(self) -> int:
@@ -296,3 +401,28 @@ class PranaFan(CoordinatorEntity, FanEntity):
 
     async def async_set_display(self, display: int):
         await self.coordinator.set_display(Display(display))
+
+    async def async_get_history_stats(self, field: str, minutes: int, percentiles: list):
+        now = time.time()
+        return self.coordinator.history.stats(field, now - minutes * 60, now, percentiles)
+
+    async def async_get_stats(self):
+        return self.coordinator.stats()
+
+    async def async_boost_for(self, minutes: int):
+        await self.coordinator.boost_for(minutes)
+
+    async def async_reset_filter(self):
+        self.coordinator.async_reset_filter()
+
+    async def async_start_capture(self, minutes: int | None = None):
+        return await self.coordinator.async_start_capture(minutes)
+
+    async def async_stop_capture(self):
+        return await self.coordinator.async_stop_capture()
+
+    async def async_set_schedule(self, programs: list):
+        # Stored with the entry; the update listener re-arms the scheduler
+        self.hass.config_entries.async_update_entry(
+            self._config_entry, options={**self._config_entry.options, CONF_SCHEDULE: programs}
+        )
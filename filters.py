@@ -0,0 +1,128 @@
+"""Streaming filters applied to sensor readings before they reach the entities."""
+from array import array
+from bisect import bisect_left
+from typing import Optional, Union
+
+Number = Union[int, float]
+
+class RollingMedian:
+    """Median of the last ``window`` samples.
+
+    Samples live twice in preallocated storage: a ring in arrival order, to
+    know which sample leaves the window, and the same window kept sorted.
+    Both positions in the sorted window are found by binary search and the
+    slice between them is shifted by one, so nothing is re-sorted per sample.
+    """
+    __slots__ = ("_window", "_ring", "_sorted", "_count", "_pos")
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self._window = window
+        self._ring = array("d", bytes(8 * window))
+        self._sorted = array("d", bytes(8 * window))
+        self._count = 0
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def update(self, sample: Number) -> float:
+        """Add a sample and return the median of the window."""
+        s = self._sorted
+        n = self._count
+        if n < self._window:
+            j = bisect_left(s, sample, 0, n)
+            s[j + 1:n + 1] = s[j:n]
+            s[j] = sample
+            self._count = n = n + 1
+        else:
+            old = self._ring[self._pos]
+            i = bisect_left(s, old, 0, n)
+            j = bisect_left(s, sample, 0, n)
+            if j > i:
+                s[i:j - 1] = s[i + 1:j]
+                s[j - 1] = sample
+            else:
+                s[j + 1:i + 1] = s[j:i]
+                s[j] = sample
+        self._ring[self._pos] = sample
+        self._pos = (self._pos + 1) % self._window
+        return self.median
+
+    @property
+    def median(self) -> float:
+        n = self._count
+        if n % 2:
+            return self._sorted[n // 2]
+        return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+
+class Ewma:
+    """Exponentially weighted moving average; alpha 1.0 passes samples through."""
+    __slots__ = ("_alpha", "value")
+
+    def __init__(self, alpha: float) -> None:
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self._alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: Number) -> float:
+        if self.value is None:
+            self.value = float(sample)
+        else:
+            self.value += self._alpha * (sample - self.value)
+        return self.value
+
+class SensorFilter:
+    """Rolling median followed by an optional EWMA for one sensor channel.
+
+    Output keeps the reading's resolution: integer channels stay integers and
+    temperatures keep one decimal, so a smoothed value only changes when the
+    change is visible.
+    """
+    __slots__ = ("_median", "_ewma")
+
+    def __init__(self, window: int, alpha: float = 1.0) -> None:
+        self._median = RollingMedian(window) if window > 1 else None
+        self._ewma = Ewma(alpha) if alpha < 1 else None
+
+    def update(self, sample: Optional[Number]) -> Optional[Number]:
+        if sample is None:
+            return None
+        value = sample
+        if self._median is not None:
+            value = self._median.update(sample)
+        if self._ewma is not None:
+            value = self._ewma.update(value)
+        if isinstance(sample, int):
+            return int(round(value))
+        return round(value, 1)
+
+class DeadBand:
+    """Hold the published value until a reading leaves the band around it.
+
+    A reading is published when it differs from the last published value by
+    more than ``band``, or when ``max_silence`` seconds have passed since the
+    last publish, so slow drift still reaches the state machine eventually.
+    """
+    __slots__ = ("_band", "_max_silence", "value", "_published_at")
+
+    def __init__(self, band: float, max_silence: float) -> None:
+        self._band = band
+        self._max_silence = max_silence
+        self.value: Optional[Number] = None
+        self._published_at = 0.0
+
+    def update(self, sample: Optional[Number], now: float) -> Optional[Number]:
+        """Return the value to publish for ``sample`` read at monotonic ``now``."""
+        if sample is None:
+            return self.value
+        if (
+            self.value is None
+            or abs(sample - self.value) > self._band
+            or now - self._published_at >= self._max_silence
+        ):
+            self.value = sample
+            self._published_at = now
+        return self.value
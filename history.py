@@ -0,0 +1,124 @@
+"""Compact in-memory history of the decoded numeric fields."""
+from array import array
+from bisect import bisect_left, bisect_right
+from math import isnan, nan
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Decoded fields kept per frame
+HISTORY_FIELDS = (
+    "co2",
+    "voc",
+    "temperature_in",
+    "temperature_out",
+    "humidity",
+    "pressure",
+    "speed",
+    "speed_in",
+    "speed_out",
+    "brightness",
+)
+# 24 h at one frame every 10 s
+DEFAULT_CAPACITY = 8640
+
+class _TimestampView:
+    """Chronological, read-only view of the ring's timestamps for bisect."""
+    __slots__ = ("_history",)
+
+    def __init__(self, history: "History") -> None:
+        self._history = history
+
+    def __len__(self) -> int:
+        return self._history.count
+
+    def __getitem__(self, index: int) -> float:
+        return self._history.timestamps[self._history.physical(index)]
+
+class History:
+    """Typed ring buffer of frames: float64 timestamps, float32 values.
+
+    Missing values are stored as NaN. Timestamps are appended in
+    non-decreasing order, so windows are located by binary search.
+    """
+
+    def __init__(self, fields: Sequence[str] = HISTORY_FIELDS, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values: Dict[str, array] = {field: array("f", bytes(4 * capacity)) for field in self.fields}
+        self.count = 0
+        self._next = 0
+        self._view = _TimestampView(self)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def physical(self, index: int) -> int:
+        """Map a chronological index to a slot in the ring."""
+        return (self._next - self.count + index) % self.capacity
+
+    def append(self, timestamp: float, values: Mapping[str, Optional[float]]) -> None:
+        if self.count and timestamp < self.timestamps[self.physical(self.count - 1)]:
+            # Wall clock stepped back; keep the buffer ordered
+            timestamp = self.timestamps[self.physical(self.count - 1)]
+        slot = self._next
+        self.timestamps[slot] = timestamp
+        for field, column in self.values.items():
+            value = values.get(field)
+            column[slot] = nan if value is None else value
+        self._next = (slot + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    @property
+    def oldest(self) -> Optional[float]:
+        return self.timestamps[self.physical(0)] if self.count else None
+
+    @property
+    def newest(self) -> Optional[float]:
+        return self.timestamps[self.physical(self.count - 1)] if self.count else None
+
+    def window(self, start: float, end: float) -> Tuple[int, int]:
+        """Return the chronological index range [lo, hi) of frames in [start, end]."""
+        return bisect_left(self._view, start), bisect_right(self._view, end)
+
+    def iter_window(self, field: str, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """Yield (timestamp, value) for the non-missing values of a field in [start, end]."""
+        column = self.values[field]
+        lo, hi = self.window(start, end)
+        for index in range(lo, hi):
+            slot = self.physical(index)
+            value = column[slot]
+            if not isnan(value):
+                yield self.timestamps[slot], value
+
+    def stats(self, field: str, start: float, end: float, percentiles: Iterable[float] = ()) -> dict:
+        """Return count/min/max/mean and the requested percentiles of a field in [start, end]."""
+        values = sorted(value for _, value in self.iter_window(field, start, end))
+        result = {"count": len(values), "min": None, "max": None, "mean": None}
+        percentiles = list(percentiles)
+        if percentiles:
+            result["percentiles"] = {}
+        if not values:
+            for p in percentiles:
+                result["percentiles"][_percentile_key(p)] = None
+            return result
+        result["min"] = _round(values[0])
+        result["max"] = _round(values[-1])
+        result["mean"] = _round(sum(values) / len(values))
+        for p in percentiles:
+            result["percentiles"][_percentile_key(p)] = _round(_percentile(values, p))
+        return result
+
+def _percentile(ordered: List[float], p: float) -> float:
+    """Linear interpolation between closest ranks, like numpy's default."""
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def _percentile_key(p: float) -> str:
+    return f"p{p:g}"
+
+def _round(value: float) -> float:
+    # Values are stored as float32; trim the representation noise
+    return round(value, 3)
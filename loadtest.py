@@ -0,0 +1,255 @@
+"""Load test: many simulated units on one in-process Home Assistant.
+
+    python -m custom_components.prana.loadtest --units 1,10,50 --duration 60
+
+For every unit count a fresh Home Assistant core is started in a temporary
+config directory. The integration is set up for that many config entries
+whose radio is a ``SimulatedTransport`` (see DATA_TRANSPORT_FACTORY):
+units push frames every ``--frame-interval`` seconds and random user
+commands (fan speed, switch toggles) arrive at ``--command-rate`` per unit
+per minute. One row is printed per unit count, then the change of every
+metric per added unit between the first and the last row; for setup
+memory that is the memory per coordinator. The metrics:
+
+* event loop lag p50/p99/max (ms): overshoot of a 50 ms sleep;
+* CPU per frame (µs): process CPU time over frames received, including
+  the idle cost of Home Assistant itself, which dominates at few units;
+* state writes per second (state_changed events of the integration);
+* setup memory (KiB): traced allocations of setting up all entries;
+* command latency p50/p95/p99 (ms): service call to completion, which
+  includes the write and the state read that follows it.
+
+Only the radio is replaced; the coordinator, the entities and the state
+machine are the real ones. The bluetooth dependency is marked loaded
+without being set up, as no entry uses it.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_MAC, EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry
+
+from . import DATA_TRANSPORT_FACTORY
+from .const import CONF_HAS_SENSORS, DOMAIN
+from .simulator import SimulatedTransport, SimulatedUnit
+from .timing import format_table, percentile
+
+LOGGER = logging.getLogger(__name__)
+
+LAG_PROBE = 0.05
+PERCENTAGES = (20, 40, 60, 80, 100)
+
+def _config_entry(index: int) -> ConfigEntry:
+    """A config entry for simulated unit ``index``, across ConfigEntry signatures."""
+    address = f"00:50:00:00:{index // 256:02X}:{index % 256:02X}"
+    name = f"prana_sim_{index}"
+    arguments = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": name,
+        "data": {CONF_MAC: address, "name": name, CONF_HAS_SENSORS: True},
+        "source": "user",
+        "options": {},
+        "unique_id": address,
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": (),
+    }
+    accepted = inspect.signature(ConfigEntry).parameters
+    return ConfigEntry(**{key: value for key, value in arguments.items() if key in accepted})
+
+async def _start_hass(config_dir: str) -> HomeAssistant:
+    try:
+        hass = HomeAssistant(config_dir)
+    except TypeError:
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    loader.async_setup(hass)
+    hass.config.skip_pip = True
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    # Entries use the simulator, so the bluetooth stack is never touched
+    hass.config.components.add("bluetooth")
+    await hass.async_start()
+    return hass
+
+class _LagProbe:
+    """Measure how late the loop wakes a sleeping task."""
+
+    def __init__(self) -> None:
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            began = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE)
+            self.samples.append(max(0.0, time.perf_counter() - began - LAG_PROBE))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        self._task.cancel()
+
+async def run(units: int, duration: float, frame_interval: float, command_rate: float, latency: float, seed: int) -> Dict[str, float]:
+    """Run one load level and return its metrics."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="prana-loadtest-") as config_dir:
+        hass = await _start_hass(config_dir)
+        hass.data[DATA_TRANSPORT_FACTORY] = lambda address, name: SimulatedTransport(
+            SimulatedUnit(seed=rng.random()), name, latency=latency, push_interval=frame_interval
+        )
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for index in range(units):
+            await hass.config_entries.async_add(_config_entry(index))
+        await hass.async_block_till_done()
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        registry = entity_registry.async_get(hass)
+        entities = [entry for entry in registry.entities.values() if entry.platform == DOMAIN]
+        fans = [entry.entity_id for entry in entities if entry.domain == "fan"]
+        switches = [entry.entity_id for entry in entities if entry.domain == "switch"]
+        prana_entities = {entry.entity_id for entry in entities}
+
+        writes = 0
+
+        def _count_write(event) -> None:
+            nonlocal writes
+            if event.data["entity_id"] in prana_entities:
+                writes += 1
+
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _count_write)
+        coordinators = list(hass.data[DOMAIN].values())
+        frames_before = sum(coordinator.frames_received for coordinator in coordinators)
+        latencies: List[float] = []
+        failures = 0
+
+        async def _command() -> None:
+            nonlocal failures
+            if switches and rng.random() < 0.2:
+                call = ("switch", "toggle", {"entity_id": rng.choice(switches)})
+            else:
+                call = ("fan", "set_percentage", {"entity_id": rng.choice(fans), "percentage": rng.choice(PERCENTAGES)})
+            began = time.perf_counter()
+            try:
+                await hass.services.async_call(*call, blocking=True)
+            except Exception:
+                failures += 1
+                LOGGER.debug("command %s failed", call, exc_info=True)
+                return
+            latencies.append(time.perf_counter() - began)
+
+        probe = _LagProbe()
+        probe.start()
+        cpu_began = time.process_time()
+        began = time.monotonic()
+        commands = []
+        # Commands from all units form one Poisson process
+        rate = units * command_rate / 60
+        next_command = began + (rng.expovariate(rate) if rate else duration)
+        while (now := time.monotonic()) < began + duration:
+            if now >= next_command:
+                commands.append(hass.async_create_task(_command()))
+                next_command += rng.expovariate(rate)
+                continue
+            await asyncio.sleep(min(next_command, began + duration) - now)
+        await asyncio.gather(*commands, return_exceptions=True)
+        elapsed = time.monotonic() - began
+        cpu = time.process_time() - cpu_began
+        probe.stop()
+        unsub()
+
+        frames = sum(coordinator.frames_received for coordinator in coordinators) - frames_before
+        await hass.async_stop()
+
+    lag = probe.samples
+    return {
+        "units": units,
+        "frames": frames,
+        "loop_lag_p50_ms": round(percentile(lag, 50) * 1000, 2),
+        "loop_lag_p99_ms": round(percentile(lag, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lag, default=0.0) * 1000, 2),
+        "cpu_per_frame_us": round(cpu / frames * 1e6, 1) if frames else None,
+        "state_writes_per_s": round(writes / elapsed, 1),
+        "setup_memory_kib": round(memory / 1024, 1),
+        "commands": len(latencies),
+        "command_failures": failures,
+        "command_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "command_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "command_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+COLUMNS = (
+    ("units", "units"),
+    ("frames", "frames"),
+    ("loop_lag_p50_ms", "lag p50"),
+    ("loop_lag_p99_ms", "lag p99"),
+    ("loop_lag_max_ms", "lag max"),
+    ("cpu_per_frame_us", "cpu/frame us"),
+    ("state_writes_per_s", "writes/s"),
+    ("setup_memory_kib", "setup KiB"),
+    ("commands", "cmds"),
+    ("command_failures", "failed"),
+    ("command_p50_ms", "cmd p50"),
+    ("command_p95_ms", "cmd p95"),
+    ("command_p99_ms", "cmd p99"),
+)
+
+def _growth(rows: List[Dict[str, float]]) -> Optional[List[str]]:
+    """The change of each metric per added unit between the first and the last row."""
+    if len(rows) < 2:
+        return None
+    first, last = rows[0], rows[-1]
+    added = last["units"] - first["units"]
+    growth = ["per unit"]
+    for key, _ in COLUMNS[1:]:
+        if isinstance(first[key], (int, float)) and isinstance(last[key], (int, float)) and added:
+            growth.append(f"{(last[key] - first[key]) / added:+.3g}")
+        else:
+            growth.append("")
+    return growth
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m custom_components.prana.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--units", default="1,5,10,25,50", help="comma separated unit counts")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds per unit count")
+    parser.add_argument("--frame-interval", type=float, default=1.0, help="seconds between frames of a unit")
+    parser.add_argument("--command-rate", type=float, default=1.0, help="user commands per unit per minute")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated radio latency per write, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    rows = []
+    for units in (int(value) for value in args.units.split(",")):
+        row = asyncio.run(run(units, args.duration, args.frame_interval, args.command_rate, args.latency, args.seed))
+        rows.append(row)
+        if args.json:
+            print(json.dumps(row), flush=True)
+        else:
+            print(f"{units} units done", file=sys.stderr)
+    if not args.json:
+        print(format_table(COLUMNS, rows, _growth(rows)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,321 +1,143 @@
 from homeassistant.components.number import (
     DOMAIN as ENTITY_DOMAIN,
+    NumberDeviceClass,
     NumberEntity,
-)
-
-from homeassistant.components.sensor import (
-    DOMAIN as ENTITY_DOMAIN,
-    SensorEntity,
-    SensorDeviceClass,
-    SensorStateClass,
+    NumberEntityDescription,
+    NumberMode,
 )
 
 """Support for Prana fan."""
 from . import DOMAIN
 
-from datetime import datetime, timedelta
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
 import logging
-import math
 
-from homeassistant.components.fan import PLATFORM_SCHEMA, FanEntity, FanEntityFeature
-from homeassistant.const import (
-    ATTR_ENTITY_ID,
-    ATTR_MODE,
-    CONF_HOST,
-    CONF_NAME,
-    CONF_TOKEN,
-)
+from .entity import PranaEntity
 
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+LOGGER = logging.getLogger(__name__)
 
-from homeassistant.helpers import device_registry
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.const import STATE_OFF
-from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import dispatcher_send, async_dispatcher_connect
-from homeassistant.util.percentage import (
-    int_states_in_range,
-    percentage_to_ranged_value,
-    ranged_value_to_percentage,
+@dataclass(frozen=True, kw_only=True)
+class PranaNumberEntityDescription(NumberEntityDescription):
+    """Describes a Prana control; the key doubles as the unique id suffix."""
+    value_fn: Callable[[Any], Any]
+    set_fn: Callable[[Any, float], Awaitable[Any]]
+    depends_on: frozenset[str]
+    # Overrides the shared device availability when set
+    available_fn: Callable[[Any], bool] | None = None
+
+NUMBERS: tuple[PranaNumberEntityDescription, ...] = (
+    PranaNumberEntityDescription(
+        key="brightness",
+        name="Brightness",
+        native_min_value=0,
+        native_max_value=6,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.brightness,
+        set_fn=lambda coordinator, value: coordinator.set_brightness(value),
+        depends_on=frozenset({"brightness"}),
+    ),
+    PranaNumberEntityDescription(
+        key="speed_in",
+        name="Speed In",
+        device_class=NumberDeviceClass.SPEED,
+        native_min_value=0,
+        native_max_value=6,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.speed_in if coordinator.is_input_fan_on else 0,
+        set_fn=lambda coordinator, value: coordinator.set_speed_in(value),
+        available_fn=lambda coordinator: not coordinator.flows_locked,
+        depends_on=frozenset({"speed_in", "is_input_fan_on", "flows_locked"}),
+    ),
+    PranaNumberEntityDescription(
+        key="speed_out",
+        name="Speed Out",
+        device_class=NumberDeviceClass.SPEED,
+        native_min_value=0,
+        native_max_value=6,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.speed_out if coordinator.is_output_fan_on else 0,
+        set_fn=lambda coordinator, value: coordinator.set_speed_out(value),
+        available_fn=lambda coordinator: not coordinator.flows_locked,
+        depends_on=frozenset({"speed_out", "is_output_fan_on", "flows_locked"}),
+    ),
+    PranaNumberEntityDescription(
+        key="speed",
+        name="Speed",
+        device_class=NumberDeviceClass.SPEED,
+        native_min_value=0,
+        native_max_value=6,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.speed_locked,
+        set_fn=lambda coordinator, value: coordinator.set_speed(value),
+        available_fn=lambda coordinator: coordinator.flows_locked,
+        depends_on=frozenset({"speed_locked", "flows_locked"}),
+    ),
 )
 
-LOGGER = logging.getLogger(__name__)
+#Test
+async def _set_test_byte4(coordinator, value: float) -> None:
+    coordinator.byte4 = int(value)
+
+TEST_BYTE4 = PranaNumberEntityDescription(
+    key="test_byte4",
+    name="Test Byte4",
+    native_min_value=0,
+    native_max_value=255,
+    native_step=1,
+    mode=NumberMode.BOX,
+    value_fn=lambda coordinator: coordinator.byte4,
+    set_fn=_set_test_byte4,
+    available_fn=lambda coordinator: True,
+    depends_on=frozenset(),
+)
+#Test
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    controls_to_add = []
-
-    controls_to_add.append(PranaBrightness(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaSpeedIn(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaSpeedOut(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaSpeed(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
+    descriptions = list(NUMBERS)
 
     #Test
-    #controls_to_add.append(PranaTestByte4(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
+    #descriptions.append(TEST_BYTE4)
     #Test
 
-    async_add_entities(controls_to_add)
+    async_add_entities(
+        PranaNumber(coordinator, config_entry.data["name"], description)
+        for description in descriptions
+    )
 
-class BasePranaNumber(CoordinatorEntity, NumberEntity):
-    # Implement one of these methods.
-    """Representation of a Prana fan."""
-    def __init__(self, hass, coordinator, name: str, entry_id: str):
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        _attr_has_entity_name = True
-        self._hass = hass
-        self.coordinator = coordinator
-        self._name = name
-        self._entry_id = entry_id
-        self._hass.bus.async_listen("prana_update", self._handle_coordinator_update)
+class PranaNumber(PranaEntity, NumberEntity):
+    """Prana control driven by an entity description."""
+    entity_description: PranaNumberEntityDescription
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+    def __init__(self, coordinator, name: str, description: PranaNumberEntityDescription):
+        """Initialize the control."""
+        super().__init__(coordinator, name)
+        self.entity_description = description
+        self._depends_on = description.depends_on
+        self._attr_unique_id = f"{name}_{description.key}"
 
     @property
     def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)},
-        )
-
-class PranaBrightness(BasePranaNumber):
-    @property
-    def name(self) -> str:
-        """Return the name of the control."""
-        return "Brightness"
-
-    @property
-    def native_max_value(self):
-        return 6
-
-    @property
-    def native_min_value(self):
-        return 0
-
-    @property
-    def native_step(self):
-        return 1
-
-    @property
-    def mode(self):
-        return "slider"
+        """Return if the control can be used."""
+        if self.entity_description.available_fn is not None:
+            return self.entity_description.available_fn(self.coordinator)
+        return self.coordinator.available
 
     @property
     def native_value(self):
-        """Return brightness of the fan."""
-        return self.coordinator.brightness
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
+        """Return the control value."""
+        return self.entity_description.value_fn(self.coordinator)
 
     async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.set_brightness(value)
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_brightness"
-
-class PranaSpeedIn(BasePranaNumber):
-    @property
-    def name(self) -> str:
-        """Return the name of the control."""
-        return "Speed In"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SPEED
-
-    @property
-    def native_max_value(self):
-        return 6
-
-    @property
-    def native_min_value(self):
-        return 0
-
-    @property
-    def native_step(self):
-        return 1
-
-    @property
-    def mode(self):
-        return "slider"
-
-    @property
-    def available(self):
-        return not self.coordinator.flows_locked
-
-    @property
-    def native_value(self):
-        """Return in level of the fan."""
-        if self.coordinator.is_input_fan_on:
-            return self.coordinator.speed_in
-        return 0
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.set_speed_in(value)
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_speed_in"
-
-class PranaSpeedOut(BasePranaNumber):
-    @property
-    def name(self) -> str:
-        """Return the name of the control."""
-        return "Speed Out"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SPEED
-
-    @property
-    def native_max_value(self):
-        return 6
-
-    @property
-    def native_min_value(self):
-        return 0
-
-    @property
-    def native_step(self):
-        return 1
-
-    @property
-    def mode(self):
-        return "slider"
-
-    @property
-    def available(self):
-        return not self.coordinator.flows_locked
-
-    @property
-    def native_value(self):
-        """Return out level of the fan."""
-        if self.coordinator.is_output_fan_on:
-            return self.coordinator.speed_out
-        return 0
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.set_speed_out(value)
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_speed_out"
-
-class PranaSpeed(BasePranaNumber):
-    @property
-    def name(self) -> str:
-        """Return the name of the control."""
-        return "Speed"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SPEED
-
-    @property
-    def native_max_value(self):
-        return 6
-
-    @property
-    def native_min_value(self):
-        return 0
-
-    @property
-    def native_step(self):
-        return 1
-
-    @property
-    def mode(self):
-        return "slider"
-
-    @property
-    def available(self):
-        return self.coordinator.flows_locked
-
-    @property
-    def native_value(self):
-        """Return out level of the fan."""
-        return self.coordinator.speed_locked
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.set_speed(value)
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_speed"
-
-#Test
-class PranaTestByte4(BasePranaNumber):
-    @property
-    def name(self) -> str:
-        """Return the name of the control."""
-        return "Test Byte4"
-
-    @property
-    def native_max_value(self):
-        return 255
-
-    @property
-    def native_min_value(self):
-        return 0
-
-    @property
-    def native_step(self):
-        return 1
-
-    @property
-    def mode(self):
-        return "box"
-
-    @property
-    def available(self):
-        return True
-
-    @property
-    def native_value(self):
-        return self.coordinator.byte4
-
-    async def async_set_native_value(self, value: float) -> None:
-        self.coordinator.byte4 = int(value)
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_test_byte4"
-#Test
+        await self.entity_description.set_fn(self.coordinator, value)
@@ -0,0 +1,190 @@
+"""Prana BLE protocol: opcodes and a pure frame decoder.
+
+Nothing here talks to Bluetooth or Home Assistant, so the decoder can be
+used and profiled on recorded frames.
+"""
+from datetime import datetime
+from math import log2
+import struct
+from typing import Optional
+
+from .const import Display, PranaSensorsState, PranaState
+
+CONTROL_SERVICE_UUID = "0000baba-0000-1000-8000-00805f9b34fb"
+CONTROL_RW_CHARACTERISTIC_UUID = "0000cccc-0000-1000-8000-00805f9b34fb"
+WRITE_CHARACTERISTIC_UUID = CONTROL_RW_CHARACTERISTIC_UUID
+READ_CHARACTERISTIC_UUID = CONTROL_RW_CHARACTERISTIC_UUID
+STATE_MSG_PREFIX = b"\xbe\xef"
+MAX_BRIGHTNESS = 6
+
+class Cmd:
+    STOP = bytearray([0xBE, 0xEF, 0x04, 0x01])
+
+    CHANGE_BRIGHTNESS = bytearray([0xBE, 0xEF, 0x04, 0x02])
+
+    TOGGLE_HEATING = bytearray([0xBE, 0xEF, 0x04, 0x05])
+    TOGGLE_NIGHT_MODE = bytearray([0xBE, 0xEF, 0x04, 0x06])
+    TOGGLE_BOOST_MODE = bytearray([0xBE, 0xEF, 0x04, 0x07])
+
+    TOGGLE_FLOW_LOCK = bytearray([0xBE, 0xEF, 0x04, 0x09])
+
+    START = bytearray([0xBE, 0xEF, 0x04, 0x0A])
+
+    SPEED_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x0B])
+    SPEED_UP = bytearray([0xBE, 0xEF, 0x04, 0x0C])
+
+    FLOW_IN_OFF = bytearray([0xBE, 0xEF, 0x04, 0x0D])
+
+    SPEED_IN_UP = bytearray([0xBE, 0xEF, 0x04, 0x0E])
+    SPEED_IN_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x0F])
+
+    FLOW_OUT_OFF = bytearray([0xBE, 0xEF, 0x04, 0x10])
+
+    SPEED_OUT_UP = bytearray([0xBE, 0xEF, 0x04, 0x11])
+    SPEED_OUT_DOWN = bytearray([0xBE, 0xEF, 0x04, 0x12])
+
+    TOGGLE_TIMER = bytearray([0xBE, 0xEF, 0x04, 0x13])
+    TIMER_DOWN_START = bytearray([0xBE, 0xEF, 0x04, 0x14])
+    TIMER_UP_START = bytearray([0xBE, 0xEF, 0x04, 0x15])
+
+    TOGGLE_WINTER_MODE = bytearray([0xBE, 0xEF, 0x04, 0x16])
+    AUTO_MODE = bytearray([0xBE, 0xEF, 0x04, 0x18])
+
+    DISPLAY_LEFT = bytearray([0xBE, 0xEF, 0x04, 0x19])
+    DISPLAY_RIGHT = bytearray([0xBE, 0xEF, 0x04, 0x1A])
+
+    SPEED_IN_1 = bytearray([0xBE, 0xEF, 0x04, 0x1F])
+    SPEED_IN_2 = bytearray([0xBE, 0xEF, 0x04, 0x20])
+    SPEED_IN_3 = bytearray([0xBE, 0xEF, 0x04, 0x21])
+    SPEED_IN_4 = bytearray([0xBE, 0xEF, 0x04, 0x22])
+    SPEED_IN_5 = bytearray([0xBE, 0xEF, 0x04, 0x23])
+    SPEED_IN_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x24])
+    SPEED_IN_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x25])
+    SPEED_IN_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x26])
+    SPEED_IN_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x27])
+    SPEED_IN_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x28])
+
+    SPEED_OUT_1 = bytearray([0xBE, 0xEF, 0x04, 0x29])
+    SPEED_OUT_2 = bytearray([0xBE, 0xEF, 0x04, 0x2A])
+    SPEED_OUT_3 = bytearray([0xBE, 0xEF, 0x04, 0x2B])
+    SPEED_OUT_4 = bytearray([0xBE, 0xEF, 0x04, 0x2C])
+    SPEED_OUT_5 = bytearray([0xBE, 0xEF, 0x04, 0x2D])
+    SPEED_OUT_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x2E])
+    SPEED_OUT_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x2F])
+    SPEED_OUT_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x30])
+    SPEED_OUT_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x31])
+    SPEED_OUT_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x32])
+
+    SPEED_1 = bytearray([0xBE, 0xEF, 0x04, 0x33])
+    SPEED_2 = bytearray([0xBE, 0xEF, 0x04, 0x34])
+    SPEED_3 = bytearray([0xBE, 0xEF, 0x04, 0x35])
+    SPEED_4 = bytearray([0xBE, 0xEF, 0x04, 0x36])
+    SPEED_5 = bytearray([0xBE, 0xEF, 0x04, 0x37])
+    SPEED_BOOST_1 = bytearray([0xBE, 0xEF, 0x04, 0x38])
+    SPEED_BOOST_2 = bytearray([0xBE, 0xEF, 0x04, 0x39])
+    SPEED_BOOST_3 = bytearray([0xBE, 0xEF, 0x04, 0x3A])
+    SPEED_BOOST_4 = bytearray([0xBE, 0xEF, 0x04, 0x3B])
+    SPEED_BOOST_5 = bytearray([0xBE, 0xEF, 0x04, 0x3C])
+
+    TOGGLE_AUTO_MODE_2 = bytearray([0xBE, 0xEF, 0x04, 0x43])
+    TOGGLE_AUTO_PLUS_MODE = bytearray([0xBE, 0xEF, 0x04, 0x44])
+
+    DISPLAY_TEMPERATURE_IN_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x47])
+    DISPLAY_TEMPERATURE_OUT_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x48])
+    DISPLAY_CO2_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x49])
+    DISPLAY_VOC_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4A])
+    DISPLAY_HUMIDITY_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4B])
+    DISPLAY_PRESURE_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4C])
+    DISPLAY_COMPATIBILITY_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4D])
+    DISPLAY_ALL_SYMBOLS_LOCKED = bytearray([0xBE, 0xEF, 0x04, 0x4E])
+
+    TIMER_STOP = bytearray([0xBE, 0xEF, 0x04, 0x50])
+    TIMER_START_10M = bytearray([0xBE, 0xEF, 0x04, 0x51])
+    TIMER_START_20M = bytearray([0xBE, 0xEF, 0x04, 0x52])
+    TIMER_START_30M = bytearray([0xBE, 0xEF, 0x04, 0x53])
+    TIMER_START_1H = bytearray([0xBE, 0xEF, 0x04, 0x54])
+    TIMER_START_1H30M = bytearray([0xBE, 0xEF, 0x04, 0x55])
+    TIMER_START_2H = bytearray([0xBE, 0xEF, 0x04, 0x56])
+    TIMER_START_3H = bytearray([0xBE, 0xEF, 0x04, 0x57])
+    TIMER_START_5H = bytearray([0xBE, 0xEF, 0x04, 0x58])
+    TIMER_START_9H = bytearray([0xBE, 0xEF, 0x04, 0x59])
+
+    DISPLAY_FAN = bytearray([0xBE, 0xEF, 0x04, 0x5A])
+    DISPLAY_TEMPERATURE_IN = bytearray([0xBE, 0xEF, 0x04, 0x5B])
+    DISPLAY_TEMPERATURE_OUT = bytearray([0xBE, 0xEF, 0x04, 0x5C])
+    DISPLAY_CO2 = bytearray([0xBE, 0xEF, 0x04, 0x5D])
+    DISPLAY_VOC = bytearray([0xBE, 0xEF, 0x04, 0x5E])
+    DISPLAY_HUMIDITY = bytearray([0xBE, 0xEF, 0x04, 0x5F])
+    DISPLAY_QUALITY_FAN = bytearray([0xBE, 0xEF, 0x04, 0x60])
+    DISPLAY_PRESURE = bytearray([0xBE, 0xEF, 0x04, 0x61])
+    DISPLAY_FAN_2 = bytearray([0xBE, 0xEF, 0x04, 0x62])
+    DISPLAY_DATE = bytearray([0xBE, 0xEF, 0x04, 0x63])
+    DISPLAY_TIME = bytearray([0xBE, 0xEF, 0x04, 0x64])
+
+    SET_BRIGHTNESS_0 = bytearray([0xBE, 0xEF, 0x04, 0x6E])
+    SET_BRIGHTNESS_1 = bytearray([0xBE, 0xEF, 0x04, 0x6F])
+    SET_BRIGHTNESS_2 = bytearray([0xBE, 0xEF, 0x04, 0x70])
+    SET_BRIGHTNESS_3 = bytearray([0xBE, 0xEF, 0x04, 0x71])
+    SET_BRIGHTNESS_4 = bytearray([0xBE, 0xEF, 0x04, 0x72])
+    SET_BRIGHTNESS_5 = bytearray([0xBE, 0xEF, 0x04, 0x73])
+    SET_BRIGHTNESS_6 = bytearray([0xBE, 0xEF, 0x04, 0x74])
+
+    READ_STATE = bytearray([0xBE, 0xEF, 0x05, 0x01, 0x00, 0x00, 0x00, 0x00, 0x5A])
+    READ_DEVICE_DETAILS = bytearray([0xBE, 0xEF, 0x05, 0x02, 0x00, 0x00, 0x00, 0x00, 0x5A])
+
+# Device timer steps, shortest first: (seconds, opcode)
+TIMER_STEPS = (
+    (10 * 60, Cmd.TIMER_START_10M),
+    (20 * 60, Cmd.TIMER_START_20M),
+    (30 * 60, Cmd.TIMER_START_30M),
+    (60 * 60, Cmd.TIMER_START_1H),
+    (90 * 60, Cmd.TIMER_START_1H30M),
+    (2 * 60 * 60, Cmd.TIMER_START_2H),
+    (3 * 60 * 60, Cmd.TIMER_START_3H),
+    (5 * 60 * 60, Cmd.TIMER_START_5H),
+    (9 * 60 * 60, Cmd.TIMER_START_9H),
+)
+
+def decode_state(data: bytes, timestamp: Optional[datetime] = None) -> Optional[PranaState]:
+    """Decode a state frame; return None for anything else."""
+    if not data[:2] == STATE_MSG_PREFIX:
+        return None
+
+    s = PranaState()
+    s.timestamp = timestamp if timestamp is not None else datetime.now()
+    s.brightness = int(log2(data[12]) + 1)
+    s.speed_locked = int(data[26] / 10)
+    s.speed_in = int(data[30] / 10)
+    s.speed_out = int(data[34] / 10)
+    s.auto_mode = bool(data[20] & 1)
+    s.auto_mode_plus = bool(data[20] & 2)
+    s.night_mode = bool(data[16])
+    s.boost_mode = bool(data[18])
+    s.flows_locked = bool(data[22])
+    s.is_on = bool(data[10])
+    s.mini_heating_enabled = bool(data[14])
+    s.winter_mode_enabled = bool(data[42])
+    s.is_input_fan_on = bool(data[28])
+    s.is_output_fan_on = bool(data[32])
+    s.display = Display(int(data[99]))
+    s.timer_on = bool(data[38])
+    s.timer = ((int(data[39]) << 8) + int(data[40]))
+
+    # Reading sensors
+    sensors = PranaSensorsState()
+    sensors.humidity = int(data[60] - 128)
+    sensors.pressure = 512 + int(data[78])
+    # co2 and voc
+    sensors.co2 = int(struct.unpack_from(">h", data, 61)[0] & 0b0011111111111111)
+    sensors.voc = int(struct.unpack_from(">h", data, 63)[0] & 0b0011111111111111)
+    if 0 < sensors.co2 < 10000:
+        # Different version of firmware ???
+        sensors.temperature_in = float(struct.unpack_from(">h", data, 51)[0] & 0b0011111111111111) / 10.0
+        sensors.temperature_out = float(struct.unpack_from(">h", data, 54)[0] & 0b0011111111111111) / 10.0
+    else:
+        sensors.temperature_in = float(data[49]) / 10
+        sensors.temperature_out = float(data[55]) / 10
+    # Add sensors to the state only in case device has corresponding hardware
+    if sensors.humidity > 0:
+        s.sensors = sensors
+    return s
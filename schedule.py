@@ -0,0 +1,155 @@
+"""Weekly programs run by the integration, one timer per unit."""
+from __future__ import annotations
+
+from datetime import datetime, time as dt_time, timedelta
+import heapq
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import voluptuous as vol
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .const import WEEK_DAYS
+
+LOGGER = logging.getLogger(__name__)
+
+# Settings a program can change; None or absent leaves them alone
+PROGRAM_SETTINGS = ("speed", "night_mode", "brightness", "heating")
+
+def _days(value: Any) -> int:
+    """Accept a WEEK_DAYS bitmask or a list of WEEK_DAYS names."""
+    if isinstance(value, int):
+        mask = value
+    else:
+        mask = 0
+        for name in cv.ensure_list(value):
+            try:
+                mask |= WEEK_DAYS[name].value
+            except KeyError as error:
+                raise vol.Invalid(f"unknown day {name}") from error
+    if not 0 < mask <= WEEK_DAYS.all.value:
+        raise vol.Invalid("days must select at least one day")
+    return mask
+
+PROGRAM_SCHEMA = vol.Schema(
+    {
+        vol.Required("days"): _days,
+        vol.Required("time"): vol.All(cv.time, lambda value: value.strftime("%H:%M")),
+        vol.Optional("speed"): vol.All(vol.Coerce(int), vol.Range(min=0, max=6)),
+        vol.Optional("night_mode"): cv.boolean,
+        vol.Optional("brightness"): vol.All(vol.Coerce(int), vol.Range(min=0, max=6)),
+        vol.Optional("heating"): cv.boolean,
+    }
+)
+SCHEDULE_SCHEMA = vol.All(cv.ensure_list, [PROGRAM_SCHEMA])
+
+def next_fire(program: dict, after: datetime) -> datetime:
+    """Return the first local time strictly after ``after`` when the program runs."""
+    hour, minute = (int(part) for part in program["time"].split(":"))
+    local = dt_util.as_local(after)
+    for offset in range(8):
+        day = local.date() + timedelta(days=offset)
+        if not program["days"] & (1 << day.weekday()):
+            continue
+        # Built in the configured zone, so the offset is right across DST changes
+        when = datetime.combine(day, dt_time(hour, minute), tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        if when > local:
+            return when
+    raise ValueError("program has no days")
+
+class Scheduler:
+    """Fire weekly programs for one unit.
+
+    Upcoming fire times of every program sit in a heap; only the earliest
+    is armed with async_track_point_in_time. On fire, all programs due at
+    that moment are merged in list order and only settings that differ from
+    the unit's current state are sent.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, programs: List[dict]) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self.programs: List[dict] = list(programs)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._unsub: Optional[CALLBACK_TYPE] = None
+        self.fired = 0
+        self.commands = 0
+
+    @callback
+    def async_start(self) -> None:
+        now = dt_util.now()
+        self._heap = [(next_fire(program, now), index) for index, program in enumerate(self.programs)]
+        heapq.heapify(self._heap)
+        self._async_arm()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def async_set_programs(self, programs: List[dict]) -> None:
+        self.async_stop()
+        self.programs = list(programs)
+        self.async_start()
+
+    @property
+    def next_fire(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    @callback
+    def _async_arm(self) -> None:
+        self.async_stop()
+        if self._heap:
+            self._unsub = async_track_point_in_time(self._hass, self._async_fire, self._heap[0][0])
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        self._unsub = None
+        settings: Dict[str, Any] = {}
+        due: List[int] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, index = heapq.heappop(self._heap)
+            due.append(index)
+        for index in sorted(due):
+            program = self.programs[index]
+            settings.update({key: program[key] for key in PROGRAM_SETTINGS if program.get(key) is not None})
+            heapq.heappush(self._heap, (next_fire(program, now), index))
+        self._async_arm()
+        if due:
+            self.fired += 1
+            self._hass.async_create_task(self._async_apply(settings))
+
+    async def _async_apply(self, settings: Dict[str, Any]) -> None:
+        coordinator = self._coordinator
+        steps: List[Tuple[str, Callable]] = []
+        if "speed" in settings and settings["speed"] != coordinator.speed:
+            steps.append(("speed", lambda: coordinator.set_speed(settings["speed"])))
+        if "night_mode" in settings and coordinator.night_mode is not None and settings["night_mode"] != coordinator.night_mode:
+            # The unit only toggles night mode, so never toggle blind
+            steps.append(("night_mode", coordinator.toggle_night_mode))
+        if "brightness" in settings and settings["brightness"] != coordinator.brightness:
+            steps.append(("brightness", lambda: coordinator.set_brightness(settings["brightness"])))
+        if "heating" in settings and settings["heating"] != coordinator.mini_heating_enabled:
+            steps.append(("heating", lambda: coordinator.set_heating(settings["heating"])))
+        for setting, step in steps:
+            try:
+                await step()
+                self.commands += 1
+            except Exception:
+                LOGGER.warning("%s: scheduled %s change failed", coordinator.mac, setting, exc_info=True)
+        if steps:
+            await coordinator.async_request_refresh()
+
+    def as_dict(self) -> dict:
+        return {
+            "programs": self.programs,
+            "next_fire": None if self.next_fire is None else self.next_fire.isoformat(),
+            "fired": self.fired,
+            "commands": self.commands,
+        }
@@ -45,6 +45,8 @@ from homeassistant.util.percentage import (
 
 from .const import PranaState, Speed, PranaSensorsState, Display, PranaTimer
 
+from .entity import PranaEntity
+
 LOGGER = logging.getLogger(__name__)
 
 DISPLAYS = {
@@ -85,42 +87,17 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     async_add_entities(controls_to_add)
 
-class BasePranaSelect(CoordinatorEntity, SelectEntity):
-    # Implement one of these methods.
+class BasePranaSelect(PranaEntity, SelectEntity):
     """Representation of a Prana fan."""
     def __init__(self, hass, coordinator, name: str, entry_id: str):
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        _attr_has_entity_name = True
+        super().__init__(coordinator, name)
         self._hass = hass
-        self.coordinator = coordinator
-        self._name = name
         self._entry_id = entry_id
-        self._hass.bus.async_listen("prana_update", self._handle_coordinator_update)
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)},
-        )
 
 class PranaDisplaySelect(BasePranaSelect):
+    _depends_on = frozenset({"display"})
+
     def __init__(self, hass, coordinator, name: str, entry_id: str):
         self.current_option = self.get_option_name(coordinator.display)
         self.options = list(DISPLAYS.keys())
@@ -154,6 +131,8 @@ class PranaDisplaySelect(BasePranaSelect):
         return displays_r[display]
 
 class PranaTimerSelect(BasePranaSelect):
+    _depends_on = frozenset({"timer_on"})
+
     def __init__(self, hass, coordinator, name: str, entry_id: str):
         self.current_option = self.get_option_name(coordinator.timer_on)
         self.options = list(PRANA_TIMERS.keys())
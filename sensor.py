@@ -1,6 +1,7 @@
 from homeassistant.components.sensor import (
     DOMAIN as ENTITY_DOMAIN,
     SensorEntity,
+    SensorEntityDescription,
     SensorDeviceClass,
     SensorStateClass,
 )
@@ -8,508 +9,296 @@ from homeassistant.components.sensor import (
 """Support for Prana fan."""
 from . import DOMAIN
 
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 import logging
-import math
 
-from homeassistant.components.fan import PLATFORM_SCHEMA, FanEntity, FanEntityFeature
-from homeassistant.const import (
-    ATTR_ENTITY_ID,
-    ATTR_MODE,
-    CONF_HOST,
-    CONF_NAME,
-    CONF_TOKEN,
-)
-
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-
-from homeassistant.helpers import device_registry
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.const import STATE_OFF
 from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import dispatcher_send, async_dispatcher_connect
-from homeassistant.util.percentage import (
-    int_states_in_range,
-    percentage_to_ranged_value,
-    ranged_value_to_percentage,
-)
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.entity import EntityCategory
+
+from .entity import PranaEntity
+from .external_statistics import STATISTIC_FIELDS
 
 LOGGER = logging.getLogger(__name__)
 
+@dataclass(frozen=True, kw_only=True)
+class PranaSensorEntityDescription(SensorEntityDescription):
+    """Describes a Prana sensor; the key doubles as the unique id suffix."""
+    value_fn: Callable[[Any], Any]
+    depends_on: frozenset[str]
+    # Only created for units with the sensor board
+    requires_sensors: bool = False
+    # Only created when the model is configured (derived metrics)
+    requires_model: bool = False
+
+def _derived_sensor(key: str, name: str, unit: str, device_class=None, **kwargs) -> PranaSensorEntityDescription:
+    """Estimate computed by the coordinator from the model table."""
+    return PranaSensorEntityDescription(
+        key=key,
+        name=name,
+        device_class=device_class,
+        state_class=kwargs.pop("state_class", SensorStateClass.MEASUREMENT),
+        native_unit_of_measurement=unit,
+        value_fn=lambda coordinator: getattr(coordinator, key),
+        depends_on=frozenset({key}),
+        requires_model=True,
+        **kwargs,
+    )
+
+def _counter_sensor(key: str, name: str) -> PranaSensorEntityDescription:
+    """Persisted hour counter; only ever drops on a filter reset."""
+    return PranaSensorEntityDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="h",
+        value_fn=lambda coordinator: getattr(coordinator, key),
+        depends_on=frozenset({key}),
+    )
+
+def _mode_sensor(key: str, name: str, field: str) -> PranaSensorEntityDescription:
+    """On/off mode flag, mirrored by the switch platform; no statistics."""
+    return PranaSensorEntityDescription(
+        key=key,
+        name=name,
+        native_unit_of_measurement="",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: getattr(coordinator, field),
+        depends_on=frozenset({field}),
+    )
+
+def _timing_sensor(key: str, name: str) -> PranaSensorEntityDescription:
+    """Last duration of a connection stage, in ms; changes with nearly every frame."""
+    return PranaSensorEntityDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ms",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: getattr(coordinator, key),
+        depends_on=frozenset({key}),
+    )
+
+def _event_counter_sensor(key: str, name: str) -> PranaSensorEntityDescription:
+    """Connection events since the entry was set up."""
+    return PranaSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: getattr(coordinator, key),
+        depends_on=frozenset({key}),
+    )
+
+SENSORS: tuple[PranaSensorEntityDescription, ...] = (
+    PranaSensorEntityDescription(
+        key="temperature_in",
+        name="TemperatureIn",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="°C",
+        value_fn=lambda coordinator: coordinator.temperature_in,
+        depends_on=frozenset({"temperature_in"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="temperature_out",
+        name="TemperatureOut",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="°C",
+        value_fn=lambda coordinator: coordinator.temperature_out,
+        depends_on=frozenset({"temperature_out"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="humidity",
+        name="Humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="%",
+        value_fn=lambda coordinator: coordinator.humidity,
+        depends_on=frozenset({"humidity"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="pressure",
+        name="Pressure",
+        device_class=SensorDeviceClass.ATMOSPHERIC_PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="mmHg",
+        value_fn=lambda coordinator: coordinator.pressure,
+        depends_on=frozenset({"pressure"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="co2",
+        name="CO2",
+        device_class=SensorDeviceClass.CO2,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ppm",
+        value_fn=lambda coordinator: coordinator.co2,
+        depends_on=frozenset({"co2"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="voc",
+        name="TVOC",
+        device_class=SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS_PARTS,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ppb",
+        value_fn=lambda coordinator: coordinator.voc,
+        depends_on=frozenset({"voc"}),
+        requires_sensors=True,
+    ),
+    PranaSensorEntityDescription(
+        key="speed_in_value",
+        name="SpeedIn",
+        device_class=SensorDeviceClass.SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.speed_in,
+        depends_on=frozenset({"speed_in"}),
+    ),
+    PranaSensorEntityDescription(
+        key="speed_out_value",
+        name="SpeedOut",
+        device_class=SensorDeviceClass.SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="",
+        value_fn=lambda coordinator: coordinator.speed_out,
+        depends_on=frozenset({"speed_out"}),
+    ),
+    # High-churn diagnostic values, disabled unless the user enables them
+    PranaSensorEntityDescription(
+        key="brightness_value",
+        name="Brightness",
+        native_unit_of_measurement="",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.brightness,
+        depends_on=frozenset({"brightness"}),
+    ),
+    PranaSensorEntityDescription(
+        key="rssi",
+        name="RSSI",
+        device_class=SensorDeviceClass.SIGNAL_STRENGTH,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="dBm",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.rssi,
+        depends_on=frozenset({"rssi"}),
+    ),
+    _mode_sensor("night_mode_value", "Night Mode", "night_mode"),
+    _mode_sensor("boost_mode_value", "Boost Mode", "boost_mode"),
+    _mode_sensor("auto_mode_value", "Auto Mode", "auto_mode"),
+    _mode_sensor("winter_mode_value", "Winter Mode", "winter_mode_enabled"),
+    _mode_sensor("heating_value", "Heating", "mini_heating_enabled"),
+    _mode_sensor("flows_locked_value", "Flows Locked", "flows_locked"),
+    PranaSensorEntityDescription(
+        key="display_value",
+        name="Display",
+        native_unit_of_measurement="",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.display.value if coordinator.display is not None else None,
+        depends_on=frozenset({"display"}),
+    ),
+    _mode_sensor("timer_on_value", "Timer", "timer_on"),
+    _mode_sensor("auto_mode_plus_value", "Auto+ Mode", "auto_mode_plus"),
+    PranaSensorEntityDescription(
+        key="timer_remaining",
+        name="Timer Remaining",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement="min",
+        value_fn=lambda coordinator: coordinator.timer_remaining,
+        depends_on=frozenset({"timer_remaining"}),
+    ),
+    _counter_sensor("runtime_hours", "Fan Runtime"),
+    _counter_sensor("filter_hours", "Filter Load"),
+    _counter_sensor("heater_hours", "Heater Runtime"),
+    _derived_sensor("supply_airflow", "Supply Airflow", "m³/h"),
+    _derived_sensor("extract_airflow", "Extract Airflow", "m³/h"),
+    _derived_sensor("recovery_efficiency", "Heat Recovery Efficiency", "%"),
+    _derived_sensor("recovered_power", "Recovered Heat", "W", SensorDeviceClass.POWER, requires_sensors=True),
+    _derived_sensor("heater_power", "Heater Power", "W", SensorDeviceClass.POWER),
+    _derived_sensor(
+        "heater_energy", "Heater Energy", "kWh", SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    _timing_sensor("connect_time", "Connect Time"),
+    _timing_sensor("start_notify_time", "Subscribe Time"),
+    _timing_sensor("write_latency", "Write Latency"),
+    _timing_sensor("response_latency", "Response Latency"),
+    _timing_sensor("parse_time", "Parse Time"),
+    _timing_sensor("fan_out_time", "Fan-out Time"),
+    _event_counter_sensor("connection_retries", "Connection Retries"),
+    _event_counter_sensor("disconnects", "Disconnects"),
+)
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    name = config_entry.data["name"]
 
-    sensors_to_add = []
-
-    sensors_to_add.append(PranaSensorTemperatureIn(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorTemperatureOut(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorHumidity(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorPressure(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorCO2(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorVOC(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorSpeedIn(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorSpeedOut(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorBrightness(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorRSSI(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
+    descriptions = [
+        description for description in SENSORS if coordinator.derived is not None or not description.requires_model
+    ]
+    async_add_entities(
+        PranaSensor(coordinator, name, description)
+        for description in descriptions
+        if not description.requires_sensors
+    )
 
-    sensors_to_add.append(PranaSensorModeNight(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorModeBoost(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorModeAuto(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorModeWinter(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorHeating(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorFlowsLocked(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorDisplay(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorTimer(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    sensors_to_add.append(PranaSensorModeAutoPlus(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
+    board_sensors = [description for description in descriptions if description.requires_sensors]
 
-    async_add_entities(sensors_to_add)
+    if coordinator.has_sensors is False:
+        # Drop entities left over from before the hardware was detected
+        registry = entity_registry.async_get(hass)
+        for description in board_sensors:
+            entity_id = registry.async_get_entity_id(ENTITY_DOMAIN, DOMAIN, f"{name}_{description.key}")
+            if entity_id is not None:
+                registry.async_remove(entity_id)
 
-class BasePranaSensor(CoordinatorEntity, SensorEntity):
-    # Implement one of these methods.
-    """Representation of a Prana fan."""
-    def __init__(self, hass, coordinator, name: str, entry_id: str):
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        _attr_has_entity_name = True
-        self._hass = hass
-        self.coordinator = coordinator
-        self._name = name
-        self._entry_id = entry_id
-        self._hass.bus.async_listen("prana_sensor_update", self._handle_coordinator_update)
+    board_added = False
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
+    def _async_add_board_sensors() -> None:
+        """Add the sensor board entities once the unit is known to have it."""
+        nonlocal board_added
+        if board_added or not coordinator.has_sensors:
+            return
+        board_added = True
+        async_add_entities(PranaSensor(coordinator, name, description) for description in board_sensors)
+
+    _async_add_board_sensors()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_add_board_sensors))
+
+class PranaSensor(PranaEntity, SensorEntity):
+    """Prana sensor driven by an entity description."""
+    entity_description: PranaSensorEntityDescription
+
+    def __init__(self, coordinator, name: str, description: PranaSensorEntityDescription):
+        """Initialize the sensor."""
+        super().__init__(coordinator, name)
+        self.entity_description = description
+        self._depends_on = description.depends_on
+        self._attr_unique_id = f"{name}_{description.key}"
 
     @property
     def state_class(self):
-        return SensorStateClass.MEASUREMENT
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)},
-        )
-
-class PranaSensorCO2(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "CO2"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.CO2
+        """Leave statistics to the integration when it exports them itself."""
+        if self.coordinator.statistics is not None and self.entity_description.key in STATISTIC_FIELDS:
+            return None
+        return self.entity_description.state_class
 
     @property
     def native_value(self):
-        """Return co2 of the fan."""
-        return self.coordinator.co2
-
-    @property
-    def native_unit_of_measurement(self):
-        return "ppm"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_co2"
-
-class PranaSensorVOC(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "TVOC"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS_PARTS
-
-    @property
-    def native_value(self):
-        """Return voc of the fan."""
-        return self.coordinator.voc
-
-    @property
-    def native_unit_of_measurement(self):
-        return "ppb"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_voc"
-
-class PranaSensorTemperatureIn(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "TemperatureIn"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.TEMPERATURE
-
-    @property
-    def native_value(self):
-        """Return temperature in of the fan."""
-        return self.coordinator.temperature_in
-
-    @property
-    def native_unit_of_measurement(self):
-        return "°C"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_temperature_in"
-
-class PranaSensorTemperatureOut(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "TemperatureOut"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.TEMPERATURE
-
-    @property
-    def native_value(self):
-        """Return temperature out of the fan."""
-        return self.coordinator.temperature_out
-
-    @property
-    def native_unit_of_measurement(self):
-        return "°C"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_temperature_out"
-
-class PranaSensorHumidity(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Humidity"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.HUMIDITY
-
-    @property
-    def native_value(self):
-        """Return humidity of the fan."""
-        return self.coordinator.humidity
-
-    @property
-    def native_unit_of_measurement(self):
-        return "%"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_humidity"
-
-class PranaSensorPressure(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Pressure"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.ATMOSPHERIC_PRESSURE
-
-    @property
-    def native_value(self):
-        """Return pressure of the fan."""
-        return self.coordinator.pressure
-
-    @property
-    def native_unit_of_measurement(self):
-        return "mmHg"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_pressure"
-
-class PranaSensorSpeedIn(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "SpeedIn"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SPEED
-
-    @property
-    def native_value(self):
-        """Return speed in of the fan."""
-        return self.coordinator.speed_in
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_speed_in_value"
-
-class PranaSensorSpeedOut(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "SpeedOut"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SPEED
-
-    @property
-    def native_value(self):
-        """Return speed out of the fan."""
-        return self.coordinator.speed_out
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_speed_out_value"
-
-class PranaSensorBrightness(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Brightness"
-
-    @property
-    def native_value(self):
-        """Return brightness of the fan."""
-        return self.coordinator.brightness
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_brightness_value"
-
-class PranaSensorRSSI(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "RSSI"
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SIGNAL_STRENGTH
-
-    @property
-    def native_value(self):
-        """Return rssi of the fan."""
-        return self.coordinator.rssi
-
-    @property
-    def native_unit_of_measurement(self):
-        return "dBm"
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_rssi"
-
-class PranaSensorModeNight(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Night Mode"
-
-    @property
-    def native_value(self):
-        return self.coordinator.night_mode
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_night_mode_value"
-
-class PranaSensorModeBoost(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Boost Mode"
-
-    @property
-    def native_value(self):
-        return self.coordinator.boost_mode
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_boost_mode_value"
-
-class PranaSensorModeAuto(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Auto Mode"
-
-    @property
-    def native_value(self):
-        return self.coordinator.auto_mode
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_auto_mode_value"
-
-class PranaSensorModeAutoPlus(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Auto+ Mode"
-
-    @property
-    def native_value(self):
-        return self.coordinator.auto_mode_plus
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_auto_mode_plus_value"
-
-class PranaSensorModeWinter(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Winter Mode"
-
-    @property
-    def native_value(self):
-        return self.coordinator.winter_mode_enabled
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_winter_mode_value"
-
-class PranaSensorHeating(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Heating"
-
-    @property
-    def native_value(self):
-        return self.coordinator.mini_heating_enabled
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_heating_value"
-
-class PranaSensorFlowsLocked(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Flows Locked"
-
-    @property
-    def native_value(self):
-        return self.coordinator.flows_locked
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_flows_locked_value"
-
-class PranaSensorDisplay(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Display"
-
-    @property
-    def native_value(self):
-        return self.coordinator.display.value
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_display_value"
-
-class PranaSensorTimer(BasePranaSensor):
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Timer"
-
-    @property
-    def native_value(self):
-        return self.coordinator.timer_on
-
-    @property
-    def native_unit_of_measurement(self):
-        return ""
-
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_timer_on_value"
+        """Return the sensor value."""
+        return self.entity_description.value_fn(self.coordinator)
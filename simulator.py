@@ -0,0 +1,233 @@
+"""In-process Prana unit for the CLI, load tests and development without hardware.
+
+The simulated unit answers the opcodes in ``protocol.Cmd`` and encodes its
+state in the layout ``protocol.decode_state`` reads. It behaves like a
+unit as far as the integration can tell; it is not a model of the
+firmware.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable
+import random
+import struct
+import time
+from typing import Any, Dict, Optional
+
+from .const import Display
+from .protocol import TIMER_STEPS, Cmd
+
+SIMULATED_ADDRESS = "00:00:00:00:00:00"
+SIMULATED_NAME = "PRNA simulator"
+
+# Opcode bytes -> Cmd name
+OPCODES = {bytes(value): name for name, value in vars(Cmd).items() if isinstance(value, bytearray)}
+TIMER_MINUTES = {bytes(command): seconds // 60 for seconds, command in TIMER_STEPS}
+MAX_LEVEL = 5
+MAX_BRIGHTNESS = 6
+
+# Opcodes that flip one flag
+TOGGLES = {
+    "TOGGLE_HEATING": "mini_heating_enabled",
+    "TOGGLE_NIGHT_MODE": "night_mode",
+    "TOGGLE_BOOST_MODE": "boost_mode",
+    "TOGGLE_FLOW_LOCK": "flows_locked",
+    "TOGGLE_WINTER_MODE": "winter_mode_enabled",
+    "TOGGLE_AUTO_MODE_2": "auto_mode",
+    "AUTO_MODE": "auto_mode",
+    "TOGGLE_AUTO_PLUS_MODE": "auto_mode_plus",
+    "FLOW_IN_OFF": "is_input_fan_on",
+    "FLOW_OUT_OFF": "is_output_fan_on",
+}
+
+def encode_state(state: Dict[str, Any], frame_length: int = 137) -> bytes:
+    """Build a state frame from decoded field values."""
+    data = bytearray(frame_length)
+    data[0:2] = b"\xbe\xef"
+    data[10] = bool(state["is_on"])
+    data[12] = 1 << max(0, state["brightness"] - 1)
+    data[14] = bool(state["mini_heating_enabled"])
+    data[16] = bool(state["night_mode"])
+    data[18] = bool(state["boost_mode"])
+    data[20] = bool(state["auto_mode"]) | bool(state["auto_mode_plus"]) << 1
+    data[22] = bool(state["flows_locked"])
+    data[26] = state["speed_locked"] * 10
+    data[28] = bool(state["is_input_fan_on"])
+    data[30] = state["speed_in"] * 10
+    data[32] = bool(state["is_output_fan_on"])
+    data[34] = state["speed_out"] * 10
+    data[38] = bool(state["timer_on"])
+    struct.pack_into(">H", data, 39, state["timer"])
+    data[42] = bool(state["winter_mode_enabled"])
+    data[99] = state["display"]
+    if state.get("humidity"):
+        # Sensor board, newer firmware layout (0 < CO2 < 10000)
+        struct.pack_into(">h", data, 51, round(state["temperature_in"] * 10))
+        struct.pack_into(">h", data, 54, round(state["temperature_out"] * 10))
+        data[60] = state["humidity"] + 128
+        struct.pack_into(">h", data, 61, state["co2"])
+        struct.pack_into(">h", data, 63, state["voc"])
+        data[78] = state["pressure"] - 512
+    return bytes(data)
+
+class SimulatedUnit:
+    """State of one simulated unit and its reaction to opcodes."""
+
+    def __init__(self, has_sensors: bool = True, seed: Optional[int] = None) -> None:
+        self._random = random.Random(seed)
+        self.state: Dict[str, Any] = {
+            "is_on": True,
+            "brightness": 3,
+            "mini_heating_enabled": False,
+            "night_mode": False,
+            "boost_mode": False,
+            "auto_mode": False,
+            "auto_mode_plus": False,
+            "flows_locked": True,
+            "speed_locked": 2,
+            "is_input_fan_on": True,
+            "speed_in": 2,
+            "is_output_fan_on": True,
+            "speed_out": 2,
+            "timer_on": False,
+            "timer": 0,
+            "winter_mode_enabled": False,
+            "display": Display.FAN.value,
+        }
+        if has_sensors:
+            self.state.update(
+                temperature_in=21.5, temperature_out=4.0, humidity=45, co2=650, voc=120, pressure=745
+            )
+        self._timer_deadline: Optional[float] = None
+        self.commands = 0
+
+    def _set_speed(self, speed_in: Optional[int] = None, speed_out: Optional[int] = None) -> None:
+        s = self.state
+        if speed_in is not None:
+            s["speed_in"] = max(1, speed_in)
+        if speed_out is not None:
+            s["speed_out"] = max(1, speed_out)
+        if s["flows_locked"]:
+            s["speed_locked"] = s["speed_in"]
+
+    def apply(self, opcode: bytes) -> None:
+        """Change the state as the unit would for ``opcode``."""
+        name = OPCODES.get(bytes(opcode))
+        if name is None or name.startswith("READ_"):
+            return
+        self.commands += 1
+        s = self.state
+        if name in TOGGLES:
+            s[TOGGLES[name]] = not s[TOGGLES[name]]
+        elif name == "START":
+            s["is_on"] = True
+        elif name == "STOP":
+            s["is_on"] = False
+        elif name in ("SPEED_UP", "SPEED_DOWN"):
+            step = 1 if name == "SPEED_UP" else -1
+            level = min(MAX_LEVEL, s["speed_in"] + step)
+            self._set_speed(level, level)
+        elif name in ("SPEED_IN_UP", "SPEED_IN_DOWN"):
+            self._set_speed(speed_in=min(MAX_LEVEL, s["speed_in"] + (1 if name.endswith("UP") else -1)))
+        elif name in ("SPEED_OUT_UP", "SPEED_OUT_DOWN"):
+            self._set_speed(speed_out=min(MAX_LEVEL, s["speed_out"] + (1 if name.endswith("UP") else -1)))
+        elif name.startswith(("SPEED_1", "SPEED_2", "SPEED_3", "SPEED_4", "SPEED_5", "SPEED_BOOST_")):
+            level = int(name[-1]) + (MAX_LEVEL if "BOOST" in name else 0)
+            self._set_speed(level, level)
+        elif name.startswith("SPEED_IN_"):
+            self._set_speed(speed_in=int(name[-1]) + (MAX_LEVEL if "BOOST" in name else 0))
+        elif name.startswith("SPEED_OUT_"):
+            self._set_speed(speed_out=int(name[-1]) + (MAX_LEVEL if "BOOST" in name else 0))
+        elif name.startswith("TIMER_START_"):
+            s["timer_on"] = True
+            self._timer_deadline = time.monotonic() + TIMER_MINUTES[bytes(opcode)] * 60
+        elif name == "TIMER_STOP" or (name == "TOGGLE_TIMER" and s["timer_on"]):
+            s["timer_on"] = False
+            self._timer_deadline = None
+        elif name == "TOGGLE_TIMER":
+            s["timer_on"] = True
+            self._timer_deadline = time.monotonic() + TIMER_STEPS[0][0]
+        elif name.startswith("SET_BRIGHTNESS_"):
+            # Level 0 and 1 read back the same
+            s["brightness"] = max(1, int(name[-1]))
+        elif name == "CHANGE_BRIGHTNESS":
+            s["brightness"] = s["brightness"] % MAX_BRIGHTNESS + 1
+        elif name in ("DISPLAY_LEFT", "DISPLAY_RIGHT"):
+            s["display"] = (s["display"] + (1 if name == "DISPLAY_RIGHT" else -1)) % len(Display)
+        elif name.startswith("DISPLAY_") and name[len("DISPLAY_"):] in Display.__members__:
+            s["display"] = Display[name[len("DISPLAY_"):]].value
+
+    def frame(self) -> bytes:
+        """Encode the current state, advancing the timer and the sensor random walk."""
+        s = self.state
+        if self._timer_deadline is not None:
+            remaining = self._timer_deadline - time.monotonic()
+            if remaining <= 0:
+                # The unit switches off when its timer runs out
+                s["timer_on"] = False
+                s["is_on"] = False
+                self._timer_deadline = None
+            s["timer"] = max(0, int(remaining // 60) + 1) if s["timer_on"] else 0
+        if "co2" in s:
+            r = self._random
+            s["co2"] = min(5000, max(400, s["co2"] + r.randint(-15, 15)))
+            s["voc"] = min(2000, max(0, s["voc"] + r.randint(-5, 5)))
+            s["temperature_in"] = round(s["temperature_in"] + r.choice((-0.1, 0, 0, 0.1)), 1)
+            s["temperature_out"] = round(s["temperature_out"] + r.choice((-0.1, 0, 0, 0.1)), 1)
+            s["humidity"] = min(90, max(10, s["humidity"] + r.choice((-1, 0, 0, 0, 1))))
+        return encode_state(s)
+
+class SimulatedTransport:
+    """Transport to a SimulatedUnit.
+
+    ``latency`` delays every connect and write. With ``push_interval`` the
+    unit also sends a state frame on its own about that often (jittered)
+    while connected.
+    """
+
+    def __init__(
+        self,
+        unit: Optional[SimulatedUnit] = None,
+        name: str = SIMULATED_NAME,
+        latency: float = 0.0,
+        push_interval: Optional[float] = None,
+    ) -> None:
+        self.unit = unit if unit is not None else SimulatedUnit()
+        self.name = name
+        self.latency = latency
+        self.push_interval = push_interval
+        self._connected = False
+        self._on_notify: Optional[Callable[[bytes], Awaitable[None]]] = None
+        self._push_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self, on_notify: Callable[[bytes], Awaitable[None]], on_disconnect: Callable[[], None]) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._on_notify = on_notify
+        self._connected = True
+        if self.push_interval:
+            self._push_task = asyncio.create_task(self._push())
+
+    async def _push(self) -> None:
+        while self._connected:
+            await asyncio.sleep(self.push_interval * random.uniform(0.8, 1.2))
+            if self._connected:
+                await self._on_notify(self.unit.frame())
+
+    async def write(self, data: bytes, response: bool) -> None:
+        if not self._connected:
+            raise ConnectionError(f"{self.name}: not connected")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if bytes(data) == bytes(Cmd.READ_STATE):
+            await self._on_notify(self.unit.frame())
+        else:
+            self.unit.apply(data)
+
+    async def disconnect(self) -> None:
+        self._connected = False
+        if self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
@@ -1,262 +1,92 @@
 from homeassistant.components.switch import (
     DOMAIN as ENTITY_DOMAIN,
     SwitchEntity,
+    SwitchEntityDescription,
 )
 
 """Support for Prana fan."""
 from . import DOMAIN
 
-from datetime import datetime, timedelta
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
 import logging
-import math
 
-from homeassistant.components.fan import PLATFORM_SCHEMA, FanEntity, FanEntityFeature
-from homeassistant.const import (
-    ATTR_ENTITY_ID,
-    ATTR_MODE,
-    CONF_HOST,
-    CONF_NAME,
-    CONF_TOKEN,
-)
+from .entity import PranaEntity
 
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+LOGGER = logging.getLogger(__name__)
 
-from homeassistant.helpers import device_registry
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.const import STATE_OFF
-from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import dispatcher_send, async_dispatcher_connect
-from homeassistant.util.percentage import (
-    int_states_in_range,
-    percentage_to_ranged_value,
-    ranged_value_to_percentage,
+@dataclass(frozen=True, kw_only=True)
+class PranaSwitchEntityDescription(SwitchEntityDescription):
+    """Describes a Prana switch; the key doubles as the unique id suffix."""
+    value_fn: Callable[[Any], Any]
+    turn_on_fn: Callable[[Any], Awaitable[Any]]
+    turn_off_fn: Callable[[Any], Awaitable[Any]]
+    depends_on: frozenset[str]
+
+def _toggle_switch(key: str, name: str, field: str, toggle: str) -> PranaSwitchEntityDescription:
+    """Mode the device only exposes as a toggle command."""
+    return PranaSwitchEntityDescription(
+        key=key,
+        name=name,
+        value_fn=lambda coordinator: getattr(coordinator, field),
+        turn_on_fn=lambda coordinator: getattr(coordinator, toggle)(),
+        turn_off_fn=lambda coordinator: getattr(coordinator, toggle)(),
+        depends_on=frozenset({field}),
+    )
+
+SWITCHES: tuple[PranaSwitchEntityDescription, ...] = (
+    PranaSwitchEntityDescription(
+        key="heating",
+        name="Heating",
+        value_fn=lambda coordinator: coordinator.mini_heating_enabled,
+        turn_on_fn=lambda coordinator: coordinator.set_heating(True),
+        turn_off_fn=lambda coordinator: coordinator.set_heating(False),
+        depends_on=frozenset({"mini_heating_enabled"}),
+    ),
+    PranaSwitchEntityDescription(
+        key="winter_mode",
+        name="Winter Mode",
+        value_fn=lambda coordinator: coordinator.winter_mode_enabled,
+        turn_on_fn=lambda coordinator: coordinator.set_winter_mode(True),
+        turn_off_fn=lambda coordinator: coordinator.set_winter_mode(False),
+        depends_on=frozenset({"winter_mode_enabled"}),
+    ),
+    _toggle_switch("auto_mode", "Auto Mode", "auto_mode", "toggle_auto_mode"),
+    _toggle_switch("flow_lock", "Flow Lock", "flows_locked", "toggle_flow_lock"),
+    _toggle_switch("night_mode", "Night Mode", "night_mode", "toggle_night_mode"),
+    _toggle_switch("auto_plus_mode", "Auto+ Mode", "auto_mode_plus", "toggle_auto_plus_mode"),
+    _toggle_switch("boost_mode", "Boost", "boost_mode", "toggle_boost_mode"),
 )
 
-LOGGER = logging.getLogger(__name__)
-
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    controls_to_add = []
-
-    controls_to_add.append(PranaHeating(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaWinterMode(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaAutoMode(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaFlowLock(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-
-    controls_to_add.append(PranaNightMode(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaAutoPlusMode(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-    controls_to_add.append(PranaBoostMode(hass, coordinator, config_entry.data["name"], config_entry.entry_id))
-
-    async_add_entities(controls_to_add)
-
-class BasePranaSwitch(CoordinatorEntity, SwitchEntity):
-    # Implement one of these methods.
-    """Representation of a Prana fan."""
-    def __init__(self, hass, coordinator, name: str, entry_id: str):
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        _attr_has_entity_name = True
-        self._hass = hass
-        self.coordinator = coordinator
-        self._name = name
-        self._entry_id = entry_id
-        self._hass.bus.async_listen("prana_update", self._handle_coordinator_update)
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
-
-    @property
-    def available(self):
-        """Return state of the fan."""
-        return self.coordinator.lastRead != None and (self.coordinator.lastRead > datetime.now() - timedelta(minutes=5))
-
-    @property
-    def device_info(self):
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, self.coordinator.mac)
-            },
-            name=self.name,
-            connections={(device_registry.CONNECTION_NETWORK_MAC, self.coordinator.mac)},
-        )
-
-class PranaHeating(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_heating"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Heating"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.mini_heating_enabled
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.set_heating(True)
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.set_heating(False)
-
-class PranaWinterMode(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_winter_mode"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Winter Mode"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.winter_mode_enabled
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.set_winter_mode(True)
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.set_winter_mode(False)
-
-class PranaAutoMode(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_auto_mode"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Auto Mode"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.auto_mode
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.toggle_auto_mode()
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.toggle_auto_mode()
-
-class PranaAutoPlusMode(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_auto_plus_mode"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Auto+ Mode"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.auto_mode_plus
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.toggle_auto_plus_mode()
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.toggle_auto_plus_mode()
-
-class PranaNightMode(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_night_mode"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Night Mode"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.night_mode
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.toggle_night_mode()
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.toggle_night_mode()
-
-class PranaBoostMode(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_boost_mode"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Boost"
-
-    @property
-    def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.boost_mode
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn on the entity."""
-        await self.coordinator.toggle_boost_mode()
-
-    async def async_turn_off(self, **kwargs) -> None:
-        """Turn off the entity."""
-        await self.coordinator.toggle_boost_mode()
+    async_add_entities(
+        PranaSwitch(coordinator, config_entry.data["name"], description)
+        for description in SWITCHES
+    )
 
-class PranaFlowLock(BasePranaSwitch):
-    @property
-    def unique_id(self) -> str:
-        """Return a unique, Home Assistant friendly identifier for this entity."""
-        return self._name + "_flow_lock"
+class PranaSwitch(PranaEntity, SwitchEntity):
+    """Prana switch driven by an entity description."""
+    entity_description: PranaSwitchEntityDescription
 
-    @property
-    def name(self) -> str:
-        """Return the name of the switch."""
-        return "Flow Lock"
+    def __init__(self, coordinator, name: str, description: PranaSwitchEntityDescription):
+        """Initialize the switch."""
+        super().__init__(coordinator, name)
+        self.entity_description = description
+        self._depends_on = description.depends_on
+        self._attr_unique_id = f"{name}_{description.key}"
 
     @property
     def is_on(self):
-        """Return state of the fan."""
-        return self.coordinator.flows_locked
-
-    @property
-    def should_poll(self):
-        return False
+        """Return state of the switch."""
+        return self.entity_description.value_fn(self.coordinator)
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn on the entity."""
-        await self.coordinator.toggle_flow_lock()
+        await self.entity_description.turn_on_fn(self.coordinator)
 
     async def async_turn_off(self, **kwargs) -> None:
         """Turn off the entity."""
-        await self.coordinator.toggle_flow_lock()
+        await self.entity_description.turn_off_fn(self.coordinator)
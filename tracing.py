@@ -0,0 +1,266 @@
+"""Trace spans for the lifecycle of every command.
+
+A trace starts where a command enters the integration (a prana service
+call, or a retried coordinator or client method) and collects spans for
+queueing, connecting, every GATT write and the notification that confirms
+the command; retries are events on the span that retried. The current
+span lives in a context variable, so the client and the transport add
+spans without being handed anything, and do nothing outside a trace.
+
+A trace is complete once all its spans ended; the confirming notification
+usually arrives after the command returned. Complete traces go to a
+bounded log per unit and to the listeners of the tracer, e.g. the
+OpenTelemetry JSON file exporter.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+TRACE_CAPACITY = 50
+# Exported files are rotated to <path>.1 at this size
+MAX_EXPORT_BYTES = 10 * 1024 * 1024
+
+_current: ContextVar[Optional["Span"]] = ContextVar("prana_span", default=None)
+_untraced: ContextVar[bool] = ContextVar("prana_untraced", default=False)
+
+class Trace:
+    """Spans sharing one trace id."""
+    __slots__ = ("tracer", "trace_id", "spans", "open")
+
+    def __init__(self, tracer: "Tracer") -> None:
+        self.tracer = tracer
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+        self.open = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The trace with times relative to its first span, in ms."""
+        start = self.spans[0].start_ns
+        end = max(span.end_ns or start for span in self.spans)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.spans[0].name,
+            "start": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start / 1e9)),
+            "duration_ms": round((end - start) / 1e6, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "offset_ms": round((span.start_ns - start) / 1e6, 3),
+                    "duration_ms": None if span.end_ns is None else round((span.end_ns - span.start_ns) / 1e6, 3),
+                    "attributes": span.attributes,
+                    "events": [
+                        {"name": name, "offset_ms": round((when - start) / 1e6, 3), **attributes}
+                        for when, name, attributes in span.events
+                    ],
+                    "error": span.error,
+                }
+                for span in self.spans
+            ],
+        }
+
+class Span:
+    """One timed step of a trace; times are ns since the epoch."""
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "events", "error")
+
+    def __init__(
+        self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any], start_ns: Optional[int] = None
+    ) -> None:
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.events: List[Tuple[int, str, Dict[str, Any]]] = []
+        self.error: Optional[str] = None
+        trace.spans.append(self)
+        trace.open += 1
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append((time.time_ns(), name, attributes))
+
+    def end(self, error: Optional[str] = None) -> None:
+        """End the span; the trace completes with its last span. Ending twice does nothing."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = error
+        trace = self.trace
+        trace.open -= 1
+        if not trace.open:
+            trace.tracer._complete(trace)
+
+@contextmanager
+def _enter(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.end(type(error).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+class Tracer:
+    """Starts traces for one unit and keeps the last ``capacity`` complete ones."""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY) -> None:
+        self.traces: Deque[Trace] = deque(maxlen=capacity)
+        # Called with every complete trace
+        self.listeners: List[Callable[[Trace], None]] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """A span in the current trace, or the root of a new one (None within ``untraced``)."""
+        parent = _current.get()
+        if parent is None and _untraced.get():
+            yield None
+            return
+        if parent is None:
+            span = Span(Trace(self), name, None, attributes)
+        else:
+            span = Span(parent.trace, name, parent.span_id, attributes)
+        with _enter(span):
+            yield span
+
+    def _complete(self, trace: Trace) -> None:
+        self.traces.append(trace)
+        for listener in self.listeners:
+            listener(trace)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Complete traces, newest first."""
+        return [trace.as_dict() for trace in reversed(self.traces)]
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """A child of the current span; nothing outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _enter(Span(parent.trace, name, parent.span_id, attributes)) as child:
+        yield child
+
+def start_span(name: str, start_ns: Optional[int] = None, **attributes: Any) -> Optional[Span]:
+    """A child of the current span that the caller ends, possibly from another task."""
+    parent = _current.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, attributes, start_ns)
+
+def record_span(name: str, start_ns: int, **attributes: Any) -> None:
+    """A child of the current span that started at ``start_ns`` and ends now."""
+    child = start_span(name, start_ns, **attributes)
+    if child is not None:
+        child.end()
+
+@contextmanager
+def untraced() -> Iterator[None]:
+    """Start no traces within, e.g. for polls; spans of a running trace still work."""
+    token = _untraced.set(True)
+    try:
+        yield
+    finally:
+        _untraced.reset(token)
+
+def add_event(name: str, **attributes: Any) -> None:
+    """Add an event to the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.add_event(name, **attributes)
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return None if current is None else current.trace.trace_id
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+def to_otlp(trace: Trace, resource: Dict[str, Any]) -> Dict[str, Any]:
+    """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes(resource)},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [
+                    {
+                        "traceId": trace.trace_id,
+                        "spanId": span.span_id,
+                        **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": _otlp_attributes(span.attributes),
+                        "events": [
+                            {"timeUnixNano": str(when), "name": name, "attributes": _otlp_attributes(attributes)}
+                            for when, name, attributes in span.events
+                        ],
+                        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                    }
+                    for span in trace.spans
+                ],
+            }],
+        }]
+    }
+
+class OtlpFileExporter:
+    """Append traces to a file, one OTLP/JSON request per line.
+
+    That is the format of the OpenTelemetry Collector file exporter, which
+    its otlpjson receiver reads back. ``export`` and ``detach`` only touch
+    memory, so they are safe on the event loop; ``write`` does the file I/O
+    and belongs in an executor there. Outside an event loop use ``flush``.
+    """
+
+    def __init__(self, path: str, resource: Optional[Dict[str, Any]] = None) -> None:
+        self.path = path
+        self.resource = {"service.name": "prana", **(resource or {})}
+        self.exported = 0
+        self._pending: List[str] = []
+
+    def export(self, trace: Trace) -> None:
+        self._pending.append(json.dumps(to_otlp(trace, self.resource), separators=(",", ":")))
+        self.exported += 1
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def detach(self) -> List[str]:
+        """Take the pending lines for ``write``."""
+        lines, self._pending = self._pending, []
+        return lines
+
+    def write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_EXPORT_BYTES:
+            os.replace(self.path, self.path + ".1")
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    def flush(self) -> None:
+        self.write(self.detach())
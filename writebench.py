@@ -0,0 +1,160 @@
+"""Microbenchmark: state machine writes per 1,000 frames.
+
+    python -m custom_components.prana.writebench --frames 5000 --units 2
+
+A fresh Home Assistant core is started for each mode, with simulated
+units (see DATA_TRANSPORT_FACTORY) that do not push frames. The same
+seeded simulator frames are then fed to every coordinator one at a time,
+each followed by one entity fan-out, as a notification followed by a
+refresh would be. Every ``--command-every`` frames the simulated unit
+applies a random opcode, so the stream mixes a few real changes with the
+sensor random walk.
+
+Modes: ``check`` is PranaEntity as shipped, which skips writes whose
+rendering did not change; ``always`` writes on every update, as
+CoordinatorEntity does. Per mode:
+
+* writes per 1,000 frames: ``async_write_ha_state`` calls of the
+  integration's entities;
+* state changes per 1,000 frames: state_changed events they caused;
+* skipped per 1,000 frames: updates the change check dropped;
+* CPU per frame (µs) of the decode, the pipeline and the fan-out.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry
+
+from . import DATA_TRANSPORT_FACTORY
+from .const import DOMAIN
+from .entity import PranaEntity
+from .loadtest import _config_entry, _start_hass
+from .protocol import decode_state
+from .simulator import OPCODES, SimulatedTransport, SimulatedUnit
+from .timing import format_table
+
+MODES = ("check", "always")
+
+@callback
+def _write_always(self) -> None:
+    """PranaEntity._handle_coordinator_update without the change check."""
+    self.coordinator.state_writes += 1
+    self.async_write_ha_state()
+
+def _frames(count: int, command_every: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    unit = SimulatedUnit(seed=seed)
+    opcodes = [opcode for opcode, name in OPCODES.items() if not name.startswith("READ_")]
+    frames = []
+    for index in range(count):
+        if command_every and index and not index % command_every:
+            unit.apply(rng.choice(opcodes))
+        frames.append(unit.frame())
+    return frames
+
+def _fan_out(coordinator):
+    async def _refresh() -> None:
+        coordinator.async_update_listeners()
+    return _refresh
+
+async def run(mode: str, frames: List[bytes], units: int) -> Dict[str, float]:
+    """Feed ``frames`` to ``units`` coordinators in one mode and return its metrics."""
+    original = PranaEntity._handle_coordinator_update
+    if mode == "always":
+        # Entities bind the handler when they are added, so patch before setup
+        PranaEntity._handle_coordinator_update = _write_always
+    try:
+        with tempfile.TemporaryDirectory(prefix="prana-writebench-") as config_dir:
+            hass = await _start_hass(config_dir)
+            hass.data[DATA_TRANSPORT_FACTORY] = lambda address, name: SimulatedTransport(SimulatedUnit(), name)
+            for index in range(units):
+                await hass.config_entries.async_add(_config_entry(index))
+            await hass.async_block_till_done()
+
+            registry = entity_registry.async_get(hass)
+            registered = {entry.entity_id for entry in registry.entities.values() if entry.platform == DOMAIN}
+            # Entities disabled by default are registered but never written
+            prana_entities = {entity_id for entity_id in hass.states.async_entity_ids() if entity_id in registered}
+            coordinators = list(hass.data[DOMAIN].values())
+            for coordinator in coordinators:
+                # One fan-out per frame instead of the debounced refresh and its poll
+                coordinator.async_request_refresh = _fan_out(coordinator)
+
+            changes = 0
+
+            def _count_change(event) -> None:
+                nonlocal changes
+                if event.data["entity_id"] in prana_entities:
+                    changes += 1
+
+            unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _count_change)
+            writes_before = sum(coordinator.state_writes for coordinator in coordinators)
+            skipped_before = sum(coordinator.state_writes_skipped for coordinator in coordinators)
+            cpu_began = time.process_time()
+            for frame in frames:
+                for coordinator in coordinators:
+                    await coordinator._notification_handler(decode_state(frame), frame)
+            cpu = time.process_time() - cpu_began
+            await hass.async_block_till_done()
+            unsub()
+            writes = sum(coordinator.state_writes for coordinator in coordinators) - writes_before
+            skipped = sum(coordinator.state_writes_skipped for coordinator in coordinators) - skipped_before
+            await hass.async_stop()
+    finally:
+        PranaEntity._handle_coordinator_update = original
+
+    fed = len(frames) * units
+    return {
+        "mode": mode,
+        "units": units,
+        "entities": len(prana_entities),
+        "frames": fed,
+        "writes_per_1000_frames": round(writes / fed * 1000, 1),
+        "state_changes_per_1000_frames": round(changes / fed * 1000, 1),
+        "skipped_per_1000_frames": round(skipped / fed * 1000, 1),
+        "cpu_per_frame_us": round(cpu / fed * 1e6, 1),
+    }
+
+COLUMNS = (
+    ("mode", "mode"),
+    ("entities", "entities"),
+    ("frames", "frames"),
+    ("writes_per_1000_frames", "writes/1k"),
+    ("state_changes_per_1000_frames", "changes/1k"),
+    ("skipped_per_1000_frames", "skipped/1k"),
+    ("cpu_per_frame_us", "cpu/frame us"),
+)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m custom_components.prana.writebench", description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=5000, help="frames fed to every unit")
+    parser.add_argument("--units", type=int, default=1, help="simulated units")
+    parser.add_argument("--command-every", type=int, default=50, help="frames between simulated commands, 0 for none")
+    parser.add_argument("--mode", action="append", choices=MODES, help="run only these (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    frames = _frames(args.frames, args.command_every, args.seed)
+    rows = []
+    for mode in args.mode or MODES:
+        row = asyncio.run(run(mode, frames, args.units))
+        rows.append(row)
+        if args.json:
+            print(json.dumps(row), flush=True)
+    if not args.json:
+        print(format_table(COLUMNS, rows))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())